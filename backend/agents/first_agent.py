@@ -1,19 +1,59 @@
-from groq import Groq
 import json
 import re
-from typing import Dict, Any, Callable
+import threading
+import time
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from services.history_manager import HistoryManager
+from services.llm_gateway import get_llm_client
+from agents.math_parser import parse_arithmetic
+from services.intent_matcher import IntentMatcher
+from services.tool_runtime import tool_runtime
+from services.chat_result import ChatResult, record_tool, track_tool
+
+# Math keywords, compiled once for every agent instance
+MATH_INTENTS = IntentMatcher({
+    "math": [
+        'add', 'added', 'adding', 'plus', 'sum', 'addition', '+',
+        'multipl*', 'times', 'product', '*', 'x', '×',
+        'divid*', 'division', '/', '÷',
+        'subtract*', 'minus', 'difference', '-',
+        'power', 'exponent', '^', '**', 'squared', 'cubed',
+        'square root', 'sqrt', 'root', '√',
+        'calculat*', 'comput*', 'math*'
+    ]
+})
+# "5x3": the matcher's word boundaries keep "x" from matching between digits
+_DIGIT_TIMES = re.compile(r"\d\s*x\s*[\d.]", re.IGNORECASE)
 
 class GroqToolAgent:
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key: str, client: Any = None):
+        # Groq-compatible client routed through the shared LLM gateway
+        self.client = client or get_llm_client(api_key)
         self.tools = {}
         self.history = []
+        self.history_manager = HistoryManager(self.client)
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "templated_responses": 0,
+            "llm_formatted_responses": 0,
+            "llm_round_trips_saved": 0,
+            "local_fast_path_attempts": 0,
+            "local_fast_path_hits": 0,
+            "local_fast_path_seconds": 0.0
+        }
         self._register_default_tools()
     
-    def register_tool(self, name: str, func: Callable, description: str, params_schema: Dict):
-        """Register a tool with the agent"""
+    def register_tool(self, name: str, func: Callable, description: str, params_schema: Dict,
+                      response_template: Optional[str] = None):
+        """
+        Register a tool with the agent. func may be a plain function or a coroutine
+        function; independent calls in one turn run concurrently either way.
+        response_template (e.g. "{a} + {b} = {result}") lets a single call that returns
+        a plain number be answered directly instead of asking the LLM to phrase it.
+        """
         self.tools[name] = {
             "func": func,
+            "response_template": response_template,
             "schema": {
                 "type": "function", 
                 "function": {
@@ -67,7 +107,8 @@ class GroqToolAgent:
                     "b": {"type": "number", "description": "Second number"}
                 },
                 "required": ["a", "b"]
-            }
+            },
+            response_template="{a} + {b} = {result}"
         )
         
         self.register_tool(
@@ -81,7 +122,8 @@ class GroqToolAgent:
                     "b": {"type": "number", "description": "Second number"}
                 },
                 "required": ["a", "b"]
-            }
+            },
+            response_template="{a} × {b} = {result}"
         )
         
         self.register_tool(
@@ -95,7 +137,8 @@ class GroqToolAgent:
                     "b": {"type": "number", "description": "Divisor"}
                 },
                 "required": ["a", "b"]
-            }
+            },
+            response_template="{a} ÷ {b} = {result}"
         )
         
         self.register_tool(
@@ -109,7 +152,8 @@ class GroqToolAgent:
                     "b": {"type": "number", "description": "Number to subtract"}
                 },
                 "required": ["a", "b"]
-            }
+            },
+            response_template="{a} - {b} = {result}"
         )
         
         self.register_tool(
@@ -123,7 +167,8 @@ class GroqToolAgent:
                     "exponent": {"type": "number", "description": "Exponent"}
                 },
                 "required": ["base", "exponent"]
-            }
+            },
+            response_template="{base} raised to the power of {exponent} is {result}"
         )
         
         self.register_tool(
@@ -136,7 +181,8 @@ class GroqToolAgent:
                     "number": {"type": "number", "description": "Number to find square root of"}
                 },
                 "required": ["number"]
-            }
+            },
+            response_template="The square root of {number} is {result}"
         )
     
     def list_tools(self) -> list:
@@ -154,35 +200,101 @@ class GroqToolAgent:
         Instead of relying on regex to find digits, we check only for math keywords.
         This allows things like 'twenty plus one' to be passed to the LLM with tools available.
         """
-        math_keywords = [
-            'add', 'plus', 'sum', 'addition', '+',
-            'multiply', 'times', 'product', '*', 'x',
-            'divide', 'division', '/', '÷',
-            'subtract', 'minus', 'difference', '-',
-            'power', 'exponent', '^', '**',
-            'square root', 'sqrt', 'root',
-            'calculate', 'compute', 'math'
-        ]
-
         # If any math keyword is found, we send to tool mode
-        return any(keyword in text.lower() for keyword in math_keywords)
+        return "math" in MATH_INTENTS.match(text) or _DIGIT_TIMES.search(text) is not None
     
-    def chat(self, user_input: str) -> str:
+    def chat(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
         """Main chat function"""
+        return self.chat_result(user_input, history).text
+    
+    def chat_result(self, user_input: str, history: Optional[List[Dict]] = None) -> ChatResult:
+        """Chat and return the reply with the tools, LLM calls and tokens it took"""
+        return ChatResult.collect(self._respond(user_input, history, stream=False))
+    
+    def chat_stream(self, user_input: str, history: Optional[List[Dict]] = None,
+                    result: Optional[ChatResult] = None) -> Iterator[str]:
+        """Streaming chat function - yields response text as the model generates it, filling result if given"""
+        stream = self._respond(user_input, history, stream=True)
+        return result.record_stream(stream) if result is not None else stream
+    
+    def _respond(self, user_input: str, history: Optional[List[Dict]], stream: bool) -> Iterator[str]:
+        """Route the input and yield the response text"""
         print(f"\n[DEBUG] Input: '{user_input}'")
         
+        # Use the caller's session history, or the agent's own for standalone use
+        if history is None:
+            history = self.history
+        
         # Add user message to history
-        self.history.append({"role": "user", "content": user_input})
+        history.append({"role": "user", "content": user_input})
+        
+        # Simple arithmetic is parsed and answered locally, without the LLM
+        local_answer = self._local_answer(user_input)
+        if local_answer is not None:
+            print("[DEBUG] Answered by local arithmetic parser")
+            history.append({"role": "assistant", "content": local_answer})
+            yield local_answer
+            return
+        
+        # Keep the prompt within the token budget, summarizing older turns
+        self.history_manager.compact(history)
         
         # Decide whether to use tools or just LLM
         if self._should_use_tool(user_input):
             print("[DEBUG] Math detected - using tools")
-            return self._handle_with_tools(user_input)
+            yield from self._handle_with_tools(user_input, history, stream)
         else:
             print("[DEBUG] No math detected - using LLM only")
-            return self._llm_only(user_input)
+            yield from self._llm_only(user_input, history, stream)
+    
+    def _local_answer(self, user_input: str) -> Optional[str]:
+        """Answer a single parsed operation with the registered tool, or None to use the LLM"""
+        start = time.perf_counter()
+        answer = None
+        parsed = parse_arithmetic(user_input)
+        if parsed and parsed[0] in self.tools:
+            tool_name, args = parsed
+            try:
+                with track_tool(tool_name):
+                    result = self.tools[tool_name]["func"](**args)
+                answer = self._templated_response(tool_name, args, result)
+            except (ValueError, ArithmeticError):
+                # Let the LLM explain errors like division by zero
+                answer = None
+        elapsed = time.perf_counter() - start
+        with self._metrics_lock:
+            self.metrics["local_fast_path_attempts"] += 1
+            if answer is not None:
+                self.metrics["local_fast_path_hits"] += 1
+                self.metrics["local_fast_path_seconds"] += elapsed
+        return answer
+    
+    def _reply(self, messages: List[Dict], history: List[Dict], stream: bool = False) -> Iterator[str]:
+        """Generate the assistant reply, yielding text as it arrives, and record it in history"""
+        if stream:
+            completion = self.client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                stream=True
+            )
+            parts = []
+            for chunk in completion:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            assistant_reply = "".join(parts)
+        else:
+            response = self.client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages
+            )
+            assistant_reply = response.choices[0].message.content or ""
+            yield assistant_reply
+        
+        history.append({"role": "assistant", "content": assistant_reply})
     
-    def _handle_with_tools(self, user_input: str) -> str:
+    def _handle_with_tools(self, user_input: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Handle requests that might need tools"""
         system_message = {
             "role": "system", 
@@ -210,7 +322,7 @@ Be concise and clear in your final responses."""
         
         try:
             # Create messages with system prompt
-            messages = [system_message] + self.history
+            messages = [system_message] + history
             
             # Call Groq with tools available
             response = self.client.chat.completions.create(
@@ -221,28 +333,32 @@ Be concise and clear in your final responses."""
             )
             
             message = response.choices[0].message
-            
-            # Check if tools were called
-            if hasattr(message, "tool_calls") and message.tool_calls:
-                print("[DEBUG] Tools were called by LLM")
-                return self._process_tool_calls(message.tool_calls)
-            else:
-                # No tools used, return LLM response
-                assistant_reply = message.content
-                self.history.append({"role": "assistant", "content": assistant_reply})
-                print("[DEBUG] LLM responded without tools")
-                return assistant_reply
                 
         except Exception as e:
             error_msg = f"Error with tools: {str(e)}"
             print(f"[ERROR] {error_msg}")
             # Fallback to LLM only
-            return self._llm_only(user_input)
+            yield from self._llm_only(user_input, history, stream)
+            return
+        
+        # Check if tools were called
+        if hasattr(message, "tool_calls") and message.tool_calls:
+            print("[DEBUG] Tools were called by LLM")
+            yield from self._process_tool_calls(message.tool_calls, history, stream)
+        else:
+            # No tools used, return LLM response
+            assistant_reply = message.content
+            history.append({"role": "assistant", "content": assistant_reply})
+            print("[DEBUG] LLM responded without tools")
+            yield assistant_reply or ""
     
-    def _process_tool_calls(self, tool_calls) -> str:
+    def _process_tool_calls(self, tool_calls, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Process tool calls and generate final response"""
-        results = []
+        results: List[Optional[str]] = []
+        executed = []
+        calls = []
         
+        # Parse every call first so independent tools can run concurrently
         for tool_call in tool_calls:
             tool_name = tool_call.function.name
             
@@ -253,15 +369,13 @@ Be concise and clear in your final responses."""
                     args = json.loads(raw_args)
                 else:
                     args = raw_args
+                if args is None:
+                    args = {}
                 
-                print(f"[DEBUG] Executing {tool_name} with args: {args}")
-                
-                # Execute the tool
                 if tool_name in self.tools:
-                    func = self.tools[tool_name]["func"]
-                    result = func(**args)
-                    results.append(f"{tool_name}: {result}")
-                    print(f"[SUCCESS] Tool result: {result}")
+                    print(f"[DEBUG] Executing {tool_name} with args: {args}")
+                    calls.append((tool_name, self.tools[tool_name]["func"], args))
+                    results.append(None)
                 else:
                     error_msg = f"Unknown tool: {tool_name}"
                     results.append(error_msg)
@@ -272,52 +386,92 @@ Be concise and clear in your final responses."""
                 results.append(error_msg)
                 print(f"❌ {error_msg}")
         
+        # Fill the pending slots with outcomes, keeping the original call order
+        outcomes = iter(tool_runtime.run(calls))
+        for index, slot in enumerate(results):
+            if slot is not None:
+                continue
+            outcome = next(outcomes)
+            record_tool(outcome.name, outcome.duration, outcome.ok)
+            if outcome.ok:
+                results[index] = f"{outcome.name}: {outcome.result}"
+                executed.append((outcome.name, outcome.args, outcome.result))
+                print(f"[SUCCESS] Tool result: {outcome.result}")
+            else:
+                results[index] = f"Error executing {outcome.name}: {str(outcome.error)}"
+                print(f"❌ {results[index]}")
+        
+        # A single scalar result with a template needs no second LLM call
+        if len(tool_calls) == 1 and len(executed) == 1:
+            templated = self._templated_response(*executed[0])
+            if templated:
+                print("[DEBUG] Answering from tool response template")
+                history.append({"role": "assistant", "content": templated})
+                self._count("templated_responses", "llm_round_trips_saved")
+                yield templated
+                return
+        self._count("llm_formatted_responses")
+        
         # Add tool results to history
         tool_results = "; ".join(results)
+        history.append({
+            "role": "assistant", 
+            "content": f"Tool results: {tool_results}"
+        })
         
         # Generate final response using LLM
         try:
-            # Add tool results to conversation
-            self.history.append({
-                "role": "assistant", 
-                "content": f"Tool results: {tool_results}"
-            })
-            
             # Get LLM to format the final response
-            final_response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=self.history + [{
-                    "role": "user", 
-                    "content": "Please provide a clear, concise answer based on the tool results."
-                }]
-            )
-            
-            final_answer = final_response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": final_answer})
-            return final_answer
+            yield from self._reply(history + [{
+                "role": "user", 
+                "content": "Please provide a clear, concise answer based on the tool results."
+            }], history, stream)
             
         except Exception as e:
             # Fallback to just showing tool results
             fallback_response = f"Calculation complete: {tool_results}"
-            self.history.append({"role": "assistant", "content": fallback_response})
-            return fallback_response
+            history.append({"role": "assistant", "content": fallback_response})
+            yield fallback_response
+    
+    def _templated_response(self, tool_name: str, args: Dict, result: Any) -> Optional[str]:
+        """Fill the tool's response template, or None if the result isn't a plain number"""
+        template = self.tools.get(tool_name, {}).get("response_template")
+        if not template or isinstance(result, bool) or not isinstance(result, (int, float)):
+            return None
+        values = {key: self._format_number(value) for key, value in args.items()}
+        try:
+            return template.format(**values, result=self._format_number(result))
+        except (KeyError, IndexError, ValueError):
+            return None
+    
+    @staticmethod
+    def _format_number(value: Any) -> str:
+        """Render 17.0 as 17 and trim float noise"""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.10g}"
     
-    def _llm_only(self, user_input: str) -> str:
+    def _count(self, *names: str):
+        with self._metrics_lock:
+            for name in names:
+                self.metrics[name] += 1
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of response-path counters"""
+        with self._metrics_lock:
+            return dict(self.metrics)
+    
+    def _llm_only(self, user_input: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Handle non-mathematical requests"""
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=self.history
-            )
-            
-            assistant_reply = response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": assistant_reply})
-            return assistant_reply
+            yield from self._reply(history, history, stream)
             
         except Exception as e:
             error_msg = f"Error: {str(e)}"
-            self.history.append({"role": "assistant", "content": error_msg})
-            return error_msg
+            history.append({"role": "assistant", "content": error_msg})
+            yield error_msg
     
     def clear_history(self):
         """Clear conversation history"""
@@ -6,9 +6,49 @@ Wrapper for the AI Researcher Agent to integrate with the existing agent archite
 import json
 import sys
 import os
-from typing import Dict, Any, List, Callable
+import time
+from typing import Dict, Any, List, Callable, Optional
 from pathlib import Path
 
+from services.intent_matcher import IntentMatcher
+from services.chat_result import ChatResult, record_tool
+
+# Research routing keywords, compiled once for every agent instance
+RESEARCH_INTENTS = IntentMatcher({
+    # Research keywords
+    "research_keyword": [
+        "research*", "paper*", "study", "studies", "analy*", "investigation", "academic",
+        "literature", "survey", "review", "arxiv", "publication*", "scholar*",
+        "thesis", "dissertation", "journal*", "conference*", "methodology",
+        "experiment*", "findings", "results", "conclusion", "hypothes*",
+        "gap analysis", "state of the art", "related work", "bibliography"
+    ],
+    # Action keywords that suggest research activity
+    "research_action": [
+        "find papers", "search literature", "conduct research", "analyze papers",
+        "write paper", "generate pdf", "create proposal", "identify gaps",
+        "literature review", "research proposal", "academic writing"
+    ],
+    # Question patterns that suggest research
+    "research_pattern": [
+        "what is the current state of",
+        "what are the latest developments in",
+        "what research has been done on",
+        "help me research",
+        "find information about",
+        "write a paper on",
+        "generate a research proposal"
+    ],
+    "full_research": [
+        "full research", "conduct research", "complete analysis", "write paper", "generate pdf", "research proposal"
+    ],
+    "paper_search": ["search papers", "find papers", "literature search", "arxiv search"],
+    "greeting": ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"],
+    "capabilities": ["what can you do", "your capabilities", "help me", "how do you work"],
+    "process": ["how does research work", "research process", "workflow"],
+    "troubleshooting": ["error*", "not working"],
+})
+
 # Add the fourthagent directory to the path
 fourthagent_path = Path(__file__).parent / "fourthagent"
 sys.path.insert(0, str(fourthagent_path))
@@ -112,12 +152,13 @@ class ResearcherToolAgent:
             }
         }
     
-    def _research_topic(self, topic: str) -> str:
+    def _research_topic(self, topic: str, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
         """
         Conduct comprehensive research on a topic
         
         Args:
             topic: The research topic to investigate
+            progress_callback: Optional callable receiving workflow node_start/node_end events
             
         Returns:
             JSON string containing research results and PDF path
@@ -131,7 +172,7 @@ class ResearcherToolAgent:
         
         try:
             print(f"[DEBUG] Starting research for topic: {topic}")
-            results = self.researcher.research(topic)
+            results = self.researcher.research(topic, progress_callback=progress_callback)
             
             # Format results for better presentation
             formatted_results = {
@@ -221,42 +262,12 @@ class ResearcherToolAgent:
         Returns:
             True if tools should be used, False otherwise
         """
-        user_lower = user_input.lower()
-        
-        # Research keywords
-        research_keywords = [
-            "research", "paper", "study", "analyze", "investigation", "academic",
-            "literature", "survey", "review", "arxiv", "publication", "scholar",
-            "thesis", "dissertation", "journal", "conference", "methodology",
-            "experiment", "findings", "results", "conclusion", "hypothesis",
-            "gap analysis", "state of the art", "related work", "bibliography"
-        ]
-        
-        # Action keywords that suggest research activity
-        action_keywords = [
-            "find papers", "search literature", "conduct research", "analyze papers",
-            "write paper", "generate pdf", "create proposal", "identify gaps",
-            "literature review", "research proposal", "academic writing"
-        ]
-        
-        # Check for research-related terms
-        has_research_keywords = any(keyword in user_lower for keyword in research_keywords)
-        has_action_keywords = any(keyword in user_lower for keyword in action_keywords)
-        
-        # Also check for question patterns that suggest research
-        research_patterns = [
-            "what is the current state of",
-            "what are the latest developments in",
-            "what research has been done on",
-            "help me research",
-            "find information about",
-            "write a paper on",
-            "generate a research proposal"
-        ]
-        
-        has_research_patterns = any(pattern in user_lower for pattern in research_patterns)
-        
-        return has_research_keywords or has_action_keywords or has_research_patterns
+        # Check for research-related terms, actions and question patterns
+        return RESEARCH_INTENTS.match(user_input).any("research_keyword", "research_action", "research_pattern")
+    
+    def _wants_full_research(self, user_input: str) -> bool:
+        """True if the input asks for the full research workflow rather than a paper search"""
+        return "full_research" in RESEARCH_INTENTS.match(user_input)
     
     def _handle_with_tools(self, user_input: str) -> str:
         """
@@ -268,22 +279,22 @@ class ResearcherToolAgent:
         Returns:
             Response from the appropriate tool
         """
-        user_lower = user_input.lower()
+        intents = RESEARCH_INTENTS.match(user_input)
         
         # Determine which tool to use based on intent
-        if any(phrase in user_lower for phrase in ["full research", "conduct research", "complete analysis", "write paper", "generate pdf", "research proposal"]):
+        if "full_research" in intents:
             # Extract topic for full research
             topic = self._extract_topic(user_input)
             if topic:
-                return self._research_topic(topic)
+                return self._run_tool("research_topic", self._research_topic, topic)
             else:
                 return "Please specify a research topic. For example: 'Conduct research on machine learning'"
         
-        elif any(phrase in user_lower for phrase in ["search papers", "find papers", "literature search", "arxiv search"]):
+        elif "paper_search" in intents:
             # Extract topic for paper search
             topic = self._extract_topic(user_input)
             if topic:
-                return self._search_papers(topic)
+                return self._run_tool("search_papers", self._search_papers, topic)
             else:
                 return "Please specify a topic to search for papers. For example: 'Search papers on neural networks'"
         
@@ -291,10 +302,37 @@ class ResearcherToolAgent:
             # Default to full research for general research queries
             topic = self._extract_topic(user_input)
             if topic:
-                return self._research_topic(topic)
+                return self._run_tool("research_topic", self._research_topic, topic)
             else:
                 return "I can help you with academic research! Please specify a topic. For example: 'Research machine learning algorithms' or 'Find papers on quantum computing'"
     
+    def _run_tool(self, name: str, func: Callable[[str], str], topic: str) -> str:
+        """
+        Run a research tool and record it against the current turn. The tools
+        catch their own failures and return an error payload, so the payload
+        decides whether the call succeeded.
+        
+        Args:
+            name: Tool name to record
+            func: Tool returning a JSON string
+            topic: The research topic
+            
+        Returns:
+            The tool's JSON string
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = func(topic)
+            try:
+                payload = json.loads(result)
+            except (TypeError, ValueError):
+                payload = {}
+            ok = isinstance(payload, dict) and payload.get("status") != "failed" and not payload.get("error")
+            return result
+        finally:
+            record_tool(name, time.perf_counter() - started, ok)
+    
     def _extract_topic(self, user_input: str) -> str:
         """
         Extract research topic from user input
@@ -345,14 +383,14 @@ class ResearcherToolAgent:
         Returns:
             Conversational response
         """
-        user_lower = user_input.lower()
+        intents = RESEARCH_INTENTS.match(user_input)
         
         # Greetings and basic interaction
-        if any(greeting in user_lower for greeting in ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"]):
+        if "greeting" in intents:
             return "Hello! I'm an AI Research Agent specializing in academic research. I can help you:\n\n• Conduct comprehensive research on any topic\n• Search for academic papers on arXiv\n• Analyze papers and identify research gaps\n• Generate research proposals with PDF output\n\nWhat would you like to research today?"
         
         # Capability questions
-        if any(phrase in user_lower for phrase in ["what can you do", "your capabilities", "help me", "how do you work"]):
+        if "capabilities" in intents:
             return """I'm an AI Research Agent with the following capabilities:
 
 🔬 **Full Research Workflow**:
@@ -379,7 +417,7 @@ class ResearcherToolAgent:
 How can I assist with your research today?"""
         
         # Questions about research process
-        if any(phrase in user_lower for phrase in ["how does research work", "research process", "workflow"]):
+        if "process" in intents:
             return """My research workflow follows these steps:
 
 1. **Paper Search** 📄
@@ -409,7 +447,7 @@ How can I assist with your research today?"""
 Ready to start researching a topic?"""
         
         # Error guidance
-        if "error" in user_lower or "not working" in user_lower:
+        if "troubleshooting" in intents:
             return """If you're experiencing issues, here are some tips:
 
 • **API Access**: Ensure Google API key is configured for Gemini and arXiv access
@@ -433,18 +471,22 @@ Need help with a specific research topic?"""
 
 What research topic interests you? Just tell me what you'd like to investigate!"""
     
-    def chat(self, user_input: str) -> str:
+    def chat(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
         """
         Main chat interface for the Research Agent
         
         Args:
             user_input: The user's message
+            history: Session conversation history (defaults to the agent's own)
             
         Returns:
             Agent's response
         """
+        if history is None:
+            history = self.conversation_history
+        
         # Add to conversation history
-        self.conversation_history.append({"role": "user", "content": user_input})
+        history.append({"role": "user", "content": user_input})
         
         try:
             # Determine if we should use tools
@@ -454,15 +496,25 @@ What research topic interests you? Just tell me what you'd like to investigate!"
                 response = self._llm_only(user_input)
             
             # Add response to history
-            self.conversation_history.append({"role": "assistant", "content": response})
+            history.append({"role": "assistant", "content": response})
             
             return response
             
         except Exception as e:
             error_response = f"I encountered an error while processing your request: {str(e)}\n\nPlease try rephrasing your question or ask for help with research capabilities."
-            self.conversation_history.append({"role": "assistant", "content": error_response})
+            history.append({"role": "assistant", "content": error_response})
             return error_response
     
+    def chat_result(self, user_input: str, history: Optional[List[Dict]] = None) -> ChatResult:
+        """
+        Chat and return the reply with the research tools it ran and their timings.
+        Gemini calls made by the research workflow are not counted as LLM calls.
+        """
+        result = ChatResult()
+        with result.recording():
+            result.text = self.chat(user_input, history)
+        return result
+    
     def clear_history(self):
         """Clear the conversation history"""
         self.conversation_history = []
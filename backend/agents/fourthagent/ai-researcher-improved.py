@@ -41,7 +41,7 @@ import importlib.util
 import sys
 
 # Import arxiv_tool
-tool_path = r"C:\Users\User\Ai_agents\backend\agents\fourthagent\arxiv-tool.py"
+tool_path = str(Path(__file__).parent / "arxiv-tool.py")
 spec = importlib.util.spec_from_file_location("arxiv_tool", tool_path)
 arxiv_tool = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(arxiv_tool)
@@ -51,7 +51,7 @@ arxiv_search = arxiv_tool.arxiv_search
 from read_pdf import read_pdf
 
 # Import write_pdf
-tool_path = r"C:\Users\User\Ai_agents\backend\agents\fourthagent\write-pdf.py"
+tool_path = str(Path(__file__).parent / "write-pdf.py")
 spec = importlib.util.spec_from_file_location("write_pdf", tool_path)
 write_pdf = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(write_pdf)
@@ -202,17 +202,21 @@ Dependencies:
 - python-dotenv
 """
 
+import hashlib
 import json
 import os
 import time
 import random
-from typing import TypedDict, List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict, List, Dict, Any, Callable, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 from google.api_core.exceptions import ResourceExhausted
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Load environment variables
@@ -223,22 +227,38 @@ import importlib.util
 import sys
 
 # Import arxiv_tool
-tool_path = r"C:\Users\User\Ai_agents\backend\agents\fourthagent\arxiv-tool.py"
+tool_path = str(Path(__file__).parent / "arxiv-tool.py")
 spec = importlib.util.spec_from_file_location("arxiv_tool", tool_path)
 arxiv_tool = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(arxiv_tool)
 arxiv_search = arxiv_tool.arxiv_search  
 
-# Import read_pdf
-from read_pdf import read_pdf
+# Import read_pdf (and the paper cache it uses, None when run standalone)
+from read_pdf import read_pdf, pdf_cache as paper_cache
+from paper_sections import split_sections, allocate
 
 # Import write_pdf
-tool_path = r"C:\Users\User\Ai_agents\backend\agents\fourthagent\write-pdf.py"
+tool_path = str(Path(__file__).parent / "write-pdf.py")
 spec = importlib.util.spec_from_file_location("write_pdf", tool_path)
 write_pdf = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(write_pdf)
 render_latex_pdf = write_pdf.render_latex_pdf
 
+# Characters of each paper read; covers the body of most papers, stopping before long appendices
+PAPER_READ_CHARS = 60000
+
+# Characters of paper text sent for analysis, shared between the aspects below
+PAPER_CONTENT_CHARS = 4000
+
+# Analysis aspects: heading, sections they draw on (in order), what to summarize
+ANALYSIS_ASPECTS = [
+    ("Abstract Summary", ["abstract", "introduction"], "the problem addressed, the approach and the main claims (50 words)"),
+    ("Methodology", ["method"], "the main approaches and techniques used (50 words)"),
+    ("Key Results", ["results", "discussion"], "the primary findings, with key numbers where given (50 words)"),
+    ("Limitations and Future Work", ["limitations", "discussion", "conclusion"],
+     "the limitations acknowledged and the improvements suggested (60 words)"),
+]
+
 class ResearchState(TypedDict):
     """State for the AI Researcher workflow"""
     topic: str
@@ -261,7 +281,8 @@ class AIResearcherAgent:
     4. Generate new research paper
     """
     
-    def __init__(self, model_name: str = None, api_key: str = None, max_papers: int = 2, max_api_calls: int = 10):
+    def __init__(self, model_name: str = None, api_key: str = None, max_papers: int = 2, max_api_calls: int = 10,
+                 max_workers: int = None, llm_concurrency: int = None):
         """Initialize the AI Researcher Agent
         
         Args:
@@ -269,10 +290,19 @@ class AIResearcherAgent:
             api_key: Google API key (if None, will use environment variable)
             max_papers: Maximum number of papers to analyze (default: 2)
             max_api_calls: Maximum number of API calls before skipping steps (default: 10)
+            max_workers: Papers downloaded and extracted at once (default: RESEARCH_MAX_WORKERS or 8)
+            llm_concurrency: Paper analyses sent to Gemini at once (default: RESEARCH_LLM_CONCURRENCY or 4)
         """
         self.max_papers = max_papers
         self.max_api_calls = max_api_calls
         self.api_call_count = 0
+        self.max_workers = max_workers or int(os.getenv("RESEARCH_MAX_WORKERS", "8"))
+        self.llm_concurrency = llm_concurrency or int(os.getenv("RESEARCH_LLM_CONCURRENCY", "4"))
+        # Shared by the paper workers: call budget, Gemini concurrency, and a
+        # cooldown every worker honours after any of them is rate limited
+        self._api_lock = threading.Lock()
+        self._llm_slots = threading.BoundedSemaphore(self.llm_concurrency)
+        self._cooldown_until = 0.0
         self.llm = ChatGoogleGenerativeAI(
             model=model_name or os.getenv("MODEL_NAME", "gemini-2.5-pro"),
             google_api_key=api_key or os.getenv("GOOGLE_API_KEY"),
@@ -284,11 +314,11 @@ class AIResearcherAgent:
     def _create_workflow(self) -> StateGraph:
         """Create the LangGraph workflow"""
         workflow = StateGraph(ResearchState)
-        workflow.add_node("search_papers", self._search_papers_node)
-        workflow.add_node("analyze_papers", self._analyze_papers_node)
-        workflow.add_node("identify_gaps", self._identify_gaps_node)
-        workflow.add_node("generate_paper", self._generate_paper_node)
-        workflow.add_node("create_pdf", self._create_pdf_node)
+        workflow.add_node("search_papers", self._with_progress("search_papers", self._search_papers_node))
+        workflow.add_node("analyze_papers", self._with_progress("analyze_papers", self._analyze_papers_node))
+        workflow.add_node("identify_gaps", self._with_progress("identify_gaps", self._identify_gaps_node))
+        workflow.add_node("generate_paper", self._with_progress("generate_paper", self._generate_paper_node))
+        workflow.add_node("create_pdf", self._with_progress("create_pdf", self._create_pdf_node))
         workflow.set_entry_point("search_papers")
         workflow.add_edge("search_papers", "analyze_papers")
         workflow.add_edge("analyze_papers", "identify_gaps")
@@ -297,13 +327,48 @@ class AIResearcherAgent:
         workflow.add_edge("create_pdf", END)
         return workflow.compile()
     
+    def _with_progress(self, name: str, node: Callable[[ResearchState], ResearchState]):
+        """Wrap a workflow node so it publishes node_start/node_end events to the run's progress callback"""
+        def run(state: ResearchState, config: RunnableConfig) -> ResearchState:
+            callback = (config or {}).get("configurable", {}).get("progress_callback")
+            self._publish_progress(callback, {"event": "node_start", "node": name})
+            started = time.perf_counter()
+            status = "error"
+            try:
+                state = node(state)
+                status = "completed"
+                return state
+            finally:
+                self._publish_progress(callback, {
+                    "event": "node_end",
+                    "node": name,
+                    "status": status,
+                    "duration": round(time.perf_counter() - started, 3)
+                })
+        return run
+    
+    def _publish_progress(self, callback: Optional[Callable[[Dict[str, Any]], None]], event: Dict[str, Any]):
+        """Send a progress event to the callback, never letting it break the workflow"""
+        if not callback:
+            return
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"[WARNING] Progress callback failed: {e}")
+    
     def _retry_with_backoff(self, func, *args, max_retries=5, initial_delay=2, max_delay=60):
-        """Retry a function with exponential backoff on ResourceExhausted errors"""
+        """Retry a function with exponential backoff on ResourceExhausted errors
+        
+        Safe to call from several threads: a rate limit seen by one caller
+        pauses every caller until the backoff has passed.
+        """
         delay = initial_delay
         for attempt in range(max_retries):
-            if self.api_call_count >= self.max_api_calls:
-                raise ResourceExhausted("API call limit reached")
-            self.api_call_count += 1
+            self._wait_for_cooldown()
+            with self._api_lock:
+                if self.api_call_count >= self.max_api_calls:
+                    raise ResourceExhausted("API call limit reached")
+                self.api_call_count += 1
             try:
                 return func(*args)
             except ResourceExhausted as e:
@@ -311,8 +376,23 @@ class AIResearcherAgent:
                     raise e
                 wait_time = min(delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
                 print(f"Retrying in {wait_time:.1f} seconds due to ResourceExhausted: {e}")
-                time.sleep(wait_time)
+                with self._api_lock:
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + wait_time)
         raise Exception("Max retries reached")
+    
+    def _wait_for_cooldown(self):
+        """Sleep until any rate-limit backoff in effect has passed"""
+        while True:
+            with self._api_lock:
+                remaining = self._cooldown_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+    
+    def _invoke_llm(self, prompt: str):
+        """Call Gemini with retries, holding one of the llm_concurrency slots"""
+        with self._llm_slots:
+            return self._retry_with_backoff(self.llm.invoke, [HumanMessage(content=prompt)])
 
     def _search_papers_node(self, state: ResearchState) -> ResearchState:
         """Node 1: Search for research papers using arXiv"""
@@ -336,43 +416,25 @@ class AIResearcherAgent:
         return state
     
     def _analyze_papers_node(self, state: ResearchState) -> ResearchState:
-        """Node 2: Analyze each paper using PDF reading"""
-        print(f"\nStep 2: Analyzing {len(state['papers'])} papers")
+        """Node 2: Analyze the papers concurrently using PDF reading
+        
+        Each paper is downloaded, extracted and analyzed in its own worker,
+        so the node takes about as long as the slowest paper rather than the
+        sum of all of them. Analyses come back in search order.
+        """
+        papers = state["papers"]
+        print(f"\nStep 2: Analyzing {len(papers)} papers")
+        started = time.perf_counter()
         analyses = []
-        for i, paper in enumerate(state["papers"], 1):
-            print(f"Analyzing paper {i}/{len(state['papers'])}: {paper.get('title', 'Unknown')}")
-            try:
-                pdf_url = paper.get("pdf")
-                if not pdf_url:
-                    print(f"No PDF URL for paper {i}")
-                    continue
-                pdf_content = self._retry_with_backoff(read_pdf.invoke, {"url": pdf_url})
-                analysis_prompt = f"""
-                Analyze this research paper and provide a structured summary:
-                Paper Title: {paper.get('title', 'Unknown')}
-                Authors: {', '.join(paper.get('authors', []))}
-                Paper Content: {pdf_content[:4000]}  # Reduced for quota
-                Please provide:
-                1. **Abstract Summary**: Key points from the abstract (50 words)
-                2. **Methodology**: Main approaches used (50 words)
-                3. **Key Results**: Primary findings (50 words)
-                4. **Limitations**: Acknowledged limitations (50 words)
-                5. **Future Work**: Suggested improvements (50 words)
-                Format as concise structured text.
-                """
-                response = self._retry_with_backoff(self.llm.invoke, [HumanMessage(content=analysis_prompt)])
-                analysis = {
-                    "paper_title": paper.get("title", "Unknown"),
-                    "authors": paper.get("authors", []),
-                    "summary": paper.get("summary", ""),
-                    "analysis": response.content,
-                    "pdf_url": pdf_url
-                }
-                analyses.append(analysis)
-                print(f"Completed analysis for paper {i}")
-            except Exception as e:
-                print(f"Error analyzing paper {i}: {e}")
-                continue
+        if papers:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(papers)),
+                                    thread_name_prefix="paper-analysis") as executor:
+                results = list(executor.map(
+                    lambda item: self._analyze_paper(item[0], len(papers), item[1]),
+                    enumerate(papers, 1)
+                ))
+            analyses = [analysis for analysis in results if analysis is not None]
+        print(f"Analyzed {len(analyses)}/{len(papers)} papers in {time.perf_counter() - started:.1f}s")
         state["paper_analyses"] = analyses
         state["current_step"] = "analysis_completed"
         state["step_count"] = 2
@@ -382,6 +444,96 @@ class AIResearcherAgent:
         )
         return state
     
+    def _analyze_paper(self, i: int, total: int, paper: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Download, read and analyze one paper; None if it couldn't be analyzed"""
+        print(f"Analyzing paper {i}/{total}: {paper.get('title', 'Unknown')}")
+        try:
+            pdf_url = paper.get("pdf")
+            if not pdf_url:
+                print(f"No PDF URL for paper {i}")
+                return None
+            pdf_content = self._retry_with_backoff(read_pdf.invoke, {"url": pdf_url, "max_chars": PAPER_READ_CHARS})
+            excerpts = self._aspect_excerpts(split_sections(pdf_content))
+            if len(excerpts) >= 2:
+                analysis_text = self._analyze_sections(paper, pdf_url, excerpts)
+            else:
+                # No usable section structure: analyze the opening of the paper instead
+                print(f"No sections detected in paper {i}, analyzing its opening")
+                analysis_text = self._analyze_opening(paper, pdf_content)
+            print(f"Completed analysis for paper {i}")
+            return {
+                "paper_title": paper.get("title", "Unknown"),
+                "authors": paper.get("authors", []),
+                "summary": paper.get("summary", ""),
+                "analysis": analysis_text,
+                "pdf_url": pdf_url
+            }
+        except Exception as e:
+            print(f"Error analyzing paper {i}: {e}")
+            return None
+    
+    def _aspect_excerpts(self, sections: Dict[str, str]) -> Dict[str, str]:
+        """Text for each analysis aspect the paper has sections for, sharing PAPER_CONTENT_CHARS between them"""
+        texts = {}
+        for heading, names, _ in ANALYSIS_ASPECTS:
+            text = " ".join(sections[name] for name in names if name in sections)
+            if heading == "Abstract Summary" and not text:
+                text = sections.get("front", "")
+            if text:
+                texts[heading] = text
+        shares = allocate({heading: len(text) for heading, text in texts.items()}, PAPER_CONTENT_CHARS)
+        return {heading: text[:shares[heading]] for heading, text in texts.items()}
+    
+    def _analyze_sections(self, paper: Dict[str, Any], pdf_url: str, excerpts: Dict[str, str]) -> str:
+        """
+        Summarize every aspect from its own sections in a single Gemini call,
+        so a paper costs one call whether or not its sections were found.
+        The analysis is cached with the paper so a repeat run doesn't call Gemini again.
+        """
+        labelled = "\n".join(
+            f"[{heading}]\n{excerpts[heading]}" for heading, _, _ in ANALYSIS_ASPECTS if heading in excerpts
+        )
+        lines = "\n".join(
+            f"{number}. **{heading}**: " + (f"<{instruction}>" if heading in excerpts else "Not covered in the extracted text.")
+            for number, (heading, _, instruction) in enumerate(ANALYSIS_ASPECTS, 1)
+        )
+        prompt = f"""
+        Summarize this research paper from the excerpts below. Each excerpt is labelled
+        with the aspect it covers; base each summary only on its own excerpt.
+        Paper Title: {paper.get('title', 'Unknown')}
+        Excerpts:
+        {labelled}
+        Reply with exactly these lines, replacing each <...> with concise plain text
+        and keeping any line without one as it is:
+        {lines}
+        """
+        name = f"analysis:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]}"
+        if paper_cache is not None:
+            cached = paper_cache.get_summary(pdf_url, name)
+            if cached is not None:
+                return cached
+        analysis = self._invoke_llm(prompt).content.strip()
+        if paper_cache is not None:
+            paper_cache.put_summary(pdf_url, name, analysis)
+        return analysis
+    
+    def _analyze_opening(self, paper: Dict[str, Any], pdf_content: str) -> str:
+        """Single-call analysis of the first PAPER_CONTENT_CHARS characters of a paper"""
+        analysis_prompt = f"""
+        Analyze this research paper and provide a structured summary:
+        Paper Title: {paper.get('title', 'Unknown')}
+        Authors: {', '.join(paper.get('authors', []))}
+        Paper Content: {pdf_content[:PAPER_CONTENT_CHARS]}  # Reduced for quota
+        Please provide:
+        1. **Abstract Summary**: Key points from the abstract (50 words)
+        2. **Methodology**: Main approaches used (50 words)
+        3. **Key Results**: Primary findings (50 words)
+        4. **Limitations**: Acknowledged limitations (50 words)
+        5. **Future Work**: Suggested improvements (50 words)
+        Format as concise structured text.
+        """
+        return self._invoke_llm(analysis_prompt).content
+    
     def _identify_gaps_node(self, state: ResearchState) -> ResearchState:
         """Node 3: Identify gaps and improvement opportunities"""
         print(f"\nStep 3: Identifying research gaps and improvements")
@@ -677,18 +829,22 @@ This proposal outlines a novel approach to advance {topic.lower()}, addressing k
             state["api_call_count"] = self.api_call_count
         return state
     
-    def research(self, topic: str) -> Dict[str, Any]:
+    def research(self, topic: str, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Main method to run the complete research workflow
         
         Args:
             topic: The research topic to investigate
+            progress_callback: Optional callable receiving node_start/node_end events
             
         Returns:
             Dictionary containing the final results and file path
         """
         print(f"Starting AI Research Agent for topic: '{topic}'")
         print("=" * 60)
+        # The call budget is per run, not per agent
+        with self._api_lock:
+            self.api_call_count = 0
         initial_state = ResearchState(
             topic=topic,
             papers=[],
@@ -702,7 +858,10 @@ This proposal outlines a novel approach to advance {topic.lower()}, addressing k
             api_call_count=0
         )
         try:
-            final_state = self.workflow.invoke(initial_state)
+            final_state = self.workflow.invoke(
+                initial_state,
+                config={"configurable": {"progress_callback": progress_callback}}
+            )
             results = {
                 "topic": final_state["topic"],
                 "papers_found": len(final_state["papers"]),
@@ -1,6 +1,15 @@
 # Step1: Access arXiv using URL
 import requests
 
+try:
+    # Reuse the backend's pooled, retrying HTTP session and shared arXiv client
+    from services.http_client import http_client
+    from services.arxiv_client import arxiv_client
+    _http_get = http_client.get
+except ImportError:
+    _http_get = requests.Session().get
+    arxiv_client = None
+
 
 def search_arxiv_papers(topic: str, max_results: int = 2) -> dict:
     query = "+".join(topic.lower().split())
@@ -15,15 +24,21 @@ def search_arxiv_papers(topic: str, max_results: int = 2) -> dict:
             "&sortBy=submittedDate"
             "&sortOrder=descending"
         )
-    print(f"Making request to arXiv API: {url}")
-    resp = requests.get(url)
-    
-    if not resp.ok:
-        print(f"ArXiv API request failed: {resp.status_code} - {resp.text}")
-        raise ValueError(f"Bad response from arXiv API: {resp}\n{resp.text}")
+
+    def fetch() -> dict:
+        print(f"Making request to arXiv API: {url}")
+        resp = _http_get(url, timeout=30)
+        
+        if not resp.ok:
+            print(f"ArXiv API request failed: {resp.status_code} - {resp.text}")
+            raise ValueError(f"Bad response from arXiv API: {resp}\n{resp.text}")
+        
+        return parse_arxiv_xml(resp.text)
     
-    data = parse_arxiv_xml(resp.text)
-    return data
+    # Cached, coalesced with identical searches and spaced out per arXiv's policy
+    if arxiv_client is not None:
+        return arxiv_client.search(query, max_results, fetch)
+    return fetch()
 
 
 # Step2: Parse XML
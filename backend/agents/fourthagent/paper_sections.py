@@ -0,0 +1,112 @@
+"""
+Section detection for text extracted from research papers
+
+PDF text comes without structure, so sections are found from their
+headings: short lines such as "3 Method", "IV. EXPERIMENTS" or
+"Abstract—We propose ...". Headings are mapped to a few canonical
+sections; everything from the references onwards is dropped.
+"""
+
+import re
+from typing import Dict, List
+
+# Canonical section -> heading titles that start it (matched at the start of the title)
+SECTION_HEADINGS = {
+    "abstract": r"abstract",
+    "introduction": r"introduction|background|motivation|overview",
+    "related_work": r"related work|prior work|literature review|preliminaries",
+    "method": (r"methods?|methodology|approach|our approach|proposed (?:method|approach|framework|model|system)"
+               r"|framework|model|system design|architecture|problem (?:formulation|setup|statement)|algorithm"),
+    "results": (r"results?|experiments?|experimental|evaluation|empirical|ablations?|analysis"
+                r"|case stud(?:y|ies)|benchmarks?"),
+    "discussion": r"discussion",
+    "limitations": r"limitations?|threats to validity|broader impacts?|ethic",
+    "conclusion": r"conclusions?|concluding remarks|summary and|future work|future directions|outlook",
+    "references": r"references|bibliography|acknowledge?ments?|appendix|appendices|supplementary",
+}
+
+_TITLES = [(name, re.compile(rf"(?:{pattern})\b", re.IGNORECASE)) for name, pattern in SECTION_HEADINGS.items()]
+
+# Optional numbering ("3", "3.2", "IV", "A") followed by a short title
+_HEADING = re.compile(r"^(?:(?P<number>\d+(?:\.\d+)*|[IVX]+|[A-H])[.)]?\s+)?(?P<title>[A-Z][^\n]{1,70})$")
+
+# "Abstract—text", "Abstract: text", "ABSTRACT. text" on one line
+_INLINE_ABSTRACT = re.compile(r"^abstract\s*[-—–:.]\s*(?P<rest>\S.*)$", re.IGNORECASE)
+
+# PDF extraction splits kerned capitals off their word: "Related W ork", "T echnical"
+_SPLIT_CAPITAL = re.compile(r"\b([A-Z]) (?=[a-z])")
+
+MAX_HEADING_WORDS = 7
+
+
+def _title_case(title: str) -> bool:
+    """Capitalized like a heading: every word longer than "and"/"for"/"the" starts uppercase"""
+    return all(word[0].isupper() for word in title.split() if len(word) > 3 and word[0].isalpha())
+
+
+def _heading(line: str) -> str:
+    """Canonical section a line starts, or "" if it isn't a section heading"""
+    match = _HEADING.match(line)
+    if not match:
+        return ""
+    title = _SPLIT_CAPITAL.sub(r"\1", match.group("title")).strip().rstrip(":")
+    # Prose wraps onto short lines too; headings don't end in a full stop or run long
+    if title.endswith((".", ",", ";")) or len(title.split()) > MAX_HEADING_WORDS:
+        return ""
+    if not match.group("number") and not _title_case(title):
+        return ""
+    for name, pattern in _TITLES:
+        if pattern.match(title):
+            return name
+    return ""
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Canonical sections of a paper's text, in the order they first appear.
+    Text before the first heading is kept as "front" (title, authors and,
+    for papers without an "Abstract" heading, usually the abstract).
+    Repeated sections ("4 Experiments", "5 Results") are joined.
+    """
+    sections: Dict[str, List[str]] = {"front": []}
+    current = "front"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        inline = _INLINE_ABSTRACT.match(line)
+        if inline and "abstract" not in sections:
+            current = "abstract"
+            sections.setdefault(current, []).append(inline.group("rest"))
+            continue
+        name = _heading(line)
+        if name == "references":
+            break
+        if name:
+            current = name
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {name: " ".join(lines) for name, lines in sections.items() if lines}
+
+
+def allocate(lengths: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Split a character budget between texts: an equal share each, with what
+    short texts don't use handed on to the longer ones.
+    """
+    shares = {name: 0 for name in lengths}
+    remaining = dict(lengths)
+    while remaining and budget > 0:
+        share = budget // len(remaining)
+        if share == 0:
+            break
+        for name, length in sorted(remaining.items(), key=lambda item: item[1]):
+            take = min(length, share)
+            shares[name] += take
+            budget -= take
+            if take == length:
+                del remaining[name]
+            else:
+                remaining[name] = length - take
+    return shares
@@ -5,41 +5,42 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-@tool
-def read_pdf(url: str) -> str:
-    """Read and extract text from a PDF file given its URL.
-
-    Args:
-        url: The URL of the PDF file to read
+try:
+    # Reuse the backend's pooled, retrying HTTP session, PDF cache and extractor
+    from services.http_client import http_client
+    from services.pdf_cache import pdf_cache
+    from services.pdf_extractor import pdf_extractor
+    _http_get = http_client.get
+except ImportError:
+    pdf_cache = None
+    pdf_extractor = None
+    # Standalone use: one retrying session shared by every download
+    _session = requests.Session()
+    _adapter = HTTPAdapter(max_retries=Retry(
+        total=3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        backoff_factor=1
+    ))
+    _session.mount("http://", _adapter)
+    _session.mount("https://", _adapter)
+    _http_get = _session.get
 
-    Returns:
-        The extracted text content from the PDF
-    """
+def _download_pdf(url: str) -> bytes:
+    """Download a PDF of at most 10MB"""
+    print(f"[DEBUG] Starting PDF download from: {url}")
+    
+    # Download with timeout and size limit (10MB max)
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    
+    response = _http_get(
+        url, 
+        headers=headers,
+        timeout=(30, 120),  # Connect timeout, read timeout
+        stream=True
+    )
     try:
-        print(f"[DEBUG] Starting PDF download from: {url}")
-        
-        # Create session with timeout and retry strategy
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            backoff_factor=1
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # Download with timeout and size limit (10MB max)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = session.get(
-            url, 
-            headers=headers,
-            timeout=(30, 120),  # Connect timeout, read timeout
-            stream=True
-        )
         response.raise_for_status()
         
         # Check content length
@@ -47,46 +48,90 @@ def read_pdf(url: str) -> str:
         if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
             raise Exception(f"PDF too large: {int(content_length)/1024/1024:.1f}MB (max 10MB)")
         
-        # Download content with size tracking
-        content = b""
+        # Download content with size tracking; bytearray appends in place
+        content = bytearray()
         max_size = 10 * 1024 * 1024  # 10MB
         
-        for chunk in response.iter_content(chunk_size=8192):
+        for chunk in response.iter_content(chunk_size=65536):
             if chunk:
                 content += chunk
                 if len(content) > max_size:
                     raise Exception("PDF download exceeded 10MB limit")
-        
-        print(f"[DEBUG] Downloaded {len(content)/1024:.1f}KB PDF content")
-        
-        # Parse PDF
-        pdf_file = io.BytesIO(content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        num_pages = len(pdf_reader.pages)
-        
-        # Limit pages to prevent excessive processing
-        max_pages = 50
-        if num_pages > max_pages:
-            print(f"[WARNING] PDF has {num_pages} pages, limiting to first {max_pages}")
-            num_pages = max_pages
-        
-        text = ""
-        for i in range(min(num_pages, len(pdf_reader.pages))):
-            page = pdf_reader.pages[i]
-            print(f"Extracting text from page {i+1}/{num_pages}")
-            try:
-                page_text = page.extract_text()
-                text += page_text + "\n"
-                
-                # Limit total text size to prevent memory issues
-                if len(text) > 500_000:  # 500KB text limit
+    finally:
+        # Hand the connection back to the pool
+        response.close()
+    
+    print(f"[DEBUG] Downloaded {len(content)/1024:.1f}KB PDF content")
+    return bytes(content)
+
+def _extract_pages(content: bytes, max_chars: int = 0) -> tuple:
+    """Text of each page of a PDF, within the page and size limits, and False if max_chars cut it short"""
+    pdf_file = io.BytesIO(content)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    num_pages = len(pdf_reader.pages)
+    
+    # Limit pages to prevent excessive processing
+    max_pages = 50
+    if num_pages > max_pages:
+        print(f"[WARNING] PDF has {num_pages} pages, limiting to first {max_pages}")
+        num_pages = max_pages
+    
+    pages = []
+    extracted = 0
+    budget = min(max_chars, 500_000) if max_chars else 500_000
+    for i in range(min(num_pages, len(pdf_reader.pages))):
+        page = pdf_reader.pages[i]
+        print(f"Extracting text from page {i+1}/{num_pages}")
+        try:
+            page_text = page.extract_text()
+            pages.append(page_text)
+            extracted += len(page_text) + 1
+            
+            # Stop at the caller's budget, and at 500KB to prevent memory issues
+            if extracted >= budget:
+                if budget == 500_000:
                     print(f"[WARNING] Text extraction stopped at 500KB limit")
-                    break
-                    
-            except Exception as page_error:
-                print(f"[WARNING] Failed to extract page {i+1}: {page_error}")
-                continue
+                return pages, budget == 500_000 or i + 1 == num_pages
+                
+        except Exception as page_error:
+            print(f"[WARNING] Failed to extract page {i+1}: {page_error}")
+            continue
+    return pages, True
 
+@tool
+def read_pdf(url: str, max_chars: int = 0) -> str:
+    """Read and extract text from a PDF file given its URL.
+
+    Args:
+        url: The URL of the PDF file to read
+        max_chars: Stop extracting once this many characters are available (0 reads the whole paper)
+
+    Returns:
+        The extracted text content from the PDF
+    """
+    try:
+        pages = pdf_cache.get_pages(url, max_chars) if pdf_cache is not None else None
+        if pages is not None:
+            print(f"[DEBUG] Using cached text for {url} ({len(pages)} pages)")
+        else:
+            content = pdf_cache.get_pdf(url) if pdf_cache is not None else None
+            if content is not None:
+                print(f"[DEBUG] Using cached PDF for {url} ({len(content)/1024:.1f}KB)")
+            else:
+                content = _download_pdf(url)
+                if pdf_cache is not None:
+                    pdf_cache.put_pdf(url, content)
+            if pdf_extractor is not None:
+                extracted = pdf_extractor.extract(content, max_chars)
+                pages, complete = extracted.pages, extracted.complete
+                print(f"[DEBUG] Extracted {len(pages)}/{extracted.page_count} pages in {extracted.seconds:.2f}s")
+            else:
+                pages, complete = _extract_pages(content, max_chars)
+            # Text cut short by a budget is kept with its length and only reused for reads that fit in it
+            if pdf_cache is not None:
+                pdf_cache.put_pages(url, pages, complete)
+        text = "".join(page_text + "\n" for page_text in pages)
+        
         print(f"Successfully extracted {len(text)} characters of text from PDF")
         
         if len(text.strip()) < 100:
@@ -0,0 +1,249 @@
+"""
+Local parser for simple arithmetic requests like "What is 8 + 9?" or
+"square root of one hundred forty-four".
+
+parse_arithmetic only succeeds when the whole request is a single
+operation on two (or, for square roots, one) numbers; anything else
+returns None so the caller can fall back to the LLM.
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {"thousand": 1_000, "million": 1_000_000, "billion": 1_000_000_000}
+
+_DIGITS = re.compile(r"[-+]?(?:\d+(?:\.\d+)?|\.\d+)")
+_THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+# Leading/trailing filler that doesn't change the calculation
+_PREFIX = re.compile(
+    r"^(?:please|hey|hi|ok|okay|so|can you|could you|would you|will you|tell me|"
+    r"what is|what's|whats|what are|how much is|how much are|calculate|compute|"
+    r"evaluate|work out|find|solve|give me)\b\s*"
+)
+_SUFFIX = re.compile(r"\s*\b(?:please|for me|equal|equals|is)$")
+
+Parse = Tuple[str, Dict[str, float]]
+
+
+def _ordered(tool: str, first: str, second: str) -> Callable[[float, float], Parse]:
+    return lambda x, y: (tool, {first: x, second: y})
+
+
+def _swapped(tool: str, first: str, second: str) -> Callable[[float, float], Parse]:
+    return lambda x, y: (tool, {first: y, second: x})
+
+
+def _power(base: float, exponent: float) -> Optional[Parse]:
+    # "-3^2" is -(3^2) by precedence but the sign parses as part of the base,
+    # and a negative base with a fractional exponent is complex: leave both to the LLM
+    if base < 0:
+        return None
+    return "calculate_power", {"base": base, "exponent": exponent}
+
+
+# Infix operators, tried in order; "**" must come before "*"
+_INFIX: List[Tuple[re.Pattern, Callable[[float, float], Optional[Parse]]]] = [
+    (re.compile(r"\s*(?:\^|\*\*)\s*|\s+(?:raised )?to the power of\s+|\s+raised to\s+"),
+     _power),
+    (re.compile(r"\s*\+\s*|\s+plus\s+|\s+added to\s+"),
+     _ordered("add_numbers", "a", "b")),
+    (re.compile(r"\s+minus\s+|\s*-\s*"),
+     _ordered("subtract_numbers", "a", "b")),
+    (re.compile(r"\s*(?<!\*)[*×](?!\*)\s*|\s+times\s+|\s+x\s+|(?<=\d)\s*x\s*(?=[\d.])|\s+multiplied by\s+"),
+     _ordered("multiply_numbers", "a", "b")),
+    (re.compile(r"\s*[/÷]\s*|\s+divided by\s+|\s+over\s+"),
+     _ordered("divide_numbers", "a", "b")),
+]
+
+# "<verb> X <separator> Y" forms
+_PREFIX_FORMS: List[Tuple[re.Pattern, re.Pattern, Callable[[float, float], Parse]]] = [
+    (re.compile(r"^(?:add|sum)\s+"), re.compile(r"\s+(?:and|to|with)\s+"),
+     _ordered("add_numbers", "a", "b")),
+    (re.compile(r"^(?:the )?sum of\s+"), re.compile(r"\s+and\s+"),
+     _ordered("add_numbers", "a", "b")),
+    (re.compile(r"^subtract\s+"), re.compile(r"\s+from\s+"),
+     _swapped("subtract_numbers", "a", "b")),
+    (re.compile(r"^(?:the )?difference (?:between|of)\s+"), re.compile(r"\s+and\s+"),
+     _ordered("subtract_numbers", "a", "b")),
+    (re.compile(r"^multiply\s+"), re.compile(r"\s+(?:by|and|with)\s+"),
+     _ordered("multiply_numbers", "a", "b")),
+    (re.compile(r"^(?:the )?product of\s+"), re.compile(r"\s+and\s+"),
+     _ordered("multiply_numbers", "a", "b")),
+    (re.compile(r"^divide\s+"), re.compile(r"\s+by\s+"),
+     _ordered("divide_numbers", "a", "b")),
+    (re.compile(r"^(?:the )?quotient of\s+"), re.compile(r"\s+(?:and|by)\s+"),
+     _ordered("divide_numbers", "a", "b")),
+]
+
+_SQRT = re.compile(r"^(?:the )?(?:square root|sqrt|root)(?: of)?\s*\(?\s*(.+?)\s*\)?$|^√\s*\(?\s*(.+?)\s*\)?$")
+_SQUARED = re.compile(r"^(.+?)\s+(squared|cubed)$")
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Parse digits ("-12.5") or English number words ("one hundred and five")"""
+    text = text.strip()
+    if not text:
+        return None
+    if _DIGITS.fullmatch(text):
+        return float(text)
+    return _parse_number_words(text)
+
+
+def _parse_number_words(text: str) -> Optional[float]:
+    tokens = [token for token in re.split(r"[\s-]+", text) if token]
+    sign = 1.0
+    if tokens and tokens[0] in ("negative", "minus"):
+        sign = -1.0
+        tokens = tokens[1:]
+    if not tokens:
+        return None
+
+    fraction = None
+    if "point" in tokens:
+        index = tokens.index("point")
+        digits = tokens[index + 1:]
+        if not digits or any(token not in UNITS for token in digits):
+            return None
+        fraction = float("0." + "".join(str(UNITS[token]) for token in digits))
+        tokens = tokens[:index]
+        if not tokens:
+            return sign * fraction
+
+    if tokens == ["zero"]:
+        value = 0.0
+    else:
+        value = _parse_integer_words(tokens)
+        if value is None:
+            return None
+    if fraction is not None:
+        value += fraction
+    return sign * value
+
+
+def _parse_integer_words(tokens: List[str]) -> Optional[float]:
+    """Parse integer number words, rejecting malformed runs like "five five" """
+    total = 0
+    current = 0
+    previous = None
+    last_scale = None
+    for token in tokens:
+        if token in UNITS and token != "zero":
+            if previous not in (None, "ten", "hundred", "scale", "and"):
+                return None
+            current += UNITS[token]
+            previous = "unit"
+        elif token in TEENS:
+            if previous not in (None, "hundred", "scale", "and"):
+                return None
+            current += TEENS[token]
+            previous = "teen"
+        elif token in TENS:
+            if previous not in (None, "hundred", "scale", "and"):
+                return None
+            current += TENS[token]
+            previous = "ten"
+        elif token == "hundred":
+            if previous not in ("unit", "teen", "ten", "a") or current % 100 != current:
+                return None
+            current = (current or 1) * 100
+            previous = "hundred"
+        elif token in SCALES:
+            scale = SCALES[token]
+            if previous not in ("unit", "teen", "ten", "hundred", "a"):
+                return None
+            if last_scale is not None and scale >= last_scale:
+                return None
+            total += (current or 1) * scale
+            current = 0
+            last_scale = scale
+            previous = "scale"
+        elif token == "and":
+            if previous not in ("hundred", "scale"):
+                return None
+            previous = "and"
+        elif token == "a":
+            if previous is not None:
+                return None
+            previous = "a"
+        else:
+            return None
+    if previous in (None, "and", "a"):
+        return None
+    return float(total + current)
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().strip()
+    text = _THOUSANDS_SEPARATOR.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = text.rstrip("?!.= ").strip()
+    while True:
+        stripped = _PREFIX.sub("", text, count=1)
+        if stripped == text:
+            break
+        text = stripped
+    while True:
+        stripped = _SUFFIX.sub("", text, count=1)
+        if stripped == text:
+            break
+        text = stripped
+    return text.strip()
+
+
+def _split(text: str, separator: re.Pattern) -> Optional[Tuple[float, float]]:
+    """Try each separator position until both sides parse as numbers"""
+    for match in separator.finditer(text):
+        left = parse_number(text[:match.start()])
+        if left is None:
+            continue
+        right = parse_number(text[match.end():])
+        if right is not None:
+            return left, right
+    return None
+
+
+def parse_arithmetic(text: str) -> Optional[Parse]:
+    """
+    Parse a request into (tool_name, arguments) for one of the six math
+    tools, or None when the request isn't a single simple operation.
+    """
+    text = _normalize(text)
+    if not text:
+        return None
+
+    match = _SQRT.match(text)
+    if match:
+        number = parse_number(match.group(1) or match.group(2))
+        if number is not None:
+            return "calculate_square_root", {"number": number}
+
+    match = _SQUARED.match(text)
+    if match:
+        base = parse_number(match.group(1))
+        if base is not None:
+            return "calculate_power", {"base": base, "exponent": 2.0 if match.group(2) == "squared" else 3.0}
+
+    for prefix, separator, build in _PREFIX_FORMS:
+        match = prefix.match(text)
+        if match:
+            operands = _split(text[match.end():], separator)
+            if operands:
+                return build(*operands)
+
+    for operator, build in _INFIX:
+        operands = _split(text, operator)
+        if operands:
+            return build(*operands)
+    return None
@@ -1,14 +1,83 @@
-from groq import Groq
 import json
 import re
 import requests
 import asyncio
 import aiohttp
-from typing import Dict, Any, Callable, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional
 from datetime import datetime
 import urllib.parse
-from bs4 import BeautifulSoup
-import feedparser
+from services.history_manager import HistoryManager
+from services.llm_gateway import get_llm_client
+from services.http_client import http_client
+from services.search_cache import search_cache
+from services.feed_cache import feed_cache
+from services.page_text import page_fetcher
+from services.weather_cache import weather_cache
+from services.gazetteer import gazetteer
+from services.intent_matcher import IntentMatcher
+from services.tool_runtime import tool_runtime
+from services.chat_result import ChatResult, record_tool, track_tool
+
+# Routing keywords and phrases, compiled once for every agent instance
+ROUTING_INTENTS = IntentMatcher({
+    # Conversational/personal queries that should NOT use tools
+    "conversational": [
+        "how are you", "how do you feel", "tell me a joke", "hello", "hi", "good morning",
+        "good evening", "goodbye", "bye", "thank you", "thanks", "please", "sorry",
+        "what are your hobbies", "do you like", "can you help me", "who are you",
+        "what can you do", "how can you help", "nice to meet you", "how's your day"
+    ],
+    # Information request indicators that DO need tools
+    "tool_indicator": [
+        # Factual information requests
+        "what is the", "who is the", "where is the", "when did", "how to",
+        "tell me about the", "information about", "facts about",
+        # Current/recent information (but not conversational)
+        "latest news", "recent developments", "current price", "today's weather", "weather today",
+        "what happened today", "recent updates", "breaking news",
+        # Price/cost queries
+        "price of", "cost of", "how much does", "rate of", "petrol price", "gas price",
+        # Weather queries - comprehensive patterns
+        "weather in", "weather of", "weather at", "weather for",
+        "temperature in", "temperature of", "climate in", "forecast for",
+        "current weather", "today weather", "tomorrow weather",
+        # Time-sensitive factual queries ("<current year> developments" is checked per call)
+        "this year's updates",
+        "recently discovered", "just announced"
+    ],
+    # Specific topics that typically need current info
+    "current_topic": [
+        "ai developments", "technology updates", "stock market", "cryptocurrency",
+        "political news", "scientific discoveries", "medical breakthroughs"
+    ],
+    "recency": ["latest", "recent", "current"],
+    "personal": ["you", "your", "yours", "yourself", "feeling", "doing", "day"],
+    "weather_word": ["weather", "temperature", "climate", "forecast", "rain", "raining", "snowing"],
+    # Direct tool routing
+    "weather_query": [
+        "weather", "temperature", "climate", "forecast", "humidity", "wind",
+        "weather in", "temperature in", "climate in", "weather today", "weather tomorrow"
+    ],
+    "price_query": ["price*", "cost*", "rate", "petrol", "gas", "fuel"],
+    "datetime_phrase": ["what time is it", "current time", "what date", "today's date"],
+    "datetime_word": ["time", "date", "datetime", "timestamp"],
+    "weather_or_news": ["weather", "news"],
+    "events_word": ["latest", "recent", "happening", "news", "breaking"],
+    "weather_core": ["weather", "temperature", "climate"],
+    "today_word": ["today", "current"],
+    "time_date_word": ["time", "date"],
+    "lookup_phrase": ["what is", "who is", "where is", "tell me about"],
+    # Contextual indicators used to score tools
+    "search_context": [
+        "what is", "who is", "where is", "when did", "how to",
+        "tell me about", "information about", "recent", "latest",
+        "current", "update", "happening", "price*", "cost*", "rate"
+    ],
+    "price_context": ["price*", "cost*", "rate", "petrol", "gas", "fuel", "today", "current"],
+    "weather_context": ["weather", "temperature", "rain", "snow", "sunny", "cold", "hot", "climate"],
+    "news_context": ["news", "headlines", "breaking", "happening", "events", "today"],
+    "datetime_context": ["what time", "current time", "what date", "today", "now"],
+})
 
 class IntelligentToolAgent:
     """
@@ -22,11 +91,14 @@ class IntelligentToolAgent:
     - Make intelligent decisions about which tools to use
     """
     
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key: str, client: Any = None):
+        # Groq-compatible client routed through the shared LLM gateway
+        self.client = client or get_llm_client(api_key)
         self.tools = {}
         self.history = []
+        self.history_manager = HistoryManager(self.client)
         self.tool_usage_patterns = {}
+        self._tool_intents: Optional[IntentMatcher] = None
         self._register_intelligent_tools()
     
     def register_tool(self, name: str, func: Callable, description: str, params_schema: Dict, keywords: List[str] = None):
@@ -45,6 +117,7 @@ class IntelligentToolAgent:
             "usage_count": 0,
             "success_rate": 1.0
         }
+        self._tool_intents = None
     
     def _register_intelligent_tools(self):
         """Register all available tools with intelligent selection capabilities"""
@@ -70,48 +143,54 @@ class IntelligentToolAgent:
                     'fields': 'items(title,link,snippet,displayLink)'
                 }
                 
-                # Make the API request
-                response = requests.get(base_url, params=params, timeout=10)
+                # Equivalent recent queries are answered from the shared cache
+                data = search_cache.get(query, max_results)
+                if data is None:
+                    # Make the API request
+                    response = http_client.get(base_url, params=params, timeout=10)
+                    
+                    if response.status_code == 200:
+                        data = response.json()
+                        search_cache.set(query, max_results, data)
+                    
+                    elif response.status_code == 403:
+                        print(f"[ERROR] Google API quota exceeded or access denied")
+                        return "Google Search API quota exceeded or access denied. Please try again later or contact administrator."
+                
+                    elif response.status_code == 400:
+                        print(f"[ERROR] Bad request to Google API: {response.text}")
+                        return f"Invalid search query. Please rephrase your search terms and try again."
+                
+                    else:
+                        print(f"[ERROR] Google API error {response.status_code}: {response.text}")
+                        return f"Search service temporarily unavailable (Error {response.status_code}). Please try again later."
+                else:
+                    print(f"[DEBUG] Search cache hit for query: {query}")
                 
-                if response.status_code == 200:
-                    data = response.json()
+                # Check if we have search results
+                if 'items' in data and data['items']:
+                    results = []
                     
-                    # Check if we have search results
-                    if 'items' in data and data['items']:
-                        results = []
+                    for i, item in enumerate(data['items'][:max_results], 1):
+                        title = item.get('title', 'No title')
+                        link = item.get('link', 'No link')
+                        snippet = item.get('snippet', 'No description available')
+                        display_link = item.get('displayLink', 'No domain')
                         
-                        for i, item in enumerate(data['items'][:max_results], 1):
-                            title = item.get('title', 'No title')
-                            link = item.get('link', 'No link')
-                            snippet = item.get('snippet', 'No description available')
-                            display_link = item.get('displayLink', 'No domain')
-                            
-                            # Format each result
-                            result_text = f"**Result {i}: {title}**\n"
-                            result_text += f"Source: {display_link}\n"
-                            result_text += f"Description: {snippet}\n"
-                            result_text += f"URL: {link}\n"
-                            
-                            results.append(result_text)
+                        # Format each result
+                        result_text = f"**Result {i}: {title}**\n"
+                        result_text += f"Source: {display_link}\n"
+                        result_text += f"Description: {snippet}\n"
+                        result_text += f"URL: {link}\n"
                         
-                        print(f"[SUCCESS] Google Search returned {len(results)} results")
-                        return "\n".join(results)
+                        results.append(result_text)
                     
-                    else:
-                        print(f"[DEBUG] No search results found for query: {query}")
-                        return f"No search results found for '{query}'. This might be a very specific or recent topic. Try using different keywords or rephrasing your query."
-                
-                elif response.status_code == 403:
-                    print(f"[ERROR] Google API quota exceeded or access denied")
-                    return "Google Search API quota exceeded or access denied. Please try again later or contact administrator."
-                
-                elif response.status_code == 400:
-                    print(f"[ERROR] Bad request to Google API: {response.text}")
-                    return f"Invalid search query. Please rephrase your search terms and try again."
+                    print(f"[SUCCESS] Google Search returned {len(results)} results")
+                    return "\n".join(results)
                 
                 else:
-                    print(f"[ERROR] Google API error {response.status_code}: {response.text}")
-                    return f"Search service temporarily unavailable (Error {response.status_code}). Please try again later."
+                    print(f"[DEBUG] No search results found for query: {query}")
+                    return f"No search results found for '{query}'. This might be a very specific or recent topic. Try using different keywords or rephrasing your query."
                     
             except requests.exceptions.Timeout:
                 print(f"[ERROR] Google Search API timeout")
@@ -158,35 +237,15 @@ class IntelligentToolAgent:
                 
                 print(f"[DEBUG] Getting weather for: {validated_location}")
                 
-                # First, get coordinates using OpenStreetMap Nominatim (free)
-                geocode_url = f"https://nominatim.openstreetmap.org/search?format=json&q={urllib.parse.quote(validated_location)}"
-                headers = {'User-Agent': 'AI-Agent/1.0'}
-                
-                geo_response = requests.get(geocode_url, headers=headers, timeout=10)
-                geo_data = geo_response.json()
+                # Coordinates from OpenStreetMap Nominatim, then weather from Open-Meteo
+                # (both free); lookups go through the shared geocode/weather cache
+                place = weather_cache.lookup_location(validated_location)
                 
-                if not geo_data:
+                if not place:
                     return f"Location '{location}' not found. Please try a more specific location."
                 
-                lat = float(geo_data[0]['lat'])
-                lon = float(geo_data[0]['lon'])
-                display_name = geo_data[0]['display_name']
-                
-                # Get weather from Open-Meteo (free, no API key required)
-                weather_url = f"https://api.open-meteo.com/v1/forecast"
-                params = {
-                    'latitude': lat,
-                    'longitude': lon,
-                    'current_weather': 'true',
-                    'hourly': 'temperature_2m,relative_humidity_2m,wind_speed_10m',
-                    'timezone': 'auto',
-                    'forecast_days': 1
-                }
-                
-                weather_response = requests.get(weather_url, params=params, timeout=10)
-                weather_data = weather_response.json()
-                
-                current = weather_data['current_weather']
+                display_name = place['display_name']
+                current = weather_cache.current_weather(place['lat'], place['lon'])
                 
                 # Weather code interpretation
                 weather_codes = {
@@ -234,24 +293,15 @@ Time: {current['time']}"""
                 
                 feed_url = news_feeds.get(topic.lower(), news_feeds["general"])
                 
-                # Parse RSS feed
-                feed = feedparser.parse(feed_url)
+                # Parsed, cleaned entries come from the feed cache, revalidated with a conditional GET
+                entries = feed_cache.get_entries(feed_url)
                 
-                if not feed.entries:
+                if not entries:
                     return f"No news found for topic '{topic}'. Please try: general, technology, science, world, business"
                 
                 news_items = []
-                for entry in feed.entries[:max_items]:
-                    published = getattr(entry, 'published', 'Unknown time')
-                    title = entry.title
-                    summary = getattr(entry, 'summary', 'No summary available')
-                    
-                    # Clean HTML from summary
-                    if summary:
-                        soup = BeautifulSoup(summary, 'html.parser')
-                        summary = soup.get_text().strip()[:200] + "..." if len(soup.get_text()) > 200 else soup.get_text().strip()
-                    
-                    news_items.append(f"[NEWS] {title}\nPublished: {published}\nSummary: {summary}\n")
+                for entry in entries[:max_items]:
+                    news_items.append(f"[NEWS] {entry['title']}\nPublished: {entry['published']}\nSummary: {entry['summary']}\n")
                 
                 return f"Latest {topic} news:\n\n" + "\n".join(news_items)
                 
@@ -269,26 +319,18 @@ Time: {current['time']}"""
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
                 }
                 
-                response = requests.get(url, headers=headers, timeout=15)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                
-                # Get text content
-                text = soup.get_text()
-                
-                # Clean up whitespace
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text = ' '.join(chunk for chunk in chunks if chunk)
+                # Stream the page and stop reading once the text budget is filled
+                page = page_fetcher.fetch(url, headers=headers, timeout=15)
+                if page.cached:
+                    print(f"[DEBUG] Page not modified, using cached text ({len(page.text)} chars)")
+                else:
+                    print(f"[DEBUG] Extracted {len(page.text)} chars of {'main' if page.main_content else 'page'} text "
+                          f"from {page.bytes_read} bytes ({page.bytes_saved} bytes skipped, "
+                          f"{page.parse_seconds * 1000:.1f} ms parsing)")
                 
-                # Limit content length
-                if len(text) > 3000:
-                    text = text[:3000] + "... [Content truncated]"
+                text = page.text
+                if page.truncated:
+                    text += "... [Content truncated]"
                 
                 return f"Content from {url}:\n\n{text}"
                 
@@ -373,34 +415,31 @@ Time: {current['time']}"""
             keywords=["time", "date", "now", "current", "today", "when", "what time"]
         )
     
+    def _keyword_matcher(self) -> IntentMatcher:
+        """Matcher over the registered tools' keywords, rebuilt when tools change"""
+        if self._tool_intents is None:
+            self._tool_intents = IntentMatcher({name: tool["keywords"] for name, tool in self.tools.items()})
+        return self._tool_intents
+    
     def _analyze_intent(self, user_input: str) -> List[str]:
         """Analyze user input to determine which tools might be needed"""
-        user_input_lower = user_input.lower()
+        keyword_matches = self._keyword_matcher().match(user_input)
+        context = ROUTING_INTENTS.match(user_input)
         potential_tools = []
         
         # Score each tool based on keyword matches and context
-        for tool_name, tool_data in self.tools.items():
-            score = 0
-            
+        for tool_name in self.tools:
             # Check for direct keyword matches
-            for keyword in tool_data["keywords"]:
-                if keyword in user_input_lower:
-                    score += 2
+            score = 2 * keyword_matches.count(tool_name)
             
             # Check for contextual indicators
             if tool_name == "search_web":
                 # Web search indicators
-                if any(phrase in user_input_lower for phrase in [
-                    "what is", "who is", "where is", "when did", "how to", 
-                    "tell me about", "information about", "recent", "latest",
-                    "current", "update", "happening", "price", "cost", "rate"
-                ]):
+                if "search_context" in context:
                     score += 1
                 
                 # Price/cost specific indicators
-                if any(word in user_input_lower for word in [
-                    "price", "cost", "rate", "petrol", "gas", "fuel", "today", "current"
-                ]):
+                if "price_context" in context:
                     score += 3
                 
                 # Check if asking about something that might be recent
@@ -409,21 +448,15 @@ Time: {current['time']}"""
                     score += 2
             
             elif tool_name == "get_weather":
-                if any(word in user_input_lower for word in [
-                    "weather", "temperature", "rain", "snow", "sunny", "cold", "hot", "climate"
-                ]):
+                if "weather_context" in context:
                     score += 3
             
             elif tool_name == "get_latest_news":
-                if any(word in user_input_lower for word in [
-                    "news", "headlines", "breaking", "happening", "events", "today"
-                ]):
+                if "news_context" in context:
                     score += 3
             
             elif tool_name == "get_current_datetime":
-                if any(phrase in user_input_lower for phrase in [
-                    "what time", "current time", "what date", "today", "now"
-                ]):
+                if "datetime_context" in context:
                     score += 3
             
             # Add tool to potential list if score is high enough
@@ -436,67 +469,32 @@ Time: {current['time']}"""
     
     def _should_use_tools(self, user_input: str) -> bool:
         """Determine if the input requires external tools"""
-        user_input_lower = user_input.lower()
-        
-        # First check for conversational/personal queries that should NOT use tools
-        conversational_patterns = [
-            "how are you", "how do you feel", "tell me a joke", "hello", "hi", "good morning",
-            "good evening", "goodbye", "bye", "thank you", "thanks", "please", "sorry",
-            "what are your hobbies", "do you like", "can you help me", "who are you",
-            "what can you do", "how can you help", "nice to meet you", "how's your day"
-        ]
+        intents = ROUTING_INTENTS.match(user_input)
         
         # If it's a conversational query, don't use tools
-        if any(pattern in user_input_lower for pattern in conversational_patterns):
+        if "conversational" in intents:
             return False
         
-        # Information request indicators that DO need tools
-        tool_indicators = [
-            # Factual information requests
-            "what is the", "who is the", "where is the", "when did", "how to",
-            "tell me about the", "information about", "facts about",
-            
-            # Current/recent information (but not conversational)
-            "latest news", "recent developments", "current price", "today's weather", "weather today",
-            "what happened today", "recent updates", "breaking news",
-            
-            # Price/cost queries
-            "price of", "cost of", "how much does", "rate of", "petrol price", "gas price",
-            
-            # Weather queries - comprehensive patterns
-            "weather in", "weather of", "weather at", "weather for", "weather today",
-            "temperature in", "temperature of", "climate in", "forecast for",
-            "current weather", "today weather", "tomorrow weather",
-            
-            # Time-sensitive factual queries
-            str(datetime.now().year) + " developments", "this year's updates",
-            "recently discovered", "just announced"
-        ]
-        
         # Check if it matches tool indicators
-        if any(indicator in user_input_lower for indicator in tool_indicators):
+        if "tool_indicator" in intents:
+            return True
+        # The year moves on while the server runs, so it can't be compiled in
+        if f"{datetime.now().year} developments" in user_input.lower():
             return True
             
         # Additional context-based checks
         # If asking about specific topics that typically need current info
-        topic_keywords = ["ai developments", "technology updates", "stock market", "cryptocurrency", 
-                         "political news", "scientific discoveries", "medical breakthroughs"]
-        
-        if any(keyword in user_input_lower for keyword in topic_keywords):
+        if "current_topic" in intents:
             return True
             
         # If contains "latest", "recent", "current" with substantive topics
-        if any(word in user_input_lower for word in ["latest", "recent", "current"]):
-            # But exclude personal/conversational contexts
-            if not any(personal in user_input_lower for personal in ["you", "feeling", "doing", "day"]):
-                return True
-        
-        # Weather-specific detection (single words with location context)
-        if any(word in user_input_lower for word in ["weather", "temperature", "climate", "forecast"]):
-            # Check if there's a location mentioned (city names or location indicators)
-            location_indicators = ["in", "at", "for", "of", "today", "tomorrow", "now"]
-            if any(loc in user_input_lower for loc in location_indicators):
-                return True
+        # But exclude personal/conversational contexts
+        if "recency" in intents and "personal" not in intents:
+            return True
+        
+        # Weather words route on their own, with or without a place or time
+        if "weather_word" in intents:
+            return True
         
         return False
     
@@ -504,56 +502,105 @@ Time: {current['time']}"""
         """List all available tools"""
         return list(self.tools.keys())
     
-    def chat(self, user_input: str) -> str:
+    def chat(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
         """Main chat function with intelligent tool selection"""
+        return self.chat_result(user_input, history).text
+    
+    def chat_result(self, user_input: str, history: Optional[List[Dict]] = None) -> ChatResult:
+        """Chat and return the reply with the tools, LLM calls and tokens it took"""
+        return ChatResult.collect(self._respond(user_input, history, stream=False))
+    
+    def chat_stream(self, user_input: str, history: Optional[List[Dict]] = None,
+                    result: Optional[ChatResult] = None) -> Iterator[str]:
+        """Streaming chat function - yields response text as the model generates it, filling result if given"""
+        stream = self._respond(user_input, history, stream=True)
+        return result.record_stream(stream) if result is not None else stream
+    
+    def _respond(self, user_input: str, history: Optional[List[Dict]], stream: bool) -> Iterator[str]:
+        """Route the input and yield the response text"""
         print(f"\n[DEBUG] Input: '{user_input}'")
         
+        # Use the caller's session history, or the agent's own for standalone use
+        if history is None:
+            history = self.history
+        
         # Add user message to history
-        self.history.append({"role": "user", "content": user_input})
+        history.append({"role": "user", "content": user_input})
+        # Keep the prompt within the token budget, summarizing older turns
+        self.history_manager.compact(history)
         
         # Analyze if tools are needed
         if self._should_use_tools(user_input):
             print("[DEBUG] Tools might be needed - analyzing intent")
             potential_tools = self._analyze_intent(user_input)
             print(f"[DEBUG] Potential tools identified: {potential_tools}")
-            return self._handle_with_tools(user_input, potential_tools)
+            yield from self._handle_with_tools(user_input, potential_tools, history, stream)
         else:
             print("[DEBUG] No tools needed - using LLM only")
-            return self._llm_only(user_input)
+            yield from self._llm_only(user_input, history, stream)
+    
+    def _reply(self, messages: List[Dict], history: List[Dict], stream: bool = False) -> Iterator[str]:
+        """Generate the assistant reply, yielding text as it arrives, and record it in history"""
+        if stream:
+            completion = self.client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                stream=True
+            )
+            parts = []
+            for chunk in completion:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            assistant_reply = "".join(parts)
+        else:
+            response = self.client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages
+            )
+            assistant_reply = response.choices[0].message.content or ""
+            yield assistant_reply
+        
+        history.append({"role": "assistant", "content": assistant_reply})
     
-    def _handle_with_tools(self, user_input: str, suggested_tools: List[str]) -> str:
+    def _handle_with_tools(self, user_input: str, suggested_tools: List[str], history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Handle requests that might need tools with intelligent selection"""
         
         # Enhanced direct tool execution for specific query types
-        user_lower = user_input.lower()
+        intents = ROUTING_INTENTS.match(user_input)
         
         # Weather queries - CHECK FIRST (highest priority for specific tools)
-        if any(word in user_lower for word in ["weather", "temperature", "climate", "forecast", "humidity", "wind"]) or \
-           any(phrase in user_lower for phrase in ["weather in", "temperature in", "climate in", "weather today", "weather tomorrow"]):
+        if "weather_query" in intents:
             print("[DEBUG] Weather query detected - forcing weather tool")
-            return self._execute_weather_query(user_input)
+            yield from self._execute_weather_query(user_input, history, stream)
+            return
         
         # Price and cost queries
-        elif any(word in user_lower for word in ["price", "cost", "rate", "petrol", "gas", "fuel"]):
+        elif "price_query" in intents:
             print("[DEBUG] Price/cost query detected - forcing enhanced search")
-            return self._execute_enhanced_search(user_input, "price")
+            yield from self._execute_enhanced_search(user_input, "price", history, stream)
+            return
         
         # Time/DateTime queries
-        elif any(phrase in user_lower for phrase in ["what time is it", "current time", "what date", "today's date"]) or \
-             any(word in user_lower for word in ["time", "date", "datetime", "timestamp"]) and not any(word in user_lower for word in ["weather", "news"]):
+        elif "datetime_phrase" in intents or \
+             "datetime_word" in intents and "weather_or_news" not in intents:
             print("[DEBUG] DateTime query detected - forcing datetime tool")
-            return self._execute_datetime_query(user_input)
+            yield from self._execute_datetime_query(user_input, history, stream)
+            return
         
         # Current events and news queries (but exclude weather)
-        elif any(word in user_lower for word in ["latest", "recent", "happening", "news", "breaking"]) and not any(word in user_lower for word in ["weather", "temperature", "climate"]) or \
-             (any(word in user_lower for word in ["today", "current"]) and not any(word in user_lower for word in ["weather", "temperature", "climate", "time", "date"])):
+        elif "events_word" in intents and "weather_core" not in intents or \
+             ("today_word" in intents and not intents.any("weather_core", "time_date_word")):
             print("[DEBUG] Current events query detected - forcing enhanced search")
-            return self._execute_enhanced_search(user_input, "news")
+            yield from self._execute_enhanced_search(user_input, "news", history, stream)
+            return
         
         # Information lookup queries
-        elif any(phrase in user_lower for phrase in ["what is", "who is", "where is", "tell me about"]):
+        elif "lookup_phrase" in intents:
             print("[DEBUG] Information query detected - forcing enhanced search")
-            return self._execute_enhanced_search(user_input, "information")
+            yield from self._execute_enhanced_search(user_input, "information", history, stream)
+            return
         
         system_message = {
             "role": "system", 
@@ -587,7 +634,7 @@ You MUST call the appropriate tools. Do not provide answers without using tools
         
         try:
             # Create messages with system prompt
-            messages = [system_message] + self.history
+            messages = [system_message] + history
             
             # Call Groq with tools available
             response = self.client.chat.completions.create(
@@ -598,30 +645,32 @@ You MUST call the appropriate tools. Do not provide answers without using tools
             )
             
             message = response.choices[0].message
-            
-            # Check if tools were called
-            if hasattr(message, "tool_calls") and message.tool_calls:
-                print("[DEBUG] Tools were called by LLM")
-                return self._process_tool_calls(message.tool_calls)
-            else:
-                # No tools used, return LLM response
-                assistant_reply = message.content
-                self.history.append({"role": "assistant", "content": assistant_reply})
-                print("[DEBUG] LLM responded without tools")
-                return assistant_reply
                 
         except Exception as e:
             error_msg = f"Error with tools: {str(e)}"
             print(f"[ERROR] {error_msg}")
             # Fallback to LLM only
-            return self._llm_only(user_input)
+            yield from self._llm_only(user_input, history, stream)
+            return
+        
+        # Check if tools were called
+        if hasattr(message, "tool_calls") and message.tool_calls:
+            print("[DEBUG] Tools were called by LLM")
+            yield from self._process_tool_calls(message.tool_calls, history, stream)
+        else:
+            # No tools used, return LLM response
+            assistant_reply = message.content
+            history.append({"role": "assistant", "content": assistant_reply})
+            print("[DEBUG] LLM responded without tools")
+            yield assistant_reply or ""
     
-    def _execute_enhanced_search(self, user_input: str, query_type: str) -> str:
+    def _execute_enhanced_search(self, user_input: str, query_type: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Execute enhanced search with intelligent LLM processing"""
         try:
             # Execute search tool
             search_tool = self.tools["search_web"]["func"]
-            search_results = search_tool(user_input)
+            with track_tool("search_web"):
+                search_results = search_tool(user_input)
             
             # Create context-aware prompt based on query type
             if query_type == "price":
@@ -682,26 +731,24 @@ Search Results:
 Please provide a comprehensive, accurate response based on the information found."""
 
             # Generate response using LLM
-            final_response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=self.history + [{"role": "user", "content": context_prompt}]
-            )
-            
-            final_answer = final_response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": final_answer})
+            yield from self._reply(history + [{"role": "user", "content": context_prompt}], history, stream)
             self.tools["search_web"]["usage_count"] += 1
             
             print(f"[SUCCESS] Enhanced search completed for {query_type} query")
-            return final_answer
             
         except Exception as e:
             print(f"[ERROR] Enhanced search failed: {e}")
-            return f"I apologize, but I encountered an error while searching for information about '{user_input}'. Please try rephrasing your query."
+            yield f"I apologize, but I encountered an error while searching for information about '{user_input}'. Please try rephrasing your query."
 
     def _extract_location_from_query(self, query: str) -> str:
         """Enhanced location extraction from user query"""
         import re
         
+        # Known places are matched directly, along with any country named after them
+        place = gazetteer.find_in_text(query)
+        if place:
+            return place.label
+        
         # Common location patterns
         location_patterns = [
             r'\bin\s+([A-Za-z\s]+?)(?:\s+today|\s+now|\?|$)',  # "in Paris", "in New York today"
@@ -722,27 +769,9 @@ Please provide a comprehensive, accurate response based on the information found
                 if location and len(location) > 1:
                     return location
         
-        # Look for common city names if no pattern matches
-        known_cities = [
-            'karachi', 'lahore', 'islamabad', 'rawalpindi', 'faisalabad',
-            'paris', 'london', 'tokyo', 'sydney', 'dubai', 'mumbai', 'delhi', 
-            'bangkok', 'singapore', 'berlin', 'madrid', 'rome', 'amsterdam', 
-            'moscow', 'beijing', 'seoul', 'cairo', 'istanbul', 'new york', 
-            'los angeles', 'chicago', 'houston', 'toronto', 'vancouver'
-        ]
-        
-        query_lower = query.lower()
-        for city in known_cities:
-            if city in query_lower:
-                # Handle multi-word cities
-                if ' ' in city:
-                    return city.title()
-                else:
-                    return city.title()
-        
         return None
 
-    def _execute_weather_query(self, user_input: str) -> str:
+    def _execute_weather_query(self, user_input: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Execute weather query with enhanced location extraction"""
         try:
             # Try to extract location from the query
@@ -753,10 +782,12 @@ Please provide a comprehensive, accurate response based on the information found
             
             # If no location specified, ask for it
             if not location:
-                return "Please specify a location for the weather query (e.g., 'weather in Tokyo' or 'temperature in New York')."
+                yield "Please specify a location for the weather query (e.g., 'weather in Tokyo' or 'temperature in New York')."
+                return
             
             print(f"[DEBUG] Extracted location from '{user_input}': {location}")
-            weather_result = weather_tool(location)
+            with track_tool("get_weather"):
+                weather_result = weather_tool(location)
             
             # Generate contextual response
             context_prompt = f"""The user asked: "{user_input}"
@@ -766,26 +797,19 @@ Weather Information:
 
 Please provide a natural, conversational response about the weather based on this information."""
 
-            final_response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile", 
-                messages=self.history + [{"role": "user", "content": context_prompt}]
-            )
-            
-            final_answer = final_response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": final_answer})
+            yield from self._reply(history + [{"role": "user", "content": context_prompt}], history, stream)
             self.tools["get_weather"]["usage_count"] += 1
             
-            return final_answer
-            
         except Exception as e:
             print(f"[ERROR] Weather query failed: {e}")
-            return f"I apologize, but I encountered an error while getting weather information. Please try again with a specific location."
+            yield f"I apologize, but I encountered an error while getting weather information. Please try again with a specific location."
     
-    def _execute_datetime_query(self, user_input: str) -> str:
+    def _execute_datetime_query(self, user_input: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Execute datetime query using the datetime tool"""
         try:
             datetime_tool = self.tools["get_current_datetime"]["func"]
-            datetime_result = datetime_tool()
+            with track_tool("get_current_datetime"):
+                datetime_result = datetime_tool()
             
             # Generate contextual response
             context_prompt = f"""The user asked: "{user_input}"
@@ -795,26 +819,20 @@ Current Date and Time:
 
 Please provide a natural, conversational response about the current date/time based on this information."""
 
-            final_response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile", 
-                messages=self.history + [{"role": "user", "content": context_prompt}]
-            )
-            
-            final_answer = final_response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": final_answer})
+            yield from self._reply(history + [{"role": "user", "content": context_prompt}], history, stream)
             self.tools["get_current_datetime"]["usage_count"] += 1
             
-            return final_answer
-            
         except Exception as e:
             print(f"[ERROR] DateTime query failed: {e}")
-            return f"I apologize, but I encountered an error while getting the current date/time. Please try again."
+            yield f"I apologize, but I encountered an error while getting the current date/time. Please try again."
 
-    def _process_tool_calls(self, tool_calls) -> str:
+    def _process_tool_calls(self, tool_calls, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Process tool calls and generate final response"""
-        results = []
+        results: List[Optional[str]] = []
         tools_used = []
+        calls = []
         
+        # Parse every call first so independent tools can run concurrently
         for tool_call in tool_calls:
             tool_name = tool_call.function.name
             
@@ -825,22 +843,14 @@ Please provide a natural, conversational response about the current date/time ba
                     args = json.loads(raw_args)
                 else:
                     args = raw_args
+                # Handle tools that don't take arguments
+                if args is None:
+                    args = {}
                 
-                print(f"[DEBUG] Executing {tool_name} with args: {args}")
-                
-                # Execute the tool
                 if tool_name in self.tools:
-                    func = self.tools[tool_name]["func"]
-                    # Handle tools that don't take arguments
-                    if args is None:
-                        args = {}
-                    result = func(**args)
-                    results.append(f"{tool_name}: {result}")
-                    tools_used.append(tool_name)
-                    
-                    # Update tool usage statistics
-                    self.tools[tool_name]["usage_count"] += 1
-                    print(f"[SUCCESS] Tool {tool_name} executed successfully")
+                    print(f"[DEBUG] Executing {tool_name} with args: {args}")
+                    calls.append((tool_name, self.tools[tool_name]["func"], args))
+                    results.append(None)
                 else:
                     error_msg = f"Unknown tool: {tool_name}"
                     results.append(error_msg)
@@ -851,6 +861,24 @@ Please provide a natural, conversational response about the current date/time ba
                 results.append(error_msg)
                 print(f"[ERROR] {error_msg}")
         
+        # Fill the pending slots with outcomes, keeping the original call order
+        outcomes = iter(tool_runtime.run(calls))
+        for index, slot in enumerate(results):
+            if slot is not None:
+                continue
+            outcome = next(outcomes)
+            record_tool(outcome.name, outcome.duration, outcome.ok)
+            if outcome.ok:
+                results[index] = f"{outcome.name}: {outcome.result}"
+                tools_used.append(outcome.name)
+                
+                # Update tool usage statistics
+                self.tools[outcome.name]["usage_count"] += 1
+                print(f"[SUCCESS] Tool {outcome.name} executed successfully")
+            else:
+                results[index] = f"Error executing {outcome.name}: {str(outcome.error)}"
+                print(f"[ERROR] {results[index]}")
+        
         # Generate final response using LLM with tool results
         tool_results = "\n\n".join(results)
         
@@ -875,37 +903,23 @@ Tools used: {', '.join(tools_used)}"""
             }
             
             # Get LLM to format the final response
-            final_response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=self.history + [final_prompt]
-            )
-            
-            final_answer = final_response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": final_answer})
-            return final_answer
+            yield from self._reply(history + [final_prompt], history, stream)
             
         except Exception as e:
             # Fallback to just showing tool results
             fallback_response = f"Here's what I found:\n\n{tool_results}"
-            self.history.append({"role": "assistant", "content": fallback_response})
-            return fallback_response
+            history.append({"role": "assistant", "content": fallback_response})
+            yield fallback_response
     
-    def _llm_only(self, user_input: str) -> str:
+    def _llm_only(self, user_input: str, history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Handle non-tool requests"""
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=self.history
-            )
-            
-            assistant_reply = response.choices[0].message.content
-            self.history.append({"role": "assistant", "content": assistant_reply})
-            return assistant_reply
+            yield from self._reply(history, history, stream)
             
         except Exception as e:
             error_msg = f"Error: {str(e)}"
-            self.history.append({"role": "assistant", "content": error_msg})
-            return error_msg
+            history.append({"role": "assistant", "content": error_msg})
+            yield error_msg
     
     def clear_history(self):
         """Clear conversation history"""
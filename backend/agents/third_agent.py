@@ -1,13 +1,30 @@
-from groq import Groq
 import json
 import re
 import requests
 import urllib.parse
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
+from services.llm_gateway import get_llm_client
+from services.http_client import http_client
+from services.search_cache import search_cache
+from services.weather_cache import weather_cache
+from services.gazetteer import gazetteer
+from services.intent_matcher import IntentMatcher
+from services.chat_result import ChatResult, track_tool
+
+# Action routing keywords, compiled once for every agent instance
+ACTION_INTENTS = IntentMatcher({
+    "weather": ["weather", "temperature", "climate", "forecast"],
+    "weather_conditions": ["rain", "snow", "wind", "humid*"],
+    "news": ["news", "headlines", "current events", "today news", "latest news"],
+    "time": ["time", "clock", "what time", "current time"],
+    "air_quality": ["air quality", "pollution", "aqi", "smog"],
+    "detail": ["detailed", "detail", "comprehensive", "explain", "explaining"],
+})
 
 class AutonomousAgent:
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key: str, client: Any = None):
+        # Groq-compatible client routed through the shared LLM gateway
+        self.client = client or get_llm_client(api_key)
         self.simulated_tools = {}
         self.history = []
         self.step_history = []
@@ -36,48 +53,54 @@ class AutonomousAgent:
                     'fields': 'items(title,link,snippet,displayLink)'
                 }
                 
-                # Make the API request
-                response = requests.get(base_url, params=params, timeout=10)
+                # Equivalent recent queries are answered from the shared cache
+                data = search_cache.get(query, max_results)
+                if data is None:
+                    # Make the API request
+                    response = http_client.get(base_url, params=params, timeout=10)
+                    
+                    if response.status_code == 200:
+                        data = response.json()
+                        search_cache.set(query, max_results, data)
+                    
+                    elif response.status_code == 403:
+                        print(f"[ERROR] Google API quota exceeded or access denied")
+                        return "Google Search API quota exceeded or access denied. Please try again later or contact administrator."
                 
-                if response.status_code == 200:
-                    data = response.json()
+                    elif response.status_code == 400:
+                        print(f"[ERROR] Bad request to Google API: {response.text}")
+                        return f"Invalid search query. Please rephrase your search terms and try again."
+                
+                    else:
+                        print(f"[ERROR] Google API error {response.status_code}: {response.text}")
+                        return f"Search service temporarily unavailable (Error {response.status_code}). Please try again later."
+                else:
+                    print(f"[DEBUG] Search cache hit for query: {query}")
+                
+                # Check if we have search results
+                if 'items' in data and data['items']:
+                    results = []
                     
-                    # Check if we have search results
-                    if 'items' in data and data['items']:
-                        results = []
+                    for i, item in enumerate(data['items'][:max_results], 1):
+                        title = item.get('title', 'No title')
+                        link = item.get('link', 'No link')
+                        snippet = item.get('snippet', 'No description available')
+                        display_link = item.get('displayLink', 'No domain')
                         
-                        for i, item in enumerate(data['items'][:max_results], 1):
-                            title = item.get('title', 'No title')
-                            link = item.get('link', 'No link')
-                            snippet = item.get('snippet', 'No description available')
-                            display_link = item.get('displayLink', 'No domain')
-                            
-                            # Format each result
-                            result_text = f"**Result {i}: {title}**\n"
-                            result_text += f"Source: {display_link}\n"
-                            result_text += f"Description: {snippet}\n"
-                            result_text += f"URL: {link}\n"
-                            
-                            results.append(result_text)
+                        # Format each result
+                        result_text = f"**Result {i}: {title}**\n"
+                        result_text += f"Source: {display_link}\n"
+                        result_text += f"Description: {snippet}\n"
+                        result_text += f"URL: {link}\n"
                         
-                        print(f"[SUCCESS] Google Search returned {len(results)} results")
-                        return "\n".join(results)
+                        results.append(result_text)
                     
-                    else:
-                        print(f"[DEBUG] No search results found for query: {query}")
-                        return f"No search results found for '{query}'. This might be a very specific or recent topic. Try using different keywords or rephrasing your query."
-                
-                elif response.status_code == 403:
-                    print(f"[ERROR] Google API quota exceeded or access denied")
-                    return "Google Search API quota exceeded or access denied. Please try again later or contact administrator."
-                
-                elif response.status_code == 400:
-                    print(f"[ERROR] Bad request to Google API: {response.text}")
-                    return f"Invalid search query. Please rephrase your search terms and try again."
+                    print(f"[SUCCESS] Google Search returned {len(results)} results")
+                    return "\n".join(results)
                 
                 else:
-                    print(f"[ERROR] Google API error {response.status_code}: {response.text}")
-                    return f"Search service temporarily unavailable (Error {response.status_code}). Please try again later."
+                    print(f"[DEBUG] No search results found for query: {query}")
+                    return f"No search results found for '{query}'. This might be a very specific or recent topic. Try using different keywords or rephrasing your query."
                     
             except requests.exceptions.Timeout:
                 print(f"[ERROR] Google Search API timeout")
@@ -123,35 +146,15 @@ class AutonomousAgent:
                 
                 print(f"[DEBUG] Getting weather for: {validated_location}")
                 
-                # First, get coordinates using OpenStreetMap Nominatim (free)
-                geocode_url = f"https://nominatim.openstreetmap.org/search?format=json&q={urllib.parse.quote(validated_location)}"
-                headers = {'User-Agent': 'AI-Agent/1.0'}
-                
-                geo_response = requests.get(geocode_url, headers=headers, timeout=10)
-                geo_data = geo_response.json()
+                # Coordinates from OpenStreetMap Nominatim, then weather from Open-Meteo
+                # (both free); lookups go through the shared geocode/weather cache
+                place = weather_cache.lookup_location(validated_location)
                 
-                if not geo_data:
+                if not place:
                     return f"Location '{validated_location}' not found. Please try a more specific location name (e.g., 'Paris, France' or 'New York, USA')."
                 
-                lat = float(geo_data[0]['lat'])
-                lon = float(geo_data[0]['lon'])
-                display_name = geo_data[0]['display_name']
-                
-                # Get weather from Open-Meteo (free, no API key required)
-                weather_url = f"https://api.open-meteo.com/v1/forecast"
-                params = {
-                    'latitude': lat,
-                    'longitude': lon,
-                    'current_weather': 'true',
-                    'hourly': 'temperature_2m,relative_humidity_2m,wind_speed_10m',
-                    'timezone': 'auto',
-                    'forecast_days': 1
-                }
-                
-                weather_response = requests.get(weather_url, params=params, timeout=10)
-                weather_data = weather_response.json()
-                
-                current = weather_data['current_weather']
+                display_name = place['display_name']
+                current = weather_cache.current_weather(place['lat'], place['lon'])
                 
                 # Weather code interpretation
                 weather_codes = {
@@ -210,12 +213,29 @@ Time: {current['time']}"""
             }
         }
     
-    def chat(self, user_input: str) -> str:
-        """Main chat interface - implements autonomous thinking loop"""
+    def chat(self, user_input: str, history: Optional[List[Dict]] = None) -> str:
+        """Main chat interface - implements autonomous thinking loop.
+        Each goal is planned from scratch, so session history is accepted for
+        API compatibility but not sent to the model."""
+        return self.chat_result(user_input, history).text
+    
+    def chat_result(self, user_input: str, history: Optional[List[Dict]] = None) -> ChatResult:
+        """Run the thinking loop and return the answer with the tools, LLM calls and tokens it took"""
+        return ChatResult.collect(self._run(user_input, stream=False))
+    
+    def chat_stream(self, user_input: str, history: Optional[List[Dict]] = None,
+                    result: Optional[ChatResult] = None) -> Iterator[str]:
+        """Streaming chat interface - yields the final answer as the model generates it, filling result if given"""
+        stream = self._run(user_input, stream=True)
+        return result.record_stream(stream) if result is not None else stream
+    
+    def _run(self, user_input: str, stream: bool) -> Iterator[str]:
+        """Autonomous thinking loop, yielding the final answer text"""
         print(f"[DEBUG] Starting autonomous agent with goal: '{user_input}'")
         
-        # Clear previous step history for new goal
-        self.step_history = []
+        # Each goal gets its own step history so concurrent requests don't share state
+        step_history = []
+        self.step_history = step_history
         
         # Main autonomous loop
         max_steps = 8  # Prevent infinite loops
@@ -226,16 +246,18 @@ Time: {current['time']}"""
             print(f"[DEBUG] Step {step_count}: Analyzing next action...")
             
             # Get next action from LLM
-            response = self._get_next_action(user_input)
+            response = self._get_next_action(user_input, step_history)
             
             if not response:
-                return "I encountered an error in my thinking process. Please try again."
+                yield "I encountered an error in my thinking process. Please try again."
+                return
             
             # Parse the response
             parsed = self._parse_agent_response(response)
             
             if not parsed:
-                return "I couldn't understand my own reasoning. Please try again."
+                yield "I couldn't understand my own reasoning. Please try again."
+                return
             
             print(f"[DEBUG] Thought: {parsed['thought'][:100]}...")
             print(f"[DEBUG] Action: {parsed['action']}")
@@ -254,54 +276,58 @@ Time: {current['time']}"""
             # Execute action if it's not "none"
             if parsed["action"] != "none" and parsed["action"] in self.simulated_tools:
                 # Validate action choice before executing
-                if self._validate_action_choice(parsed["action"], user_input):
-                    result = self._execute_simulated_action(parsed["action"], user_input)
+                if self._validate_action_choice(parsed["action"], user_input, step_history):
+                    with track_tool(parsed["action"]):
+                        result = self._execute_simulated_action(parsed["action"], user_input)
                     step_info["result"] = result
                     print(f"[DEBUG] Action Result: {result[:100]}...")
                 else:
                     # Override with correct action
                     correct_action = self._get_correct_action(user_input)
                     print(f"[DEBUG] Overriding {parsed['action']} with {correct_action}")
-                    result = self._execute_simulated_action(correct_action, user_input)
+                    with track_tool(correct_action):
+                        result = self._execute_simulated_action(correct_action, user_input)
                     step_info["result"] = result
                     step_info["action"] = correct_action
                     print(f"[DEBUG] Corrected Action Result: {result[:100]}...")
             
-            self.step_history.append(step_info)
+            step_history.append(step_info)
             
             # Check if goal is completed
             if parsed["goal_completed"].lower() == "yes":
                 final_answer = parsed.get("final_answer", "Goal completed successfully.")
                 
                 # Enhance final answer if user requested detailed information
-                if any(word in user_input.lower() for word in ["detailed", "detail", "comprehensive", "explain", "explaining"]):
-                    final_answer = self._enhance_detailed_response(final_answer, user_input)
+                if "detail" in ACTION_INTENTS.match(user_input):
+                    final_answer = self._enhance_detailed_response(final_answer, user_input, step_history)
                 
                 print(f"[SUCCESS] Goal completed in {step_count} steps!")
-                return final_answer
+                yield final_answer
+                return
             
             # Force completion for search queries after getting results
             if step_count >= 1 and any(
-                action in [s["action"] for s in self.step_history] 
+                action in [s["action"] for s in step_history] 
                 for action in ["search_web", "search_news"]
             ):
                 print(f"[DEBUG] Auto-completing after search results in step {step_count}")
                 # Generate LLM analysis of search results
-                search_results = [s["result"] for s in self.step_history if s["action"] in ["search_web", "search_news"] and s["result"]]
+                search_results = [s["result"] for s in step_history if s["action"] in ["search_web", "search_news"] and s["result"]]
                 if search_results:
-                    return self._analyze_search_results_with_llm(user_input, search_results[0])
+                    yield from self._analyze_search_results_with_llm(user_input, search_results[0], step_history, stream)
+                    return
         
-        return "I reached the maximum number of steps but couldn't complete the goal. Please try rephrasing your request."
+        yield "I reached the maximum number of steps but couldn't complete the goal. Please try rephrasing your request."
     
-    def _get_next_action(self, original_goal: str) -> str:
+    def _get_next_action(self, original_goal: str, step_history: List[Dict]) -> str:
         """Get next action from LLM using the autonomous agent prompt"""
         
         # Build the step history for context
         history_text = ""
-        if self.step_history:
+        if step_history:
             history_text = "\n".join([
                 f"{i+1}. Thought: {step['thought']}\n   Action: {step['action']}\n   Result: {step.get('result', 'No result')}"
-                for i, step in enumerate(self.step_history)
+                for i, step in enumerate(step_history)
             ])
         else:
             history_text = "None"
@@ -405,7 +431,15 @@ What should be done next?"""
             print(f"[ERROR] Failed to parse agent response: {e}")
             return None
     
-    def _analyze_search_results_with_llm(self, user_query: str, search_results: str) -> str:
+    def _stream_completion(self, **kwargs) -> Iterator[str]:
+        """Yield completion text chunks as they arrive from the model"""
+        completion = self.client.chat.completions.create(stream=True, **kwargs)
+        for chunk in completion:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    
+    def _analyze_search_results_with_llm(self, user_query: str, search_results: str, step_history: List[Dict], stream: bool = False) -> Iterator[str]:
         """Send search results to LLM for proper analysis and insights"""
         try:
             print("[DEBUG] Analyzing search results with LLM for comprehensive insights")
@@ -438,7 +472,7 @@ If this is about news/trends, provide:
 
 Make your response detailed, insightful, and valuable to the user. Focus on analysis and synthesis, not just summarizing the search results."""
 
-            completion = self.client.chat.completions.create(
+            request = dict(
                 messages=[
                     {"role": "system", "content": "You are a highly skilled analyst who excels at synthesizing information and providing actionable insights."},
                     {"role": "user", "content": analysis_prompt}
@@ -448,20 +482,28 @@ Make your response detailed, insightful, and valuable to the user. Focus on anal
                 max_tokens=1500
             )
             
-            analysis = completion.choices[0].message.content
-            print(f"[SUCCESS] Generated LLM analysis: {len(analysis)} characters")
-            return analysis
+            if stream:
+                analysis_length = 0
+                for delta in self._stream_completion(**request):
+                    analysis_length += len(delta)
+                    yield delta
+            else:
+                completion = self.client.chat.completions.create(**request)
+                analysis = completion.choices[0].message.content or ""
+                analysis_length = len(analysis)
+                yield analysis
+            print(f"[SUCCESS] Generated LLM analysis: {analysis_length} characters")
             
         except Exception as e:
             print(f"[ERROR] Failed to analyze search results with LLM: {e}")
             # Fallback to enhanced method
-            return self._enhance_detailed_response(f"Based on search results: {search_results[:200]}...", user_query)
+            yield self._enhance_detailed_response(f"Based on search results: {search_results[:200]}...", user_query, step_history)
 
-    def _enhance_detailed_response(self, basic_answer: str, user_query: str) -> str:
+    def _enhance_detailed_response(self, basic_answer: str, user_query: str, step_history: List[Dict]) -> str:
         """Enhance response with detailed analysis when user requests comprehensive information"""
         try:
             # Get search results from step history
-            search_results = [s["result"] for s in self.step_history if s["action"] in ["search_web", "search_news"] and s["result"]]
+            search_results = [s["result"] for s in step_history if s["action"] in ["search_web", "search_news"] and s["result"]]
             
             if not search_results:
                 return basic_answer
@@ -512,28 +554,26 @@ These developments represent just the latest in a rapidly evolving field where n
             print(f"[DEBUG] Error enhancing detailed response: {e}")
             return basic_answer
     
-    def _validate_action_choice(self, action: str, user_input: str) -> bool:
+    def _validate_action_choice(self, action: str, user_input: str, step_history: List[Dict]) -> bool:
         """Validate if the chosen action is appropriate for the user input"""
-        user_lower = user_input.lower()
+        intents = ACTION_INTENTS.match(user_input)
         
         # Weather actions should only be used for weather queries
         if action in ["get_weather", "analyze_weather"]:
-            has_weather_keywords = any(word in user_lower for word in [
-                "weather", "temperature", "climate", "forecast", "rain", "snow", "wind", "humid"
-            ])
+            has_weather_keywords = intents.any("weather", "weather_conditions")
             # analyze_weather should only be used after get_weather
             if action == "analyze_weather":
-                has_previous_weather = any(s["action"] == "get_weather" for s in self.step_history)
+                has_previous_weather = any(s["action"] == "get_weather" for s in step_history)
                 return has_weather_keywords and has_previous_weather
             return has_weather_keywords
         
         # Air quality actions should only be used for air quality queries
         if action == "check_air_quality":
-            return any(word in user_lower for word in ["air quality", "pollution", "aqi", "smog"])
+            return "air_quality" in intents
         
         # Time actions should only be used for time queries
         if action == "get_time":
-            return any(phrase in user_lower for phrase in ["time", "clock", "what time", "current time"])
+            return "time" in intents
         
         # Search actions are generally valid for most queries
         if action in ["search_web", "search_news"]:
@@ -543,22 +583,22 @@ These developments represent just the latest in a rapidly evolving field where n
     
     def _get_correct_action(self, user_input: str) -> str:
         """Get the correct action for a given user input"""
-        user_lower = user_input.lower()
+        intents = ACTION_INTENTS.match(user_input)
         
         # Weather queries
-        if any(word in user_lower for word in ["weather", "temperature", "climate", "forecast"]):
+        if "weather" in intents:
             return "get_weather"
         
         # News queries
-        if any(word in user_lower for word in ["news", "headlines", "current events", "today news", "latest news"]):
+        if "news" in intents:
             return "search_news"
         
         # Time queries
-        if any(phrase in user_lower for phrase in ["time", "clock", "what time", "current time"]):
+        if "time" in intents:
             return "get_time"
         
         # Air quality queries
-        if any(word in user_lower for word in ["air quality", "pollution", "aqi", "smog"]):
+        if "air_quality" in intents:
             return "check_air_quality"
         
         # Default to web search for everything else (prices, general info, etc.)
@@ -568,6 +608,11 @@ These developments represent just the latest in a rapidly evolving field where n
         """Extract location from user query"""
         import re
         
+        # Known places are matched directly, along with any country named after them
+        place = gazetteer.find_in_text(query)
+        if place:
+            return place.label
+        
         # Common location patterns
         location_patterns = [
             r'\bin\s+([A-Za-z\s]+?)(?:\s+today|\s+now|\?|$)',  # "in Paris", "in New York today"
@@ -587,18 +632,6 @@ These developments represent just the latest in a rapidly evolving field where n
                 if location and len(location) > 1:
                     return location
         
-        # Look for common city names
-        known_cities = [
-            'karachi', 'lahore', 'islamabad', 'paris', 'london', 'tokyo', 'sydney', 
-            'dubai', 'mumbai', 'delhi', 'bangkok', 'singapore', 'berlin', 'madrid',
-            'rome', 'amsterdam', 'moscow', 'beijing', 'seoul', 'cairo', 'istanbul'
-        ]
-        
-        query_lower = query.lower()
-        for city in known_cities:
-            if city in query_lower:
-                return city.title()
-        
         return None
     
     def _execute_simulated_action(self, action_name: str, user_query: str = "") -> str:
@@ -653,7 +686,7 @@ These developments represent just the latest in a rapidly evolving field where n
             return f"Unknown action: {action_name}"
     
     def get_step_history(self) -> List[Dict]:
-        """Return the step-by-step history of the current goal"""
+        """Return the step-by-step history of the most recent goal"""
         return self.step_history
     
     def clear_history(self):
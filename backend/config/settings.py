@@ -3,7 +3,7 @@ Secure configuration management for the AI Agents platform
 """
 import os
 import secrets
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 try:
     from pydantic_settings import BaseSettings
     from pydantic import Field
@@ -64,7 +64,107 @@ class Settings(BaseSettings):
     MAX_BLOG_CONTENT_LENGTH: int = Field(default=100000, gt=0)  # 100KB
     MAX_CHAT_MESSAGE_LENGTH: int = Field(default=4000, gt=0)    # 4KB
     MAX_UPLOAD_SIZE: int = Field(default=10*1024*1024, gt=0)    # 10MB
-    
+
+    # Agent Execution
+    AGENT_EXECUTOR_WORKERS: int = Field(default=4, gt=0, description="Default worker threads per agent type")
+    AGENT_EXECUTOR_POOL_SIZES: str = Field(
+        default="math=4,intelligent=8,autonomous=4,researcher=2",
+        description="Worker threads per agent type (comma-separated type=count)"
+    )
+    AGENT_EXECUTOR_QUEUE_LIMIT: int = Field(default=32, ge=0, description="Queued requests allowed per agent type")
+
+    # Chat Sessions
+    SESSION_MAX_SESSIONS: int = Field(default=1000, gt=0, description="Chat sessions kept in memory before LRU eviction")
+    SESSION_IDLE_TTL: int = Field(default=1800, gt=0, description="Seconds of inactivity before a session expires")
+    SESSION_MAX_MESSAGES: int = Field(default=100, gt=0, description="Hard cap on messages kept per session history")
+    HISTORY_TOKEN_BUDGET: int = Field(default=3000, gt=0, description="Estimated prompt tokens of history sent per turn")
+    HISTORY_SUMMARY_TOKENS: int = Field(default=300, gt=0, description="Token budget for the rolling summary of older turns")
+
+    # LLM Connection Pool
+    GROQ_MAX_CONNECTIONS: int = Field(default=100, gt=0, description="Maximum concurrent connections to the Groq API")
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, ge=0, description="Idle connections kept alive for reuse")
+    GROQ_KEEPALIVE_EXPIRY: float = Field(default=60.0, gt=0, description="Seconds an idle connection is kept alive")
+    GROQ_TIMEOUT: float = Field(default=60.0, gt=0, description="Groq request timeout in seconds")
+    GROQ_HTTP2: bool = Field(default=True, description="Use HTTP/2 when the h2 package is installed")
+
+    # LLM Gateway
+    LLM_MAX_CONCURRENCY: int = Field(default=16, gt=0, description="Concurrent LLM calls across all models")
+    LLM_MODEL_CONCURRENCY: int = Field(default=8, gt=0, description="Concurrent LLM calls per model")
+    LLM_DEFAULT_RPM: int = Field(default=30, gt=0, description="Requests per minute for models without explicit limits")
+    LLM_DEFAULT_TPM: int = Field(default=6000, gt=0, description="Tokens per minute for models without explicit limits")
+    LLM_MODEL_LIMITS: str = Field(
+        default="llama-3.3-70b-versatile=30:12000,llama-3.1-8b-instant=30:6000,llama3-8b-8192=30:6000",
+        description="Per-model rate limits (comma-separated model=rpm:tpm)"
+    )
+    LLM_MAX_RETRIES: int = Field(default=4, ge=0, description="Retries on 429 and transient LLM errors")
+    LLM_MAX_RETRY_AFTER: float = Field(default=30.0, ge=0, description="Longest Retry-After wait honored before a retry, in seconds; longer waits fail the call")
+    LLM_REQUEST_TIMEOUT: float = Field(default=120.0, gt=0, description="Seconds an agent waits for an LLM call, retries included")
+
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = Field(default=True, description="Serve identical completion requests from cache")
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=1000, gt=0, description="Completions kept in the in-memory cache")
+    LLM_CACHE_TTL: int = Field(default=3600, gt=0, description="Seconds a cached completion stays valid")
+    LLM_CACHE_SQLITE_PATH: Optional[str] = Field(default=None, description="SQLite file for a persistent cache tier (disabled when empty)")
+
+    # Tool HTTP Client
+    HTTP_POOL_CONNECTIONS: int = Field(default=20, gt=0, description="Hosts with their own keep-alive pool")
+    HTTP_POOL_MAXSIZE: int = Field(default=20, gt=0, description="Keep-alive connections kept per host")
+    HTTP_MAX_RETRIES: int = Field(default=3, ge=0, description="Retries for connection errors and 429/5xx responses")
+    HTTP_BACKOFF_FACTOR: float = Field(default=0.5, ge=0, description="Exponential backoff factor between retries")
+    HTTP_CONNECT_TIMEOUT: float = Field(default=5.0, gt=0, description="Default connect timeout in seconds")
+    HTTP_READ_TIMEOUT: float = Field(default=15.0, gt=0, description="Default read timeout in seconds")
+    HTTP_MAX_RETRY_AFTER: float = Field(default=10.0, ge=0, description="Longest Retry-After wait honored before a retry, in seconds")
+
+    # Tool Runtime
+    TOOL_MAX_WORKERS: int = Field(default=16, gt=0, description="Threads shared by synchronous tool calls")
+    TOOL_MAX_CONCURRENCY: int = Field(default=4, gt=0, description="Tool calls from one turn run at the same time")
+    TOOL_TIMEOUT: float = Field(default=30.0, gt=0, description="Seconds before a tool call is abandoned")
+
+    # Weather Tool Cache
+    GEOCODE_CACHE_MAX_ENTRIES: int = Field(default=5000, gt=0, description="Geocoded places kept in memory")
+    GEOCODE_CACHE_TTL: int = Field(default=2592000, gt=0, description="Seconds a geocoded place stays valid")
+    GEOCODE_CACHE_SQLITE_PATH: Optional[str] = Field(default="cache/geocode_cache.db", description="SQLite file that persists geocodes across restarts (disabled when empty)")
+    WEATHER_CACHE_MAX_ENTRIES: int = Field(default=1000, gt=0, description="Current-weather results kept in memory")
+    WEATHER_CACHE_TTL: int = Field(default=600, gt=0, description="Seconds a current-weather result stays valid")
+
+    # Gazetteer
+    GAZETTEER_PATH: Optional[str] = Field(default=None, description="Cities TSV for offline location lookup (bundled data/cities.tsv when empty)")
+    GAZETTEER_MIN_POPULATION: int = Field(default=0, ge=0, description="Skip gazetteer cities smaller than this")
+
+    # Search Cache
+    SEARCH_CACHE_MAX_ENTRIES: int = Field(default=2000, gt=0, description="Search responses kept in memory")
+    SEARCH_CACHE_TTL: int = Field(default=86400, gt=0, description="Seconds a search response stays valid")
+    SEARCH_CACHE_FRESH_TTL: int = Field(default=900, gt=0, description="Seconds for news, price and other time-sensitive queries")
+    SEARCH_CACHE_SQLITE_PATH: Optional[str] = Field(default="cache/search_cache.db", description="SQLite file that persists search responses (disabled when empty)")
+    SEARCH_CACHE_IGNORE_WORD_ORDER: bool = Field(default=False, description="Treat queries with the same words in any order as the same query")
+
+    # News Feed Cache
+    FEED_REVALIDATE_AFTER: int = Field(default=300, ge=0, description="Seconds a feed is served from memory before a conditional GET")
+    FEED_REFRESH_INTERVAL: int = Field(default=0, ge=0, description="Seconds between background refreshes of known feeds (0 disables)")
+    FEED_MAX_ENTRIES: int = Field(default=50, gt=0, description="Entries kept per feed")
+
+    # Web Page Text Extraction
+    PAGE_TEXT_MAX_CHARS: int = Field(default=3000, gt=0, description="Characters of page text read before the download stops")
+    PAGE_FETCH_CHUNK_SIZE: int = Field(default=16384, gt=0, description="Bytes read from the page stream at a time")
+    PAGE_FETCH_MAX_BYTES: int = Field(default=5242880, gt=0, description="Hard limit on bytes downloaded per page")
+    PAGE_MAIN_CONTENT: bool = Field(default=True, description="Extract the article body instead of all visible page text")
+    PAGE_CACHE_MAX_ENTRIES: int = Field(default=500, gt=0, description="Pages kept for ETag/Last-Modified revalidation")
+
+    # Research Paper Cache
+    PDF_CACHE_DIR: Optional[str] = Field(default="cache/papers", description="Directory for downloaded papers and their text (empty disables)")
+    PDF_CACHE_MAX_BYTES: int = Field(default=524288000, gt=0, description="Disk space used by cached papers before LRU eviction")
+    PDF_CACHE_UNVERSIONED_TTL: int = Field(default=86400, ge=0, description="Seconds papers without an arXiv version are trusted")
+
+    # Research Paper Extraction
+    PDF_EXTRACT_WORKERS: int = Field(default=4, ge=0, description="Worker processes extracting PDF text (0 extracts inline)")
+    PDF_EXTRACT_PAGES_PER_TASK: int = Field(default=2, gt=0, description="Pages handed to a worker process at a time")
+    PDF_EXTRACT_MAX_PAGES: int = Field(default=50, gt=0, description="Pages of a paper read at most")
+
+    # arXiv API
+    ARXIV_MIN_INTERVAL: float = Field(default=3.0, ge=0, description="Seconds between requests to the arXiv API, process-wide")
+    ARXIV_CACHE_TTL: int = Field(default=3600, ge=0, description="Seconds parsed arXiv search results are reused")
+    ARXIV_CACHE_MAX_ENTRIES: int = Field(default=500, gt=0, description="arXiv searches kept in the result cache")
+
     def get_origins_list(self) -> List[str]:
         """Parse ALLOWED_ORIGINS string into list"""
         if isinstance(self.ALLOWED_ORIGINS, str):
@@ -87,7 +187,30 @@ class Settings(BaseSettings):
         if self.ALLOWED_HEADERS == "*":
             return ["*"]
         return [header.strip() for header in self.ALLOWED_HEADERS.split(',') if header.strip()]
-    
+
+    def get_executor_pool_sizes(self) -> Dict[str, int]:
+        """Parse AGENT_EXECUTOR_POOL_SIZES string into a dict"""
+        sizes = {}
+        for item in self.AGENT_EXECUTOR_POOL_SIZES.split(','):
+            if '=' not in item:
+                continue
+            agent_type, count = item.split('=', 1)
+            if int(count) <= 0:
+                raise ValueError(f"Pool size for '{agent_type.strip()}' must be positive")
+            sizes[agent_type.strip()] = int(count)
+        return sizes
+
+    def get_model_limits(self) -> Dict[str, Tuple[int, int]]:
+        """Parse LLM_MODEL_LIMITS string into {model: (rpm, tpm)}"""
+        limits = {}
+        for item in self.LLM_MODEL_LIMITS.split(','):
+            if '=' not in item:
+                continue
+            model, values = item.split('=', 1)
+            rpm, _, tpm = values.partition(':')
+            limits[model.strip()] = (int(rpm), int(tpm or self.LLM_DEFAULT_TPM))
+        return limits
+
     @field_validator('GROQ_API_KEY')
     def validate_groq_key(cls, v):
         """Validate Groq API key format"""
@@ -22,6 +22,23 @@ from auth.auth_handler import get_current_user, get_current_user_optional, AuthH
 from auth.models import User, UserCreate, UserResponse, Token, LoginRequest
 from security.tool_registry import SecureToolRegistry
 from security.input_validation import sanitize_input, MessageValidation
+from services.agent_executor import AgentExecutor, ExecutorSaturatedError
+from services.session_store import ChatSession, SessionStore
+from services.history_manager import HistoryManager, get_history_stats
+from services.llm_client import llm_clients
+from services.llm_gateway import llm_gateway
+from services.llm_cache import completion_cache
+from services.chat_result import ChatResult
+from services.http_client import http_client
+from services.tool_runtime import tool_runtime
+from services.weather_cache import weather_cache
+from services.gazetteer import gazetteer
+from services.search_cache import search_cache
+from services.feed_cache import feed_cache
+from services.page_text import page_fetcher
+from services.pdf_cache import pdf_cache
+from services.pdf_extractor import pdf_extractor
+from services.arxiv_client import arxiv_client
 
 # Import blog routes
 from api.blog_routes import blog_router
@@ -50,6 +67,110 @@ async def lifespan(app: FastAPI):
     global secure_tool_registry
     secure_tool_registry = SecureToolRegistry()
     
+    # Initialize agent execution pools
+    global agent_executor
+    agent_executor = AgentExecutor(
+        default_workers=settings.AGENT_EXECUTOR_WORKERS,
+        queue_limit=settings.AGENT_EXECUTOR_QUEUE_LIMIT,
+        pool_sizes=settings.get_executor_pool_sizes()
+    )
+    
+    # Initialize per-session conversation state
+    global session_store
+    session_store = SessionStore(
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        idle_ttl=settings.SESSION_IDLE_TTL,
+        max_messages=settings.SESSION_MAX_MESSAGES
+    )
+    HistoryManager.set_defaults(
+        budget_tokens=settings.HISTORY_TOKEN_BUDGET,
+        summary_tokens=settings.HISTORY_SUMMARY_TOKENS
+    )
+    
+    # Configure the shared LLM connection pool before any agent is created
+    llm_clients.configure(
+        max_connections=settings.GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY,
+        timeout=settings.GROQ_TIMEOUT,
+        http2=settings.GROQ_HTTP2
+    )
+    llm_gateway.configure(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        model_concurrency=settings.LLM_MODEL_CONCURRENCY,
+        default_rpm=settings.LLM_DEFAULT_RPM,
+        default_tpm=settings.LLM_DEFAULT_TPM,
+        model_limits=settings.get_model_limits(),
+        max_retries=settings.LLM_MAX_RETRIES,
+        max_retry_after=settings.LLM_MAX_RETRY_AFTER,
+        request_timeout=settings.LLM_REQUEST_TIMEOUT
+    )
+    completion_cache.configure(
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        ttl=settings.LLM_CACHE_TTL,
+        sqlite_path=settings.LLM_CACHE_SQLITE_PATH,
+        enabled=settings.LLM_CACHE_ENABLED
+    )
+    http_client.configure(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+        max_retry_after=settings.HTTP_MAX_RETRY_AFTER
+    )
+    tool_runtime.configure(
+        max_workers=settings.TOOL_MAX_WORKERS,
+        max_concurrency=settings.TOOL_MAX_CONCURRENCY,
+        timeout=settings.TOOL_TIMEOUT
+    )
+    weather_cache.configure(
+        geocode_max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES,
+        geocode_ttl=settings.GEOCODE_CACHE_TTL,
+        geocode_sqlite_path=settings.GEOCODE_CACHE_SQLITE_PATH,
+        weather_max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+        weather_ttl=settings.WEATHER_CACHE_TTL
+    )
+    gazetteer.configure(
+        path=settings.GAZETTEER_PATH,
+        min_population=settings.GAZETTEER_MIN_POPULATION
+    )
+    search_cache.configure(
+        max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+        ttl=settings.SEARCH_CACHE_TTL,
+        fresh_ttl=settings.SEARCH_CACHE_FRESH_TTL,
+        sqlite_path=settings.SEARCH_CACHE_SQLITE_PATH,
+        ignore_word_order=settings.SEARCH_CACHE_IGNORE_WORD_ORDER
+    )
+    feed_cache.configure(
+        revalidate_after=settings.FEED_REVALIDATE_AFTER,
+        refresh_interval=settings.FEED_REFRESH_INTERVAL,
+        max_entries=settings.FEED_MAX_ENTRIES
+    )
+    page_fetcher.configure(
+        max_chars=settings.PAGE_TEXT_MAX_CHARS,
+        chunk_size=settings.PAGE_FETCH_CHUNK_SIZE,
+        max_bytes=settings.PAGE_FETCH_MAX_BYTES,
+        main_content=settings.PAGE_MAIN_CONTENT,
+        cache_entries=settings.PAGE_CACHE_MAX_ENTRIES
+    )
+    pdf_cache.configure(
+        directory=settings.PDF_CACHE_DIR,
+        max_bytes=settings.PDF_CACHE_MAX_BYTES,
+        unversioned_ttl=settings.PDF_CACHE_UNVERSIONED_TTL
+    )
+    pdf_extractor.configure(
+        max_workers=settings.PDF_EXTRACT_WORKERS,
+        pages_per_task=settings.PDF_EXTRACT_PAGES_PER_TASK,
+        max_pages=settings.PDF_EXTRACT_MAX_PAGES
+    )
+    arxiv_client.configure(
+        min_interval=settings.ARXIV_MIN_INTERVAL,
+        ttl=settings.ARXIV_CACHE_TTL,
+        max_entries=settings.ARXIV_CACHE_MAX_ENTRIES
+    )
+    
     # Initialize blog system
     try:
         from initialize_blog import initialize_blog_system
@@ -69,6 +190,18 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AI Agents API")
+    agent_executor.shutdown()
+    llm_gateway.close()
+    completion_cache.close()
+    http_client.close()
+    tool_runtime.close()
+    weather_cache.close()
+    gazetteer.close()
+    search_cache.close()
+    feed_cache.close()
+    pdf_cache.close()
+    pdf_extractor.close()
+    arxiv_client.close()
 
 app = FastAPI(
     title="AI Agents API",
@@ -103,6 +236,12 @@ app.include_router(blog_router)
 # Global secure tool registry
 secure_tool_registry: SecureToolRegistry = None
 
+# Global agent executor (blocking agent calls run here, off the event loop)
+agent_executor: AgentExecutor = None
+
+# Global session store (initialized in lifespan)
+session_store: SessionStore = None
+
 # In-memory storage for agents (in production, use a database)
 agents_store: Dict[str, Any] = {}  # Can store both GroqToolAgent and IntelligentToolAgent
 agent_metadata: Dict[str, Dict[str, Any]] = {}
@@ -201,12 +340,17 @@ class CreateAgentRequest(BaseModel):
 
 class ChatRequest(MessageValidation):
     """Enhanced chat request with validation"""
-    pass
+    session_id: Optional[str] = Field(
+        None, max_length=64, pattern=r'^[A-Za-z0-9_-]+$',
+        description="Conversation session; a new one is started when omitted"
+    )
 
 class ChatResponse(BaseModel):
     response: str = Field(..., description="Agent response")
     agent_id: str = Field(..., description="Agent identifier")
+    session_id: str = Field(..., description="Conversation session identifier")
     tools_used: bool = Field(default=False, description="Whether tools were used")
+    execution: Dict[str, Any] = Field(default_factory=dict, description="Tools invoked, per-tool timings, LLM calls and token counts")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     user_id: Optional[int] = Field(None, description="User identifier")
 
@@ -413,6 +557,7 @@ async def delete_agent(agent_id: str):
     
     del agents_store[agent_id]
     del agent_metadata[agent_id]
+    session_store.clear(agent_id)
     
     return {"message": "Agent deleted successfully"}
 
@@ -425,22 +570,23 @@ async def chat_with_agent(agent_id: str, request: ChatRequest):
     
     try:
         agent = agents_store[agent_id]
-        response = agent.chat(request.content)
-        
-        # Determine if tools were used based on the agent's internal logic
-        if hasattr(agent, '_should_use_tool'):
-            tools_used = agent._should_use_tool(request.content)
-        elif hasattr(agent, '_should_use_tools'):
-            tools_used = agent._should_use_tools(request.content)
-        else:
-            tools_used = False
+        agent_type = agent_metadata[agent_id]["agent_type"]
+        session = session_store.get_or_create(agent_id, request.session_id)
+        async with session.lock:
+            session.compact(session_store.max_messages)
+            result = await agent_executor.run(agent_type, agent.chat_result, request.content, session.history)
         
         return ChatResponse(
-            response=response,
+            response=result.text,
             agent_id=agent_id,
-            tools_used=tools_used
+            session_id=session.session_id,
+            tools_used=result.tools_used,
+            execution=result.to_dict()
         )
         
+    except ExecutorSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail="Agent is busy. Please try again shortly.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error chatting with agent: {str(e)}")
 
@@ -453,26 +599,22 @@ async def chat_with_agent_stream(agent_id: str, request: ChatRequest):
     async def generate_response():
         try:
             agent = agents_store[agent_id]
+            agent_type = agent_metadata[agent_id]["agent_type"]
+            session = session_store.get_or_create(agent_id, request.session_id)
             
             # Check if this is a research agent with streaming capabilities
             if isinstance(agent, ResearcherToolAgent) and agent._should_use_tools(request.content):
                 # Stream research progress for research agent
-                async for chunk in stream_research_response(agent, request.content):
-                    yield f"data: {json.dumps(chunk)}\n\n"
+                async with session.lock:
+                    session.compact(session_store.max_messages)
+                    async for chunk in stream_research_response(agent, request.content, session):
+                        yield f"data: {json.dumps(chunk)}\n\n"
             else:
-                # For other agents, simulate streaming by chunking the response
-                response = agent.chat(request.content)
-                
-                # Determine if tools were used
-                tools_used = False
-                if hasattr(agent, '_should_use_tool'):
-                    tools_used = agent._should_use_tool(request.content)
-                elif hasattr(agent, '_should_use_tools'):
-                    tools_used = agent._should_use_tools(request.content)
-                
-                # Stream the response in chunks
-                async for chunk in stream_text_response(response, agent_id, tools_used):
-                    yield f"data: {json.dumps(chunk)}\n\n"
+                # Forward the response as the model generates it
+                async with session.lock:
+                    session.compact(session_store.max_messages)
+                    async for chunk in stream_agent_response(agent, agent_type, agent_id, request.content, session):
+                        yield f"data: {json.dumps(chunk)}\n\n"
                 
         except Exception as e:
             error_chunk = {
@@ -497,47 +639,71 @@ async def chat_with_agent_stream(agent_id: str, request: ChatRequest):
         }
     )
 
-async def stream_text_response(response: str, agent_id: str, tools_used: bool) -> AsyncGenerator[Dict[str, Any], None]:
-    """Stream a text response in chunks for better UX"""
-    words = response.split()
-    chunk_size = 5  # Number of words per chunk
+async def stream_agent_response(agent: Any, agent_type: str, agent_id: str, user_input: str, session: ChatSession) -> AsyncGenerator[Dict[str, Any], None]:
+    """Stream agent output to the client as soon as the model produces it"""
     
     # Send initial metadata
     yield {
         "type": "start",
         "agent_id": agent_id,
-        "tools_used": tools_used,
+        "session_id": session.session_id,
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    # Stream content in chunks
-    for i in range(0, len(words), chunk_size):
-        chunk_words = words[i:i + chunk_size]
-        chunk_content = " " + " ".join(chunk_words) if i > 0 else " ".join(chunk_words)
-        
+    if hasattr(agent, 'chat_stream'):
+        result = ChatResult()
+        async for token in agent_executor.stream(agent_type, agent.chat_stream, user_input, session.history, result):
+            yield {
+                "type": "content",
+                "content": token,
+                "agent_id": agent_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+    else:
+        # Agents without a streaming API send their full answer as one chunk
+        result = await agent_executor.run(agent_type, agent.chat_result, user_input, session.history)
         yield {
             "type": "content",
-            "content": chunk_content,
+            "content": result.text,
             "agent_id": agent_id,
             "timestamp": datetime.utcnow().isoformat()
         }
-        
-        # Small delay for streaming effect
-        await asyncio.sleep(0.1)
+    
+    # What the turn actually did, once it has finished
+    yield {
+        "type": "result",
+        "agent_id": agent_id,
+        "tools_used": result.tools_used,
+        "execution": result.to_dict(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Research stream chunks whose content makes up the assistant's reply
+RESEARCH_REPLY_TYPES = ("success", "partial_success", "paper", "error")
+
+async def stream_research_response(agent: ResearcherToolAgent, user_input: str, session: ChatSession) -> AsyncGenerator[Dict[str, Any], None]:
+    """Stream research progress for the research agent and record the turn in the session"""
+    replies = []
+    async for chunk in research_chunks(agent, user_input, session.session_id):
+        if chunk.get("type") in RESEARCH_REPLY_TYPES:
+            replies.append(chunk["content"])
+        yield chunk
+    
+    session.history.append({"role": "user", "content": user_input})
+    session.history.append({"role": "assistant", "content": "\n\n".join(replies)})
 
-async def stream_research_response(agent: ResearcherToolAgent, user_input: str) -> AsyncGenerator[Dict[str, Any], None]:
-    """Stream research progress for the research agent"""
+async def research_chunks(agent: ResearcherToolAgent, user_input: str, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+    """Research progress and results for one request"""
     
     # Send start message
     yield {
         "type": "start",
         "content": "🔬 Starting AI Research Agent workflow...",
         "agent_id": "research",
+        "session_id": session_id,
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    await asyncio.sleep(0.5)
-    
     # Extract topic
     topic = agent._extract_topic(user_input)
     if not topic:
@@ -555,11 +721,8 @@ async def stream_research_response(agent: ResearcherToolAgent, user_input: str)
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    await asyncio.sleep(0.5)
-    
     # Check if full research or just paper search
-    user_lower = user_input.lower()
-    is_full_research = any(phrase in user_lower for phrase in ["full research", "conduct research", "complete analysis", "write paper", "generate pdf", "research proposal"])
+    is_full_research = agent._wants_full_research(user_input)
     
     try:
         if is_full_research:
@@ -578,57 +741,62 @@ async def stream_research_response(agent: ResearcherToolAgent, user_input: str)
             "timestamp": datetime.utcnow().isoformat()
         }
 
-async def stream_full_research(agent: ResearcherToolAgent, topic: str) -> AsyncGenerator[Dict[str, Any], None]:
-    """Stream the full research workflow with progress updates"""
-    
-    yield {
-        "type": "progress",
-        "content": "🔍 **Step 1**: Searching arXiv for relevant papers...",
-        "step": "searching_papers",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    
-    await asyncio.sleep(1)
-    
-    yield {
-        "type": "progress", 
-        "content": "📄 **Step 2**: Downloading and analyzing paper content...",
-        "step": "analyzing_papers",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    
-    await asyncio.sleep(2)
-    
-    yield {
-        "type": "progress",
-        "content": "🎯 **Step 3**: Identifying research gaps and opportunities...",
-        "step": "identifying_gaps", 
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    
-    await asyncio.sleep(1)
-    
-    yield {
+# Research workflow nodes -> (step number, step id, icon, label) for progress events
+RESEARCH_STEPS = {
+    "search_papers": (1, "searching_papers", "🔍", "Searching arXiv for relevant papers"),
+    "analyze_papers": (2, "analyzing_papers", "📄", "Downloading and analyzing paper content"),
+    "identify_gaps": (3, "identifying_gaps", "🎯", "Identifying research gaps and opportunities"),
+    "generate_paper": (4, "generating_proposal", "✍️", "Generating research proposal"),
+    "create_pdf": (5, "creating_pdf", "📋", "Creating PDF document"),
+}
+
+def research_progress_chunk(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a research workflow node event into a progress SSE chunk"""
+    node = event.get("node", "")
+    number, step, icon, label = RESEARCH_STEPS.get(node, (0, node, "⚙️", node))
+    chunk = {
         "type": "progress",
-        "content": "✍️ **Step 4**: Generating research proposal...",
-        "step": "generating_proposal",
+        "step": step,
+        "node": node,
+        "event": event.get("event"),
         "timestamp": datetime.utcnow().isoformat()
     }
+    if event.get("event") == "node_start":
+        chunk["content"] = f"{icon} **Step {number}**: {label}..."
+    else:
+        duration = event.get("duration", 0.0)
+        if event.get("status") == "completed":
+            chunk["content"] = f"✅ **Step {number}** completed in {duration:.1f}s"
+        else:
+            chunk["content"] = f"❌ **Step {number}** failed after {duration:.1f}s"
+        chunk["status"] = event.get("status")
+        chunk["duration_ms"] = round(duration * 1000)
+    return chunk
+
+async def stream_full_research(agent: ResearcherToolAgent, topic: str) -> AsyncGenerator[Dict[str, Any], None]:
+    """Stream the full research workflow with progress updates from the workflow nodes"""
     
-    await asyncio.sleep(2)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
     
-    yield {
-        "type": "progress",
-        "content": "📋 **Step 5**: Creating PDF document...",
-        "step": "creating_pdf",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    def publish(event: Dict[str, Any]):
+        # Called from the researcher worker thread
+        loop.call_soon_threadsafe(events.put_nowait, event)
     
-    await asyncio.sleep(1)
+    research = asyncio.ensure_future(
+        agent_executor.run("researcher", agent._research_topic, topic, publish)
+    )
+    # Node events are queued before the result, so this sentinel always arrives last
+    research.add_done_callback(lambda _: events.put_nowait(None))
     
-    # Execute the actual research (this runs in background)
     try:
-        result = agent._research_topic(topic)
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield research_progress_chunk(event)
+        
+        result = await research
         result_data = json.loads(result)
         
         if result_data.get("status") == "completed":
@@ -666,7 +834,7 @@ async def stream_paper_search(agent: ResearcherToolAgent, topic: str) -> AsyncGe
     await asyncio.sleep(1)
     
     try:
-        result = agent._search_papers(topic)
+        result = await agent_executor.run("researcher", agent._search_papers, topic)
         result_data = json.loads(result)
         
         if result_data.get("status") == "success":
@@ -705,14 +873,19 @@ async def stream_paper_search(agent: ResearcherToolAgent, topic: str) -> AsyncGe
         }
 
 @app.post("/agents/{agent_id}/clear-history")
-async def clear_agent_history(agent_id: str):
-    """Clear agent's conversation history"""
+async def clear_agent_history(agent_id: str, session_id: Optional[str] = None):
+    """Clear one session's conversation history, or all of the agent's sessions"""
     if agent_id not in agents_store:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     try:
+        if session_id:
+            session_store.clear(agent_id, session_id)
+            return {"message": "Session history cleared successfully"}
+        
         agent = agents_store[agent_id]
         agent.clear_history()
+        session_store.clear(agent_id)
         return {"message": "Agent history cleared successfully"}
         
     except Exception as e:
@@ -801,6 +974,46 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Metrics endpoint
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime metrics for agent execution and chat sessions"""
+    return {
+        "agent_executor": agent_executor.get_stats(),
+        "sessions": session_store.get_stats(),
+        "history": get_history_stats(),
+        "llm_connections": llm_clients.get_stats(),
+        "llm_gateway": llm_gateway.get_stats(),
+        "llm_cache": completion_cache.get_stats(),
+        "http_tools": http_client.get_stats(),
+        "tool_runtime": tool_runtime.get_stats(),
+        "weather_cache": weather_cache.get_stats(),
+        "gazetteer": gazetteer.get_stats(),
+        "web_search": search_cache.get_stats(),
+        "news_feeds": feed_cache.get_stats(),
+        "web_pages": page_fetcher.get_stats(),
+        "research_papers": pdf_cache.get_stats(),
+        "paper_extraction": pdf_extractor.get_stats(),
+        "arxiv": arxiv_client.get_stats(),
+        "agent_responses": agent_response_stats()
+    }
+
+def agent_response_stats() -> Dict[str, Any]:
+    """Sum the response-path counters of every agent that reports them"""
+    totals: Dict[str, Any] = {}
+    for agent in list(agents_store.values()):
+        if hasattr(agent, "get_metrics"):
+            for name, value in agent.get_metrics().items():
+                totals[name] = totals.get(name, 0) + value
+    attempts = totals.get("local_fast_path_attempts", 0)
+    if attempts:
+        hits = totals["local_fast_path_hits"]
+        totals["local_fast_path_hit_rate"] = round(hits / attempts, 3)
+        seconds = totals.pop("local_fast_path_seconds")
+        totals["local_fast_path_avg_latency_us"] = round(seconds / hits * 1e6, 1) if hits else 0.0
+    totals.pop("local_fast_path_seconds", None)
+    return totals
+
 # Demo endpoints to create sample agents (secured)
 @app.post("/demo/create-sample-agent")
 async def create_sample_agent(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,4 @@
+from .agent_executor import AgentExecutor, ExecutorSaturatedError
+from .session_store import ChatSession, SessionStore
+
+__all__ = ["AgentExecutor", "ExecutorSaturatedError", "ChatSession", "SessionStore"]
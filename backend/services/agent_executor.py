@@ -0,0 +1,202 @@
+"""
+Bounded thread-pool execution for blocking agent calls
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when an agent pool cannot accept more work"""
+
+
+class AgentPool:
+    """Thread pool for one agent type with admission control and metrics"""
+
+    def __init__(self, name: str, max_workers: int, queue_limit: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"agent-{name}"
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def admit(self):
+        """Reserve a queue slot or raise if the pool is saturated"""
+        with self._lock:
+            if self.queued + self.running >= self.max_workers + self.queue_limit:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Agent pool '{self.name}' is saturated "
+                    f"({self.running} running, {self.queued} queued)"
+                )
+            self.queued += 1
+            self.submitted += 1
+
+    def _started(self, wait: float):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def _release(self):
+        """Give back the reservation of a task that was cancelled before it started"""
+        with self._lock:
+            self.queued -= 1
+
+    def _finished(self, duration: float, ok: bool):
+        with self._lock:
+            self.running -= 1
+            self.total_run += duration
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def wrap(self, func: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap a callable so queue wait and run time are recorded"""
+        enqueued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            self._started(started_at - enqueued_at)
+            ok = False
+            try:
+                result = func()
+                ok = True
+                return result
+            finally:
+                self._finished(time.perf_counter() - started_at, ok)
+
+        return task
+
+    def submit(self, func: Callable[[], Any]) -> Future:
+        """
+        Run an admitted callable on the pool. A task cancelled while still
+        queued (client gone, shutdown) never starts, so its slot is released here.
+        """
+        try:
+            future = self.executor.submit(self.wrap(func))
+        except RuntimeError:
+            self._release()
+            raise
+        future.add_done_callback(lambda done: self._release() if done.cancelled() else None)
+        return future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of pool metrics"""
+        with self._lock:
+            started = self.submitted - self.queued
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.total_wait / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "avg_run_ms": round(self.total_run / (self.completed + self.failed) * 1000, 2)
+                if (self.completed + self.failed) else 0.0,
+            }
+
+
+class AgentExecutor:
+    """
+    Dispatches synchronous agent work to per-agent-type thread pools so the
+    event loop stays free for health checks, blog reads and other chats.
+    """
+
+    def __init__(
+        self,
+        default_workers: int = 4,
+        queue_limit: int = 32,
+        pool_sizes: Optional[Dict[str, int]] = None
+    ):
+        self.default_workers = default_workers
+        self.queue_limit = queue_limit
+        self.pool_sizes = pool_sizes or {}
+        self._pools: Dict[str, AgentPool] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, agent_type: str) -> AgentPool:
+        pool = self._pools.get(agent_type)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(agent_type)
+                if pool is None:
+                    workers = self.pool_sizes.get(agent_type, self.default_workers)
+                    pool = AgentPool(agent_type, workers, self.queue_limit)
+                    self._pools[agent_type] = pool
+                    logger.info(f"Created agent pool '{agent_type}' with {workers} workers")
+        return pool
+
+    async def run(self, agent_type: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool for the given agent type"""
+        pool = self._get_pool(agent_type)
+        pool.admit()
+        return await asyncio.wrap_future(pool.submit(functools.partial(func, *args, **kwargs)))
+
+    async def stream(self, agent_type: str, func: Callable[..., Iterable], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run a blocking iterator on the pool for the given agent type and yield
+        its items on the event loop as soon as they are produced.
+        """
+        pool = self._get_pool(agent_type)
+        pool.admit()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for item in func(*args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            finally:
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        future = asyncio.wrap_future(pool.submit(produce))
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+            # Re-raise any error from the producer thread
+            await future
+        finally:
+            cancelled.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metrics for every pool created so far"""
+        return {name: pool.get_stats() for name, pool in list(self._pools.items())}
+
+    def shutdown(self, wait: bool = False):
+        """Shut down all pools"""
+        for pool in list(self._pools.values()):
+            pool.executor.shutdown(wait=wait, cancel_futures=True)
+        self._pools.clear()
@@ -0,0 +1,114 @@
+"""
+Shared arXiv API access: polite request spacing, result cache and query coalescing
+"""
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# arXiv asks API clients to leave about three seconds between requests
+ARXIV_MIN_INTERVAL = 3.0
+
+
+def normalize_arxiv_query(query: str) -> str:
+    """Cache key for a query: case and spacing don't change arXiv's answer"""
+    return " ".join(query.lower().split())
+
+
+class ArxivClient:
+    """
+    One arXiv API client for the whole process. Requests from every thread
+    go through a scheduler that spaces them at least min_interval seconds
+    apart, so concurrent research runs queue up instead of getting
+    throttled. Parsed results are cached by normalized query and result
+    count, and a query that is already being fetched is not sent again:
+    later callers wait for the first one's answer.
+    """
+
+    def __init__(self, min_interval: float = ARXIV_MIN_INTERVAL, ttl: float = 3600, max_entries: int = 500):
+        self._lock = threading.Lock()
+        self._schedule_lock = threading.Lock()
+        self._next_request = 0.0
+        self._in_flight: Dict[Tuple[str, int], Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.wait_seconds = 0.0
+        self.configure(min_interval, ttl, max_entries)
+
+    def configure(self, min_interval: float, ttl: float = 3600, max_entries: int = 500):
+        self.min_interval = min_interval
+        self.results = TTLCache(max_entries=max_entries, ttl=ttl, name="arxiv")
+
+    def wait_turn(self):
+        """Block until this thread may send the next arXiv request"""
+        with self._schedule_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.min_interval
+        wait = start - now
+        if wait > 0:
+            with self._lock:
+                self.wait_seconds += wait
+            time.sleep(wait)
+
+    def search(self, query: str, max_results: int, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Parsed results for query, from the cache, from an identical request
+        already in flight, or from fetch() once the scheduler allows it.
+        Every caller gets its own copy, so changing it can't touch the cache.
+        """
+        key = (normalize_arxiv_query(query), max_results)
+        cache_key = f"{max_results}|{key[0]}"
+        data = self.results.get(cache_key)
+        if data is not None:
+            return copy.deepcopy(data)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            self.wait_turn()
+            with self._lock:
+                self.requests += 1
+            data = fetch()
+            self.results.set(cache_key, data)
+            future.set_result(data)
+            return copy.deepcopy(data)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def close(self):
+        self.results.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.results.get_stats()
+        with self._lock:
+            stats.update({
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "wait_seconds": round(self.wait_seconds, 2),
+                "min_interval": self.min_interval,
+            })
+        return stats
+
+
+# Process-wide client used by the arXiv tools
+arxiv_client = ArxivClient()
@@ -0,0 +1,143 @@
+"""
+Structured result of one chat turn: reply text plus what it took to produce it
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# The result being recorded by the current thread's turn, if any
+_current: contextvars.ContextVar[Optional["ChatResult"]] = contextvars.ContextVar("chat_result", default=None)
+
+
+class ToolInvocation:
+    """One tool call made during a turn"""
+
+    def __init__(self, name: str, duration: float, ok: bool):
+        self.name = name
+        self.duration = duration
+        self.ok = ok
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "duration": round(self.duration, 4), "ok": self.ok}
+
+
+class ChatResult:
+    """
+    Reply text with the tools actually invoked, per-tool timings, LLM calls
+    and token counts. Agents record into it while a turn runs: LLM calls are
+    counted by the gateway and tools through track_tool().
+    """
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.tool_calls: List[ToolInvocation] = []
+        self.llm_calls = 0
+        self.cached_llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.duration = 0.0
+
+    @property
+    def tools_used(self) -> bool:
+        return bool(self.tool_calls)
+
+    @property
+    def tools_invoked(self) -> List[str]:
+        """Names of the tools called, in order, without repeats"""
+        return list(dict.fromkeys(call.name for call in self.tool_calls))
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @contextmanager
+    def recording(self):
+        """Make this the result that LLM and tool calls on this thread are recorded into"""
+        token = _current.set(self)
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.duration += time.perf_counter() - started
+            _current.reset(token)
+
+    def record_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Pass a reply stream through, recording while each chunk is produced
+        and collecting the text. Recording is scoped to each step, so it never
+        leaks into whatever the consumer does between chunks.
+        """
+        iterator = iter(chunks)
+        parts = []
+        while True:
+            with self.recording():
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+            parts.append(chunk)
+            yield chunk
+        self.text = "".join(parts)
+
+    @classmethod
+    def collect(cls, chunks: Iterable[str]) -> "ChatResult":
+        """Run a reply stream to completion and return its result"""
+        result = cls()
+        for _ in result.record_stream(chunks):
+            pass
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Execution metadata, without the reply text"""
+        return {
+            "tools_used": self.tools_used,
+            "tools_invoked": self.tools_invoked,
+            "tool_calls": [call.to_dict() for call in self.tool_calls],
+            "llm_calls": self.llm_calls,
+            "cached_llm_calls": self.cached_llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "duration": round(self.duration, 4),
+        }
+
+
+def current_result() -> Optional[ChatResult]:
+    return _current.get()
+
+
+def record_llm_call(usage: Any = None, cached: bool = False):
+    """Count an LLM call (and its token usage) against the current turn"""
+    result = _current.get()
+    if result is None:
+        return
+    if cached:
+        result.cached_llm_calls += 1
+        return
+    result.llm_calls += 1
+    if usage is not None:
+        result.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        result.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+
+def record_tool(name: str, duration: float, ok: bool):
+    """
+    Record a tool call that was timed elsewhere, e.g. on a tool runtime
+    worker thread where the current turn isn't visible
+    """
+    result = _current.get()
+    if result is not None:
+        result.tool_calls.append(ToolInvocation(name, duration, ok))
+
+
+@contextmanager
+def track_tool(name: str):
+    """Time a tool call and record it against the current turn"""
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_tool(name, time.perf_counter() - started, ok)
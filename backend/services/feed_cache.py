@@ -0,0 +1,182 @@
+"""
+RSS/Atom feed cache with conditional revalidation and background refresh
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import feedparser
+from bs4 import BeautifulSoup
+
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_LENGTH = 200
+
+
+def clean_summary(summary: Optional[str]) -> str:
+    """Strip HTML from an entry summary and cut it to SUMMARY_LENGTH characters"""
+    if not summary:
+        return summary or ""
+    text = BeautifulSoup(summary, "html.parser").get_text()
+    return text.strip()[:SUMMARY_LENGTH] + "..." if len(text) > SUMMARY_LENGTH else text.strip()
+
+
+class CachedFeed:
+    """Cleaned entries of one feed plus the validators needed to revalidate it"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.entries: Optional[List[Dict[str, str]]] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+class FeedCache:
+    """
+    Keeps each feed's entries in memory already parsed and cleaned, with
+    the ETag/Last-Modified the server sent. A feed checked within the last
+    revalidate_after seconds is answered from memory; after that one
+    conditional GET either confirms it (304) or brings a new copy. If the
+    server can't be reached the last good entries are served. With a
+    refresh interval set, a background thread revalidates every known feed
+    on that schedule so requests rarely wait on the network at all.
+    """
+
+    def __init__(self, revalidate_after: float = 300, refresh_interval: float = 0, max_entries: int = 50):
+        self.revalidate_after = revalidate_after
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self._feeds: Dict[str, CachedFeed] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.memory_hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+        self.stale_served = 0
+        self.errors = 0
+
+    def configure(self, revalidate_after: float, refresh_interval: float = 0, max_entries: int = 50):
+        """Apply settings and start or stop the background refresher"""
+        self.revalidate_after = revalidate_after
+        self.max_entries = max_entries
+        self.stop_refresh()
+        self.refresh_interval = refresh_interval
+        if refresh_interval > 0:
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="feed-refresh", daemon=True)
+            self._refresher.start()
+
+    def _feed(self, url: str) -> CachedFeed:
+        with self._lock:
+            feed = self._feeds.get(url)
+            if feed is None:
+                feed = self._feeds[url] = CachedFeed(url)
+            return feed
+
+    def get_entries(self, url: str) -> List[Dict[str, str]]:
+        """Entries of a feed, in feed order, as {"title", "published", "summary"}"""
+        feed = self._feed(url)
+        with feed.lock:
+            if feed.entries is not None and time.monotonic() - feed.checked_at < self.revalidate_after:
+                self._count("memory_hits")
+                return feed.entries
+            return self._revalidate(feed)
+
+    def _revalidate(self, feed: CachedFeed) -> List[Dict[str, str]]:
+        """Conditional GET for a feed; caller holds feed.lock"""
+        headers = {}
+        if feed.entries is not None:
+            if feed.etag:
+                headers["If-None-Match"] = feed.etag
+            if feed.last_modified:
+                headers["If-Modified-Since"] = feed.last_modified
+        try:
+            response = http_client.get(feed.url, headers=headers)
+        except Exception as e:
+            if feed.entries is None:
+                raise
+            self._count("errors", "stale_served")
+            logger.warning(f"Serving cached feed {feed.url} after fetch failure: {e}")
+            return feed.entries
+
+        if response.status_code == 304 and feed.entries is not None:
+            feed.checked_at = time.monotonic()
+            self._count("not_modified")
+            return feed.entries
+        if response.status_code != 200 and feed.entries is not None:
+            self._count("errors", "stale_served")
+            logger.warning(f"Serving cached feed {feed.url} after HTTP {response.status_code}")
+            return feed.entries
+
+        parsed = feedparser.parse(response.content)
+        entries = [{
+            "title": getattr(entry, "title", ""),
+            "published": getattr(entry, "published", "Unknown time"),
+            "summary": clean_summary(getattr(entry, "summary", "No summary available")),
+        } for entry in parsed.entries[:self.max_entries]]
+        self._count("downloads")
+        if response.status_code != 200:
+            return entries
+        feed.entries = entries
+        feed.etag = response.headers.get("ETag")
+        feed.last_modified = response.headers.get("Last-Modified")
+        feed.checked_at = time.monotonic()
+        return entries
+
+    def refresh(self):
+        """Revalidate every feed that has been requested so far"""
+        with self._lock:
+            feeds = list(self._feeds.values())
+        for feed in feeds:
+            if self._stop.is_set():
+                return
+            try:
+                with feed.lock:
+                    self._revalidate(feed)
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"Background refresh of {feed.url} failed: {e}")
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def _count(self, *names: str):
+        with self._lock:
+            for name in names:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def stop_refresh(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def close(self):
+        self.stop_refresh()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests_served = self.memory_hits + self.not_modified + self.downloads + self.stale_served
+            return {
+                "feeds": len(self._feeds),
+                "memory_hits": self.memory_hits,
+                "not_modified": self.not_modified,
+                "downloads": self.downloads,
+                "stale_served": self.stale_served,
+                "errors": self.errors,
+                "download_avoided_rate": round(
+                    (requests_served - self.downloads) / requests_served, 3
+                ) if requests_served else 0.0,
+                "refresh_interval": self.refresh_interval,
+            }
+
+
+# Process-wide cache used by the news tool
+feed_cache = FeedCache()
@@ -0,0 +1,308 @@
+"""
+Offline gazetteer: local place lookup for location extraction and geocoding
+"""
+import logging
+import mmap
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cities.tsv")
+
+# City names that are also everyday words; in free text they only count when capitalized
+COMMON_WORDS = frozenset({
+    "male", "nice", "cork", "phoenix", "hamilton", "charlotte", "austin",
+    "orlando", "columbus", "darwin", "santa cruz", "rio",
+})
+
+# Country spellings people use that aren't the gazetteer's own country names
+COUNTRY_ALIASES = {
+    "usa": "US", "us": "US", "u s": "US", "u s a": "US", "america": "US", "united states of america": "US",
+    "uk": "GB", "u k": "GB", "britain": "GB", "great britain": "GB", "england": "GB", "scotland": "GB",
+    "wales": "GB", "northern ireland": "GB", "uae": "AE", "emirates": "AE", "ksa": "SA",
+    "holland": "NL", "korea": "KR", "czechia": "CZ", "russian federation": "RU", "drc": "CD",
+    "cote d ivoire": "CI",
+}
+
+# States and provinces written after a city ("Paris, Texas", "Sydney Nova Scotia"),
+# mapped to their country; names shared with a country or another state's country are left out
+REGION_COUNTRIES = {
+    "US": [
+        "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+        "florida", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky", "louisiana",
+        "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi", "missouri",
+        "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico", "north carolina",
+        "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania", "rhode island", "south carolina",
+        "south dakota", "tennessee", "texas", "utah", "vermont", "virginia", "west virginia",
+        "wisconsin", "wyoming",
+    ],
+    "CA": [
+        "alberta", "british columbia", "manitoba", "new brunswick", "newfoundland", "nova scotia",
+        "ontario", "prince edward island", "saskatchewan",
+    ],
+    "AU": ["new south wales", "queensland", "south australia", "tasmania", "western australia"],
+    "PK": ["sindh", "balochistan", "khyber pakhtunkhwa"],
+    "IN": ["telangana", "andhra pradesh", "maharashtra", "karnataka", "tamil nadu", "kerala", "uttar pradesh"],
+}
+
+# Trie leaf key; words are never empty so it can't collide with one
+_LEAF = ""
+
+# Match flags: the name only counts in free text when written in capitals / capitalized
+_UPPER = 1
+_CAPITAL = 2
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents and apostrophes: "Xi'an" -> "xian", "Zürich" -> "zurich" """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower().replace("'", "").replace("’", "")
+
+
+def _tokens(text: str) -> List[Tuple[str, int, int]]:
+    """Words of text as (folded word, start, end) character spans of the original"""
+    return [(_fold(match.group()), match.start(), match.end())
+            for match in re.finditer(r"[^\W_]+(?:['’][^\W_]+)*", text)]
+
+
+class Place:
+    """One gazetteer entry"""
+
+    __slots__ = ("name", "country_code", "country", "lat", "lon", "population")
+
+    def __init__(self, name: str, country_code: str, country: str, lat: float, lon: float, population: int):
+        self.name = name
+        self.country_code = country_code
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+
+    @property
+    def label(self) -> str:
+        """Unambiguous display name, e.g. "Hyderabad, Pakistan" """
+        return self.name if self.name == self.country else f"{self.name}, {self.country}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"lat": self.lat, "lon": self.lon, "display_name": self.label}
+
+    def __repr__(self) -> str:
+        return f"Place({self.label!r}, {self.lat}, {self.lon})"
+
+
+class Gazetteer:
+    """
+    Word trie over the city names and aliases in a TSV file (see
+    data/cities.tsv for the format). The file is memory-mapped and the trie
+    stores only row offsets, so a large gazetteer costs little more than its
+    index; rows are parsed when a lookup needs them.
+
+    The same trie serves exact resolution ("Paris, France" -> coordinates)
+    and extraction from free text, where every word position is tried and
+    the longest name wins. A country (or state) right after the city picks
+    between same-named places; otherwise the most populous one is used.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, min_population: int = 0):
+        self.path = path
+        self.min_population = min_population
+        self._lock = threading.Lock()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._names: Dict[str, Any] = {}
+        self._countries: Dict[str, Any] = {}
+        self._loaded = False
+        self.places = 0
+        self.resolves = 0
+        self.resolved = 0
+        self.text_searches = 0
+        self.text_matches = 0
+
+    def configure(self, path: Optional[str] = None, min_population: int = 0):
+        """Point at another file or population cut-off; the index is rebuilt on next use"""
+        with self._lock:
+            self._unload()
+            self.path = path or DEFAULT_PATH
+            self.min_population = min_population
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                self._load()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Gazetteer unavailable ({self.path}): {e}")
+                self._unload()
+            self._loaded = True
+
+    def _load(self):
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = 0
+        size = len(self._map)
+        while offset < size:
+            end = self._map.find(b"\n", offset)
+            if end == -1:
+                end = size
+            line = self._map[offset:end].decode("utf-8").rstrip("\r")
+            if line and not line.startswith("#"):
+                fields = line.split("\t")
+                if len(fields) >= 7 and int(fields[6] or 0) >= self.min_population:
+                    self._index_row(offset, fields)
+            offset = end + 1
+        for alias, code in COUNTRY_ALIASES.items():
+            self._insert(self._countries, alias.split(), code)
+        for code, regions in REGION_COUNTRIES.items():
+            for region in regions:
+                self._insert(self._countries, region.split(), code)
+        logger.info(f"Gazetteer loaded: {self.places} places from {self.path}")
+
+    def _index_row(self, offset: int, fields: List[str]):
+        name, aliases, country_code, country = fields[0], fields[1], fields[2], fields[3]
+        for spelling in [name] + [alias.strip() for alias in aliases.split(",") if alias.strip()]:
+            words = [word for word, _, _ in _tokens(spelling)]
+            if not words:
+                continue
+            flags = 0
+            if spelling.isupper():
+                flags = _UPPER
+            elif " ".join(words) in COMMON_WORDS:
+                flags = _CAPITAL
+            self._insert(self._names, words, (offset, flags))
+        self._insert(self._countries, [word for word, _, _ in _tokens(country)], country_code)
+        self._insert(self._countries, [country_code.lower()], country_code)
+        self.places += 1
+
+    @staticmethod
+    def _insert(trie: Dict[str, Any], words: List[str], value: Any):
+        node = trie
+        for word in words:
+            node = node.setdefault(word, {})
+        leaf = node.setdefault(_LEAF, [])
+        if value not in leaf:
+            leaf.append(value)
+
+    @staticmethod
+    def _longest(trie: Dict[str, Any], words: List[str], start: int) -> Tuple[int, List[Any]]:
+        """Longest trie entry starting at words[start]: (end index, leaf values)"""
+        node = trie
+        best_end, best = start, []
+        for index in range(start, len(words)):
+            node = node.get(words[index])
+            if node is None:
+                break
+            if _LEAF in node:
+                best_end, best = index + 1, node[_LEAF]
+        return best_end, best
+
+    def _place(self, offset: int) -> Place:
+        end = self._map.find(b"\n", offset)
+        fields = self._map[offset:end if end != -1 else len(self._map)].decode("utf-8").rstrip("\r").split("\t")
+        return Place(fields[0], fields[2], fields[3], float(fields[4]), float(fields[5]), int(fields[6] or 0))
+
+    def _pick(self, offsets: List[int], country_code: Optional[str]) -> Optional[Place]:
+        places = [self._place(offset) for offset in offsets]
+        if country_code:
+            places = [place for place in places if place.country_code == country_code]
+        return max(places, key=lambda place: place.population) if places else None
+
+    def _country_at(self, words: List[str], start: int) -> Tuple[int, Optional[str]]:
+        end, codes = self._longest(self._countries, words, start)
+        return end, codes[0] if codes else None
+
+    def resolve(self, location: str) -> Optional[Place]:
+        """
+        Look up a place name, optionally followed by its country ("Lahore",
+        "Hyderabad, Pakistan", "Portland USA"). Returns None for anything
+        that isn't entirely a known city and country.
+        """
+        self._ensure_loaded()
+        self.resolves += 1
+        if self._map is None:
+            return None
+        words = [word for word, _, _ in _tokens(location)]
+        end, leaf = self._longest(self._names, words, 0)
+        if not leaf:
+            return None
+        country_code = None
+        if end < len(words):
+            country_end, country_code = self._country_at(words, end)
+            if country_code is None or country_end != len(words):
+                return None
+        place = self._pick([offset for offset, _ in leaf], country_code)
+        if place:
+            self.resolved += 1
+        return place
+
+    def find_in_text(self, text: str) -> Optional[Place]:
+        """The most specific known place mentioned in free text, if any"""
+        self._ensure_loaded()
+        self.text_searches += 1
+        if self._map is None:
+            return None
+        spans = _tokens(text)
+        words = [word for word, _, _ in spans]
+        best: Optional[Tuple[int, int, List[int]]] = None
+        for start in range(len(words)):
+            end, leaf = self._longest(self._names, words, start)
+            if not leaf:
+                continue
+            original = text[spans[start][1]:spans[end - 1][2]]
+            offsets = [offset for offset, flags in leaf if self._written_as_name(original, flags)]
+            if offsets and (best is None or end - start > best[1] - best[0]):
+                best = (start, end, offsets)
+        if best is None:
+            return None
+        # "Paris, Texas" is not Paris, France: a named country nothing matches means the
+        # place isn't in the gazetteer, and the caller's fuller lookup should handle it
+        _, country_code = self._country_at(words, best[1])
+        place = self._pick(best[2], country_code)
+        if place:
+            self.text_matches += 1
+        return place
+
+    @staticmethod
+    def _written_as_name(original: str, flags: int) -> bool:
+        if flags == _UPPER:
+            return original.isupper()
+        if flags == _CAPITAL:
+            return original[:1].isupper()
+        return True
+
+    def _unload(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._map = None
+        self._names = {}
+        self._countries = {}
+        self._loaded = False
+        self.places = 0
+
+    def close(self):
+        with self._lock:
+            self._unload()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "places": self.places,
+            "resolves": self.resolves,
+            "resolved": self.resolved,
+            "text_searches": self.text_searches,
+            "text_matches": self.text_matches,
+        }
+
+
+# Process-wide gazetteer, loaded on first lookup
+gazetteer = Gazetteer()
@@ -0,0 +1,150 @@
+"""
+Token-budgeted conversation history with rolling summarization
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_stats_lock = threading.Lock()
+_stats = {
+    "compactions": 0,
+    "summary_failures": 0,
+    "messages_evicted": 0,
+    "tokens_evicted": 0,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Estimated prompt tokens for one chat message"""
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def is_summary(message: Dict[str, Any]) -> bool:
+    """Whether a message is the rolling summary kept at the head of a history"""
+    return message.get("role") == "system" and (message.get("content") or "").startswith(SUMMARY_PREFIX)
+
+
+def get_history_stats() -> Dict[str, int]:
+    """Process-wide history compaction metrics"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+class HistoryManager:
+    """
+    Keeps a conversation history within a token budget. When the budget is
+    exceeded the oldest turns are folded into a summary message at the head
+    of the history, so each summarization only covers newly evicted turns.
+    """
+
+    default_budget_tokens = 3000
+    default_summary_tokens = 300
+
+    def __init__(
+        self,
+        client: Any = None,
+        budget_tokens: Optional[int] = None,
+        summary_tokens: Optional[int] = None,
+        summary_model: str = "llama-3.1-8b-instant",
+        low_water: float = 0.6
+    ):
+        self.client = client
+        self.budget_tokens = budget_tokens or self.default_budget_tokens
+        self.summary_tokens = summary_tokens or self.default_summary_tokens
+        self.summary_model = summary_model
+        # Compact down to this fraction of the budget so summaries aren't rebuilt every turn
+        self.low_water = low_water
+
+    @classmethod
+    def set_defaults(cls, budget_tokens: int, summary_tokens: int):
+        """Set the budget used by managers created without explicit values"""
+        cls.default_budget_tokens = budget_tokens
+        cls.default_summary_tokens = summary_tokens
+
+    def count_tokens(self, history: List[Dict[str, Any]]) -> int:
+        """Estimated prompt tokens for a whole history"""
+        return sum(message_tokens(m) for m in history)
+
+    def compact(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Trim the history in place to the token budget, summarizing what is evicted"""
+        if self.count_tokens(history) <= self.budget_tokens:
+            return history
+
+        previous_summary = None
+        messages = history
+        if history and is_summary(history[0]):
+            previous_summary = history[0]["content"][len(SUMMARY_PREFIX):]
+            messages = history[1:]
+
+        # Keep the newest messages that fit, always including the latest one
+        target = int(self.budget_tokens * self.low_water) - self.summary_tokens
+        keep_from = len(messages)
+        used = 0
+        while keep_from > 0:
+            cost = message_tokens(messages[keep_from - 1])
+            if used + cost > target and keep_from < len(messages):
+                break
+            used += cost
+            keep_from -= 1
+
+        # Start the kept window on a user turn
+        while keep_from < len(messages) - 1 and messages[keep_from].get("role") != "user":
+            keep_from += 1
+
+        evicted = messages[:keep_from]
+        if not evicted:
+            return history
+
+        summary = self._summarize(previous_summary, evicted)
+        history[:] = [{"role": "system", "content": SUMMARY_PREFIX + summary}] + messages[keep_from:]
+
+        with _stats_lock:
+            _stats["compactions"] += 1
+            _stats["messages_evicted"] += len(evicted)
+            _stats["tokens_evicted"] += self.count_tokens(evicted)
+        logger.debug(f"Compacted history: evicted {len(evicted)} messages, kept {len(history)}")
+        return history
+
+    def _summarize(self, previous_summary: Optional[str], evicted: List[Dict[str, Any]]) -> str:
+        """Fold evicted messages into the running summary"""
+        transcript = "\n".join(
+            f"{m.get('role', 'user')}: {(m.get('content') or '')[:1500]}" for m in evicted
+        )
+        if self.client is not None:
+            prompt = (
+                "Update the running summary of a conversation between a user and an assistant.\n\n"
+                f"Current summary:\n{previous_summary or 'None'}\n\n"
+                f"New messages:\n{transcript}\n\n"
+                "Return only the updated summary. Keep facts, numbers, names and open questions "
+                f"the assistant may need later, in at most {self.summary_tokens * 3 // 4} words."
+            )
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.summary_model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=self.summary_tokens,
+                    temperature=0.2
+                )
+                summary = (response.choices[0].message.content or "").strip()
+                if summary:
+                    return summary
+            except Exception as e:
+                logger.warning(f"History summarization failed, using truncated transcript: {e}")
+            with _stats_lock:
+                _stats["summary_failures"] += 1
+
+        # Fall back to keeping the most recent part of the old summary and transcript
+        combined = f"{previous_summary}\n{transcript}" if previous_summary else transcript
+        return combined[-self.summary_tokens * 4:]
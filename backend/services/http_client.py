@@ -0,0 +1,211 @@
+"""
+Shared HTTP session for agent tools with keep-alive pools, retries and timeouts
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "AI-Agent/1.0"
+
+# Transient statuses retried with backoff (honoring Retry-After)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class BoundedRetry(Retry):
+    """Retry that waits at most max_retry_after seconds, whatever Retry-After asks for"""
+
+    def __init__(self, *args, max_retry_after: float = 10.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw) -> "BoundedRetry":
+        kw.setdefault("max_retry_after", self.max_retry_after)
+        return super().new(**kw)
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        # A tool thread holds an executor slot while it sleeps here
+        return min(retry_after, self.max_retry_after)
+
+
+class HostStats:
+    """Request count and latency for one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0.0,
+            "max_latency_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+class HTTPClient:
+    """
+    One requests.Session shared by every web tool. urllib3 keeps a
+    keep-alive pool per host, so repeated calls to googleapis.com,
+    nominatim or open-meteo skip DNS, TCP and TLS setup. Idempotent
+    requests are retried on connection errors and transient statuses with
+    exponential backoff (a server's Retry-After is honored up to
+    max_retry_after seconds), and every request gets connect/read timeouts.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 20,
+        pool_maxsize: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        max_retry_after: float = 10.0
+    ):
+        self._lock = threading.Lock()
+        self._host_stats: Dict[str, HostStats] = {}
+        self._closed_connections = 0
+        self._closed_requests = 0
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[HTTPAdapter] = None
+        self.configure(pool_connections, pool_maxsize, max_retries, backoff_factor, connect_timeout, read_timeout,
+                       max_retry_after)
+
+    def configure(
+        self,
+        pool_connections: int,
+        pool_maxsize: int,
+        max_retries: int,
+        backoff_factor: float,
+        connect_timeout: float,
+        read_timeout: float,
+        max_retry_after: float = 10.0
+    ):
+        """Apply pool, retry and timeout settings, replacing the current session"""
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        self.timeout = (connect_timeout, read_timeout)
+        with self._lock:
+            self._release_pools()
+            retry = BoundedRetry(
+                total=max_retries,
+                connect=max_retries,
+                read=max_retries,
+                status=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+                max_retry_after=max_retry_after
+            )
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+            session = requests.Session()
+            session.headers["User-Agent"] = DEFAULT_USER_AGENT
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+            self._adapter = adapter
+
+    @property
+    def session(self) -> requests.Session:
+        """The shared session, for callers that need it directly"""
+        return self._session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the shared pool. timeout defaults to the
+        configured (connect, read) pair; a single number overrides the read timeout.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        elif isinstance(timeout, (int, float)):
+            timeout = (self.timeout[0], timeout)
+        host = urlsplit(url).netloc or url
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self._session.request(method, url, timeout=timeout, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._host_stats.setdefault(host, HostStats()).record(elapsed, ok)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def _pool_counts(self) -> Tuple[int, int]:
+        """New connections opened and requests sent across the live pools"""
+        connections = self._closed_connections
+        requests_sent = self._closed_requests
+        if self._adapter is not None:
+            for key in list(self._adapter.poolmanager.pools.keys()):
+                pool = self._adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+        return connections, requests_sent
+
+    def _release_pools(self):
+        # Keep the counts of pools about to be dropped so stats stay cumulative
+        if self._session is None:
+            return
+        self._closed_connections, self._closed_requests = self._pool_counts()
+        self._session.close()
+
+    def close(self):
+        """Close every pooled connection; the session reconnects if used again"""
+        with self._lock:
+            self._release_pools()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection reuse and per-host latency"""
+        with self._lock:
+            connections, requests_sent = self._pool_counts()
+            reused = max(requests_sent - connections, 0)
+            return {
+                "requests": requests_sent,
+                "new_connections": connections,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / requests_sent, 3) if requests_sent else 0.0,
+                "pool_connections": self.pool_connections,
+                "pool_maxsize": self.pool_maxsize,
+                "max_retries": self.max_retries,
+                "hosts": {host: stats.to_dict() for host, stats in self._host_stats.items()},
+            }
+
+
+# Process-wide client used by all web tools
+http_client = HTTPClient()
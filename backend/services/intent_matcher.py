@@ -0,0 +1,144 @@
+"""
+Compiled keyword/phrase matching for intent routing
+"""
+import logging
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class IntentMatch:
+    """Intents found in one input, with the phrases that matched each"""
+
+    __slots__ = ("phrases",)
+
+    def __init__(self, phrases: Dict[str, FrozenSet[str]]):
+        self.phrases = phrases
+
+    @property
+    def intents(self) -> FrozenSet[str]:
+        return frozenset(self.phrases)
+
+    def __contains__(self, intent: str) -> bool:
+        return intent in self.phrases
+
+    def any(self, *intents: str) -> bool:
+        """True if any of the given intents matched"""
+        return any(intent in self.phrases for intent in intents)
+
+    def count(self, intent: str) -> int:
+        """Number of distinct phrases of an intent that matched"""
+        return len(self.phrases.get(intent, ()))
+
+    def __repr__(self) -> str:
+        return f"IntentMatch({sorted(self.phrases)})"
+
+
+class IntentMatcher:
+    """
+    Aho-Corasick automaton over named keyword/phrase sets. Every set is
+    compiled once; match() finds all intents in a single pass over the
+    lowercased input, so routing costs O(len(input)) however many phrases
+    there are.
+
+    Phrases match on word boundaries ("hi" does not match "this"); a
+    trailing "*" makes a phrase a prefix ("humid*" matches "humidity").
+    Phrases made of symbols such as "+" or "**" are literals and match anywhere. Results are
+    memoized per input so repeated routing of the same request is a lookup.
+    """
+
+    def __init__(self, intents: Dict[str, Iterable[str]], cache_size: int = 1024):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        # Per pattern: (phrase, length, check left boundary, check right boundary, intents)
+        self._patterns: List[Tuple[str, int, bool, bool, Tuple[str, ...]]] = []
+        self._cache = TTLCache(max_entries=cache_size, ttl=0, name="intents")
+        self._compile(intents)
+
+    def _compile(self, intents: Dict[str, Iterable[str]]):
+        owners: Dict[str, List[str]] = {}
+        for intent, phrases in intents.items():
+            for phrase in phrases:
+                phrase = phrase.lower().strip()
+                if phrase:
+                    owners.setdefault(phrase, [])
+                    if intent not in owners[phrase]:
+                        owners[phrase].append(intent)
+
+        for phrase, phrase_intents in owners.items():
+            # A "*" only means "prefix" after a word; symbol-only phrases are literal
+            prefix = phrase.endswith("*") and any(_is_word_char(ch) for ch in phrase[:-1])
+            text = phrase[:-1] if prefix else phrase
+            node = 0
+            for ch in text:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                node = next_node
+            self._outputs[node].append(len(self._patterns))
+            self._patterns.append((
+                phrase,
+                len(text),
+                _is_word_char(text[0]),
+                not prefix and _is_word_char(text[-1]),
+                tuple(phrase_intents),
+            ))
+
+        # Breadth-first failure links; each node inherits its fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fallback = self._fail[node]
+                    while fallback and ch not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def match(self, text: str) -> IntentMatch:
+        """All intents whose phrases occur in text"""
+        text = text.lower()
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        goto, fail, outputs, patterns = self._goto, self._fail, self._outputs, self._patterns
+        found: Dict[str, set] = {}
+        last = len(text) - 1
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in outputs[node]:
+                phrase, length, left, right, phrase_intents = patterns[index]
+                start = end - length + 1
+                if left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if right and end < last and _is_word_char(text[end + 1]):
+                    continue
+                for intent in phrase_intents:
+                    found.setdefault(intent, set()).add(phrase)
+
+        result = IntentMatch({intent: frozenset(phrases) for intent, phrases in found.items()})
+        self._cache.set(text, result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._cache.get_stats()
+        stats.update({"patterns": len(self._patterns), "states": len(self._goto)})
+        return stats
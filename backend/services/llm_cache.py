@@ -0,0 +1,124 @@
+"""
+Exact-match cache for chat completions
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from groq.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .cache import SQLiteCache, TieredCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Request options that don't change the completion itself
+_IGNORED_KEYS = ("stream", "stream_options", "timeout", "extra_headers")
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def completion_cache_key(kwargs: Dict[str, Any]) -> str:
+    """Canonical hash of model, messages, tool schemas, temperature and other options"""
+    payload = {key: value for key, value in kwargs.items() if key not in _IGNORED_KEYS}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_jsonable)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Caches completions by request hash in memory (LRU + TTL) and, when a path
+    is configured, in SQLite so hits survive restarts. Streamed completions
+    are stored as their final text and replayed as a single chunk.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600, sqlite_path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.cache = self._build(max_entries, ttl, sqlite_path)
+        self.stores = 0
+
+    @staticmethod
+    def _build(max_entries: int, ttl: float, sqlite_path: Optional[str]) -> TieredCache:
+        disk = None
+        if sqlite_path:
+            try:
+                disk = SQLiteCache(sqlite_path, ttl=ttl, table="llm_completions")
+            except Exception as e:
+                logger.warning(f"LLM cache SQLite tier disabled: {e}")
+        return TieredCache(TTLCache(max_entries=max_entries, ttl=ttl, name="llm"), disk)
+
+    def configure(self, max_entries: int, ttl: float, sqlite_path: Optional[str] = None, enabled: bool = True):
+        """Rebuild the cache with new settings"""
+        self.cache.close()
+        self.enabled = enabled
+        self.cache = self._build(max_entries, ttl, sqlite_path)
+
+    def lookup(self, kwargs: Dict[str, Any]) -> Optional[ChatCompletion]:
+        """Cached completion for an identical request, if any"""
+        if not self.enabled:
+            return None
+        data = self.cache.get(completion_cache_key(kwargs))
+        if data is None:
+            return None
+        try:
+            return ChatCompletion.model_validate(data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached completion: {e}")
+            return None
+
+    def store(self, kwargs: Dict[str, Any], response: Any):
+        """Cache a completion returned by the API"""
+        if not self.enabled or not hasattr(response, "model_dump"):
+            return
+        self.cache.set(completion_cache_key(kwargs), response.model_dump(mode="json", exclude_none=True))
+        self.stores += 1
+
+    def store_text(self, kwargs: Dict[str, Any], text: str):
+        """Cache the assembled text of a finished streamed completion"""
+        if not self.enabled:
+            return
+        self.cache.set(completion_cache_key(kwargs), {
+            "id": f"cached-{int(time.time())}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": kwargs.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": text},
+            }],
+        })
+        self.stores += 1
+
+    @staticmethod
+    def replay(completion: ChatCompletion) -> Iterator[ChatCompletionChunk]:
+        """Turn a cached completion into stream chunks"""
+        choice = completion.choices[0]
+        yield ChatCompletionChunk.model_validate({
+            "id": completion.id,
+            "object": "chat.completion.chunk",
+            "created": completion.created,
+            "model": completion.model,
+            "choices": [{
+                "index": 0,
+                "finish_reason": choice.finish_reason,
+                "delta": {"role": "assistant", "content": choice.message.content or ""},
+            }],
+        })
+
+    def close(self):
+        self.cache.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.cache.get_stats()
+        stats.update({"enabled": self.enabled, "stores": self.stores})
+        return stats
+
+
+# Process-wide completion cache used by the LLM gateway
+completion_cache = CompletionCache()
@@ -0,0 +1,172 @@
+"""
+Process-wide AsyncGroq clients sharing a tuned keep-alive connection pool
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from groq import AsyncGroq
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Counts requests and new connections via the httpcore trace extension"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.http_versions: Dict[str, int] = {}
+
+    def trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+            with self._lock:
+                self.requests += 1
+        elif event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def atrace(self, event_name: str, info: Dict[str, Any]):
+        self.trace(event_name, info)
+
+    def on_response(self, response: httpx.Response):
+        with self._lock:
+            version = response.http_version
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    async def on_async_request(self, request: httpx.Request):
+        request.extensions["trace"] = self.atrace
+
+    async def on_async_response(self, response: httpx.Response):
+        self.on_response(response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+class LLMClientProvider:
+    """
+    Hands out one AsyncGroq client per API key, all backed by a shared
+    httpx connection pool, so gateway calls reuse warm keep-alive
+    connections instead of opening their own.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        http2: bool = True
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.stats = ConnectionStats()
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._async_clients: Dict[str, AsyncGroq] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: float,
+        http2: bool = True
+    ):
+        """Apply pool settings; an already created pool keeps its settings until aclose()"""
+        with self._lock:
+            self.max_connections = max_connections
+            self.max_keepalive_connections = max_keepalive_connections
+            self.keepalive_expiry = keepalive_expiry
+            self.timeout = timeout
+            self.http2 = http2 and HTTP2_AVAILABLE
+            if self._async_http_client is not None:
+                logger.warning("LLM connection pool already in use; new pool settings apply once it is closed")
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def get_async_client(self, api_key: str, max_retries: int = 2) -> AsyncGroq:
+        """
+        Return the shared AsyncGroq client for an API key. The async pool is
+        bound to the event loop it is first used on, so call this from one loop.
+        """
+        client = self._async_clients.get(api_key)
+        if client is None:
+            with self._lock:
+                client = self._async_clients.get(api_key)
+                if client is None:
+                    if self._async_http_client is None:
+                        self._async_http_client = httpx.AsyncClient(
+                            limits=self._limits(),
+                            timeout=self.timeout,
+                            http2=self.http2,
+                            event_hooks={
+                                "request": [self.stats.on_async_request],
+                                "response": [self.stats.on_async_response],
+                            }
+                        )
+                        logger.info(
+                            f"Created shared LLM connection pool "
+                            f"(max {self.max_connections}, keep-alive {self.max_keepalive_connections}, "
+                            f"http2={self.http2})"
+                        )
+                    client = AsyncGroq(
+                        api_key=api_key,
+                        http_client=self._async_http_client,
+                        max_retries=max_retries
+                    )
+                    self._async_clients[api_key] = client
+        return client
+
+    async def aclose(self):
+        """Close the shared async connection pool"""
+        self._async_clients.clear()
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection pool settings and reuse metrics"""
+        stats = self.stats.get_stats()
+        stats.update({
+            "clients": len(self._async_clients),
+            "http2_enabled": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+        })
+        return stats
+
+
+# Process-wide provider backing the LLM gateway
+llm_clients = LLMClientProvider()
+
@@ -0,0 +1,456 @@
+"""
+Async LLM gateway with concurrency limits, rate limiting and 429 backoff
+"""
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import groq
+
+from .chat_result import record_llm_call
+from .history_manager import estimate_tokens
+from .llm_cache import CompletionCache, completion_cache
+from .llm_client import LLMClientProvider, llm_clients
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying after a pause; everything else goes straight to the caller
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # asyncio.Lock wakes waiters in FIFO order, so callers are served fairly
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until amount tokens are available and take them; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - started
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def credit(self, amount: float):
+        """Return (or, if negative, charge) tokens after the real cost is known"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def block(self, seconds: float):
+        """Hold all callers back, e.g. after the server answered 429"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def available(self) -> int:
+        self._refill(time.monotonic())
+        return int(self.tokens)
+
+
+class ModelLimiter:
+    """Concurrency and rate limits plus metrics for one model"""
+
+    def __init__(self, model: str, concurrency: int, rpm: int, tpm: int):
+        self.model = model
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+        self.waiting = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def block(self, seconds: float):
+        self.requests_bucket.block(seconds)
+        self.tokens_bucket.block(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "errors": self.errors,
+            "avg_wait_ms": round(self.total_wait / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "rpm_available": self.requests_bucket.available(),
+            "tpm_available": self.tokens_bucket.available(),
+        }
+
+
+class LLMGateway:
+    """
+    Routes every chat completion through AsyncGroq on a dedicated event loop.
+    Calls pass a global semaphore, a per-model semaphore and per-model
+    requests/tokens-per-minute buckets, and are retried with backoff on 429.
+    A Retry-After longer than max_retry_after fails the call instead of
+    stalling every caller of the model. Synchronous agents use it through
+    complete() and stream(), which answer identical requests from the
+    completion cache without a network call and give up after request_timeout.
+    """
+
+    def __init__(
+        self,
+        provider: LLMClientProvider = llm_clients,
+        max_concurrency: int = 16,
+        model_concurrency: int = 8,
+        default_rpm: int = 30,
+        default_tpm: int = 6000,
+        model_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        max_retries: int = 4,
+        max_retry_after: float = 30.0,
+        request_timeout: float = 120.0,
+        default_max_tokens: int = 1024,
+        cache: Optional[CompletionCache] = completion_cache
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.request_timeout = request_timeout
+        self.default_max_tokens = default_max_tokens
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        max_concurrency: int,
+        model_concurrency: int,
+        default_rpm: int,
+        default_tpm: int,
+        model_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        max_retries: int = 4,
+        max_retry_after: float = 30.0,
+        request_timeout: float = 120.0
+    ):
+        """Apply limits; takes effect for models first used afterwards"""
+        with self._lock:
+            self.max_concurrency = max_concurrency
+            self.model_concurrency = model_concurrency
+            self.default_rpm = default_rpm
+            self.default_tpm = default_tpm
+            self.model_limits = model_limits or {}
+            self.max_retries = max_retries
+            self.max_retry_after = max_retry_after
+            self.request_timeout = request_timeout
+            if self._semaphore is not None:
+                self._semaphore = asyncio.Semaphore(max_concurrency)
+            self._limiters.clear()
+
+    # Event loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+                    thread.start()
+                    self._thread = thread
+                    self._loop = loop
+        return self._loop
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            rpm, tpm = self.model_limits.get(model, (self.default_rpm, self.default_tpm))
+            limiter = ModelLimiter(model, self.model_concurrency, rpm, tpm)
+            self._limiters[model] = limiter
+        return limiter
+
+    def _estimate_cost(self, kwargs: Dict[str, Any]) -> int:
+        prompt = 0
+        for message in kwargs.get("messages", []):
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+            prompt += estimate_tokens(str(content or ""))
+        return prompt + (kwargs.get("max_tokens") or self.default_max_tokens)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = self._retry_after(error)
+        delay = retry_after if retry_after is not None else min(2 ** attempt, 30)
+        return delay + random.uniform(0, 0.5)
+
+    @staticmethod
+    def _settle(limiter: ModelLimiter, cost: int, usage: Any):
+        """Give back the part of the estimated cost the call did not use"""
+        if usage is not None and getattr(usage, "total_tokens", None):
+            limiter.tokens_bucket.credit(cost - usage.total_tokens)
+
+    # Async API (runs on the gateway loop)
+
+    async def _admit(self, limiter: ModelLimiter, cost: int):
+        """Wait for both rate buckets, recording how long the call queued"""
+        limiter.waiting += 1
+        started = time.monotonic()
+        try:
+            await limiter.requests_bucket.acquire(1)
+            await limiter.tokens_bucket.acquire(cost)
+        finally:
+            limiter.waiting -= 1
+        waited = time.monotonic() - started
+        limiter.total_wait += waited
+        limiter.max_wait = max(limiter.max_wait, waited)
+
+    @asynccontextmanager
+    async def _slot(self, limiter: ModelLimiter):
+        """Hold the global and per-model concurrency slots"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore, limiter.semaphore:
+            limiter.in_flight += 1
+            limiter.requests += 1
+            try:
+                yield
+            finally:
+                limiter.in_flight -= 1
+
+    def _retry_delay(self, limiter: ModelLimiter, attempt: int, error: Exception) -> float:
+        """Account for a retryable error and return how long to wait, or re-raise when out of retries"""
+        rate_limited = isinstance(error, groq.RateLimitError)
+        if rate_limited:
+            limiter.rate_limited += 1
+        if attempt >= self.max_retries:
+            limiter.errors += 1
+            raise error
+        retry_after = self._retry_after(error)
+        if retry_after is not None and retry_after > self.max_retry_after:
+            # Blocking the model's buckets that long would stall every agent worker
+            limiter.errors += 1
+            logger.warning(
+                f"LLM call to {limiter.model} asked to wait {retry_after:.0f}s, "
+                f"more than the {self.max_retry_after:.0f}s allowed; giving up"
+            )
+            raise error
+        delay = self._backoff(attempt, error)
+        if rate_limited:
+            # Everyone waiting on this model backs off, not just this call
+            limiter.block(delay)
+        limiter.retries += 1
+        logger.warning(f"LLM call to {limiter.model} failed ({type(error).__name__}), retrying in {delay:.1f}s")
+        return delay
+
+    async def acomplete(self, api_key: str, **kwargs) -> Any:
+        """Chat completion through the gateway"""
+        kwargs.pop("stream", None)
+        limiter = self._limiter(kwargs.get("model", ""))
+        client = self.provider.get_async_client(api_key, max_retries=0)
+        cost = self._estimate_cost(kwargs)
+        attempt = 0
+        while True:
+            await self._admit(limiter, cost)
+            async with self._slot(limiter):
+                try:
+                    response = await client.chat.completions.create(**kwargs)
+                except RETRYABLE_ERRORS as e:
+                    delay = self._retry_delay(limiter, attempt, e)
+                except Exception:
+                    limiter.errors += 1
+                    raise
+                else:
+                    self._settle(limiter, cost, getattr(response, "usage", None))
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def astream(self, api_key: str, **kwargs) -> AsyncIterator[Any]:
+        """Streaming chat completion through the gateway, yielding raw chunks"""
+        kwargs["stream"] = True
+        limiter = self._limiter(kwargs.get("model", ""))
+        client = self.provider.get_async_client(api_key, max_retries=0)
+        cost = self._estimate_cost(kwargs)
+        attempt = 0
+        while True:
+            await self._admit(limiter, cost)
+            async with self._slot(limiter):
+                try:
+                    stream = await client.chat.completions.create(**kwargs)
+                except RETRYABLE_ERRORS as e:
+                    delay = self._retry_delay(limiter, attempt, e)
+                except Exception:
+                    limiter.errors += 1
+                    raise
+                else:
+                    usage = None
+                    try:
+                        async for chunk in stream:
+                            # Groq reports usage on the final chunk
+                            x_groq = getattr(chunk, "x_groq", None)
+                            usage = getattr(chunk, "usage", None) or getattr(x_groq, "usage", None) or usage
+                            yield chunk
+                    finally:
+                        await stream.close()
+                    self._settle(limiter, cost, usage)
+                    return
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    # Sync bridge for agents running on worker threads
+
+    def complete(self, api_key: str, **kwargs) -> Any:
+        """Blocking chat completion through the gateway, served from cache when possible"""
+        cached = self.cache.lookup(kwargs) if self.cache else None
+        if cached is not None:
+            record_llm_call(cached=True)
+            return cached
+        future = asyncio.run_coroutine_threadsafe(self.acomplete(api_key, **kwargs), self._ensure_loop())
+        try:
+            response = future.result(timeout=self.request_timeout)
+        except concurrent.futures.TimeoutError:
+            # Cancelling releases the call's slots and stops its backoff
+            future.cancel()
+            raise TimeoutError(f"LLM call did not finish within {self.request_timeout:.0f}s")
+        record_llm_call(getattr(response, "usage", None))
+        if self.cache:
+            self.cache.store(kwargs, response)
+        return response
+
+    def stream(self, api_key: str, **kwargs) -> Iterator[Any]:
+        """Blocking iterator over streamed chunks through the gateway, served from cache when possible"""
+        cached = self.cache.lookup(kwargs) if self.cache else None
+        if cached is not None:
+            record_llm_call(cached=True)
+            yield from self.cache.replay(cached)
+            return
+
+        loop = self._ensure_loop()
+        items: "queue.Queue" = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(api_key, **kwargs):
+                    items.put(chunk)
+            except BaseException as e:
+                items.put(e)
+                raise
+            finally:
+                items.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        parts = []
+        cacheable = True
+        usage = None
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=self.request_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"LLM stream stalled for {self.request_timeout:.0f}s")
+                if item is finished:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                delta = item.choices[0].delta if item.choices else None
+                if delta is not None:
+                    if delta.content:
+                        parts.append(delta.content)
+                    if getattr(delta, "tool_calls", None):
+                        cacheable = False
+                # Groq reports usage on the final chunk
+                x_groq = getattr(item, "x_groq", None)
+                usage = getattr(item, "usage", None) or getattr(x_groq, "usage", None) or usage
+                yield item
+            record_llm_call(usage)
+            # Only completed text streams are cached
+            if self.cache and cacheable:
+                self.cache.store_text(kwargs, "".join(parts))
+        finally:
+            # Stop the stream and release its slots if the consumer went away
+            if not future.done():
+                future.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model limiter metrics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "models": {model: limiter.get_stats() for model, limiter in list(self._limiters.items())},
+        }
+
+    def close(self):
+        """Close the async connection pool and stop the gateway loop"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.provider.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing LLM gateway connections: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+        self._semaphore = None
+        self._limiters.clear()
+
+
+class GatewayClient:
+    """
+    Client exposing chat.completions.create like the Groq SDK, with every call
+    routed through the gateway. Agents and the history manager use it as-is.
+    """
+
+    def __init__(self, gateway: "LLMGateway", api_key: str):
+        self.gateway = gateway
+        self.api_key = api_key
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self.gateway.stream(self.api_key, **kwargs)
+        return self.gateway.complete(self.api_key, **kwargs)
+
+
+# Process-wide gateway used by all agents
+llm_gateway = LLMGateway()
+
+
+def get_llm_client(api_key: str) -> GatewayClient:
+    """Groq-compatible client for an API key backed by the shared gateway"""
+    return GatewayClient(llm_gateway, api_key)
@@ -0,0 +1,443 @@
+"""
+Streaming, size-bounded text extraction from web pages
+"""
+import codecs
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .cache import TTLCache
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# Subtrees whose text is never part of the page content
+SKIP_TAGS = frozenset({"script", "style", "nav", "noscript", "template", "svg"})
+
+# Elements that start a new block of text
+BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "main", "header", "footer", "aside", "form",
+    "pre", "blockquote", "ul", "ol", "li", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "figure", "figcaption", "br", "hr", "body",
+})
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+# Elements that hold page chrome rather than the article
+BOILERPLATE_TAGS = frozenset({"header", "footer", "aside", "form", "menu", "dialog", "button", "select"})
+
+# Elements that mark the article itself
+CONTENT_TAGS = frozenset({"article", "main"})
+
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+})
+
+# Tags closed implicitly by a sibling of the same kind (<p>a<p>b, <li>a<li>b)
+_IMPLICIT_CLOSE = frozenset({"p", "li", "dt", "dd", "tr", "td", "th", "option"})
+
+# class/id hints, as used by readability-style extractors
+NEGATIVE_HINT = re.compile(
+    r"comment|sidebar|footer|header|menu|nav|share|social|sponsor|promo|advert|\bads?\b|"
+    r"related|cookie|subscribe|newsletter|breadcrumb|popup|modal|banner|masthead|widget|skip",
+    re.IGNORECASE,
+)
+POSITIVE_HINT = re.compile(r"article|content|main|post|entry|story|body|text|blog", re.IGNORECASE)
+
+# Blocks shorter than this (headings aside) are usually labels and buttons
+MIN_BLOCK_CHARS = 30
+# Blocks where more than this share of the text is link text are navigation
+MAX_LINK_DENSITY = 0.5
+# Below this much main content the page is treated as having no article
+MIN_MAIN_CHARS = 250
+# How far past the budget to read looking for an <article>/<main> before giving up
+LOOKAHEAD_FACTOR = 3
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class TextCollector(HTMLParser):
+    """
+    Incremental HTML tokenizer that keeps visible text, skipping SKIP_TAGS
+    subtrees, with whitespace collapsed. Text is collected until the
+    budget is exceeded; after that `full` is set and further input is
+    ignored, so callers can stop reading.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0
+        self.full = False
+        self._skip_depth = 0
+        self._pending_space = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.full:
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if text.startswith(" "):
+            self._pending_space = True
+            text = text[1:]
+        if not text:
+            return
+        if self._pending_space and self.length:
+            self.parts.append(" ")
+            self.length += 1
+        self._pending_space = text.endswith(" ")
+        text = text.rstrip(" ")
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length > self.max_chars:
+            self.full = True
+
+    def feed(self, data: str):
+        if not self.full:
+            super().feed(data)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class MainContentCollector(HTMLParser):
+    """
+    Readability-style main-content extraction that works on a stream.
+    Text is grouped into blocks at block-level tags; a block is kept when
+    it is outside page chrome (header/footer/aside/form and elements whose
+    class or id looks like navigation, ads, comments and so on), its link
+    density is low and it is long enough to be prose. Blocks inside
+    <article>/<main> are collected separately and preferred when the page
+    has them. Reading can stop once the article budget is met.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        # (tag, boilerplate, content) per open element
+        self._stack: List[Tuple[str, bool, bool]] = []
+        self._skip_depth = 0
+        self._link_depth = 0
+        self._block: List[str] = []
+        self._block_links = 0
+        self._block_tag = ""
+        self.blocks: List[str] = []
+        self.main_blocks: List[str] = []
+        self.length = 0
+        self.main_length = 0
+
+    @property
+    def done(self) -> bool:
+        """Enough article text has been seen to stop reading"""
+        return self.main_length > self.max_chars or (
+            not self.main_length and self.length > self.max_chars * LOOKAHEAD_FACTOR
+        )
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == "a":
+            self._link_depth += 1
+        if tag in BLOCK_TAGS:
+            self._flush(tag)
+        if tag in VOID_TAGS:
+            return
+        if tag in _IMPLICIT_CLOSE and self._stack and self._stack[-1][0] == tag:
+            self._stack.pop()
+        attributes = dict(attrs)
+        hint = f"{attributes.get('class') or ''} {attributes.get('id') or ''}"
+        boilerplate = tag in BOILERPLATE_TAGS or bool(NEGATIVE_HINT.search(hint) and not POSITIVE_HINT.search(hint))
+        content = tag in CONTENT_TAGS or attributes.get("role") == "main"
+        self._stack.append((tag, boilerplate, content))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+            return
+        if tag == "a" and self._link_depth:
+            self._link_depth -= 1
+        if tag in BLOCK_TAGS:
+            self._flush(tag)
+        # Pop back to the matching element, tolerating unclosed children
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._block.append(data)
+        if self._link_depth:
+            self._block_links += len(data.strip())
+
+    def _flush(self, next_tag: str):
+        text = _WHITESPACE.sub(" ", "".join(self._block)).strip()
+        links = self._block_links
+        tag = self._block_tag or (self._stack[-1][0] if self._stack else "")
+        self._block = []
+        self._block_links = 0
+        self._block_tag = next_tag
+        if not text:
+            return
+        if any(boilerplate for _, boilerplate, _ in self._stack):
+            return
+        if links / len(text) > MAX_LINK_DENSITY:
+            return
+        if len(text) < MIN_BLOCK_CHARS and tag not in HEADING_TAGS:
+            return
+        if any(content for _, _, content in self._stack):
+            self.main_blocks.append(text)
+            self.main_length += len(text) + 1
+        self.blocks.append(text)
+        self.length += len(text) + 1
+
+    def flush(self):
+        """
+        Keep the block being read when input stops early. Unlike close(),
+        the unparsed tail (often half a tag) is not turned into text.
+        """
+        self._flush("")
+
+    def close(self):
+        super().close()
+        self._flush("")
+
+    @property
+    def text(self) -> str:
+        """Article blocks when the page marks its article, otherwise every kept block"""
+        blocks = self.main_blocks if self.main_length >= MIN_MAIN_CHARS else self.blocks
+        return "\n".join(blocks)
+
+
+class PageText:
+    """Text extracted from one page and what it cost to get it"""
+
+    def __init__(self, url: str, text: str, truncated: bool, bytes_read: int,
+                 content_length: Optional[int], parse_seconds: float,
+                 main_content: bool = False, cached: bool = False):
+        self.url = url
+        self.text = text
+        self.truncated = truncated
+        self.bytes_read = bytes_read
+        self.content_length = content_length
+        self.parse_seconds = parse_seconds
+        self.main_content = main_content
+        self.cached = cached
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes of the response never downloaded (0 when the size wasn't announced)"""
+        if self.content_length is None:
+            return 0
+        return max(self.content_length - self.bytes_read, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "host": urlsplit(self.url).netloc,
+            "bytes_read": self.bytes_read,
+            "bytes_saved": self.bytes_saved,
+            "parse_ms": round(self.parse_seconds * 1000, 2),
+            "truncated": self.truncated,
+            "main_content": self.main_content,
+            "cached": self.cached,
+        }
+
+
+class PageTextFetcher:
+    """
+    Streams a page through the shared HTTP pool and stops reading as soon
+    as enough text has been collected (or max_bytes downloaded), instead of
+    downloading the whole page and building a full parse tree for text that
+    would be thrown away. With main_content on, the budget goes to the
+    article body rather than navigation and other chrome; pages without a
+    recognizable article fall back to all visible text.
+
+    Extracted text is cached per URL, content-addressed so identical pages
+    share one copy, together with the server's ETag/Last-Modified. A repeat
+    fetch is a single conditional request, and a 304 is answered from the
+    cache.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 3000,
+        chunk_size: int = 16384,
+        max_bytes: int = 5 * 1024 * 1024,
+        main_content: bool = True,
+        cache_entries: int = 500,
+        history: int = 20
+    ):
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=history)
+        self.fetches = 0
+        self.truncated = 0
+        self.bytes_read = 0
+        self.bytes_saved = 0
+        self.parse_seconds = 0.0
+        self.main_content_pages = 0
+        self.not_modified = 0
+        self.configure(max_chars, chunk_size, max_bytes, main_content, cache_entries)
+
+    def configure(self, max_chars: int, chunk_size: int, max_bytes: int,
+                  main_content: bool = True, cache_entries: int = 500):
+        self.max_chars = max_chars
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.main_content = main_content
+        # URL -> validators and digest; digest -> extracted text
+        self._validators = TTLCache(max_entries=cache_entries, ttl=0, name="page_validators")
+        self._contents = TTLCache(max_entries=cache_entries, ttl=0, name="page_contents")
+
+    @staticmethod
+    def _encoding(response, first_chunk: bytes) -> str:
+        # Header charset first, then a <meta charset> near the top, then UTF-8
+        if "charset" in response.headers.get("Content-Type", "").lower() and response.encoding:
+            return response.encoding
+        match = _META_CHARSET.search(first_chunk[:4096])
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode("ascii")).name
+            except LookupError:
+                pass
+        return "utf-8"
+
+    def _cached(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        validators = self._validators.get(url)
+        if validators is None:
+            return None, None
+        return validators, self._contents.get(validators["digest"])
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 15) -> PageText:
+        """Download and extract up to max_chars of page text from url"""
+        validators, cached = self._cached(url)
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if validators.get("etag"):
+                request_headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                request_headers["If-Modified-Since"] = validators["last_modified"]
+
+        text_collector = TextCollector(self.max_chars)
+        main_collector = MainContentCollector(self.max_chars) if self.main_content else None
+        parse_seconds = 0.0
+        downloaded = 0
+        response = http_client.get(url, headers=request_headers, timeout=timeout, stream=True)
+        try:
+            if response.status_code == 304 and cached is not None:
+                page = PageText(url, cached["text"], cached["truncated"], 0, None, 0.0,
+                                cached["main_content"], cached=True)
+                self._record(page)
+                return page
+            response.raise_for_status()
+            decoder = None
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if not chunk:
+                    continue
+                downloaded += len(chunk)
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(self._encoding(response, chunk))(errors="replace")
+                started = time.perf_counter()
+                data = decoder.decode(chunk)
+                text_collector.feed(data)
+                if main_collector is not None:
+                    main_collector.feed(data)
+                parse_seconds += time.perf_counter() - started
+                done = main_collector.done if main_collector is not None else text_collector.full
+                if done or downloaded >= self.max_bytes:
+                    # The unread rest would leave the last block pending
+                    if main_collector is not None:
+                        main_collector.flush()
+                    break
+            else:
+                started = time.perf_counter()
+                tail = decoder.decode(b"", final=True) if decoder is not None else ""
+                for collector in (text_collector, main_collector):
+                    if collector is not None:
+                        collector.feed(tail)
+                        collector.close()
+                parse_seconds += time.perf_counter() - started
+            # Bytes off the wire (before decompression) when urllib3 can tell us
+            wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else downloaded
+            content_length = response.headers.get("Content-Length")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        finally:
+            response.close()
+
+        text = text_collector.text
+        truncated = text_collector.full or downloaded >= self.max_bytes
+        main_content = False
+        if main_collector is not None:
+            main_text = main_collector.text
+            if main_text and (len(main_text) >= MIN_MAIN_CHARS or len(main_text) >= len(text)):
+                text = main_text
+                truncated = main_collector.done or downloaded >= self.max_bytes or len(text) > self.max_chars
+                main_content = True
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars]
+        page = PageText(
+            url, text, truncated, wire_bytes or downloaded,
+            int(content_length) if content_length and content_length.isdigit() else None,
+            parse_seconds, main_content
+        )
+        if etag or last_modified:
+            self._store(url, page, etag, last_modified)
+        self._record(page)
+        return page
+
+    def _store(self, url: str, page: PageText, etag: Optional[str], last_modified: Optional[str]):
+        digest = hashlib.sha256(page.text.encode("utf-8")).hexdigest()
+        self._contents.set(digest, {"text": page.text, "truncated": page.truncated, "main_content": page.main_content})
+        self._validators.set(url, {"etag": etag, "last_modified": last_modified, "digest": digest})
+
+    def _record(self, page: PageText):
+        with self._lock:
+            self.fetches += 1
+            self.truncated += int(page.truncated)
+            self.main_content_pages += int(page.main_content)
+            self.not_modified += int(page.cached)
+            self.bytes_read += page.bytes_read
+            self.bytes_saved += page.bytes_saved
+            self.parse_seconds += page.parse_seconds
+            self._recent.append(page.to_dict())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "truncated": self.truncated,
+                "main_content_pages": self.main_content_pages,
+                "not_modified": self.not_modified,
+                "bytes_read": self.bytes_read,
+                "bytes_saved": self.bytes_saved,
+                "avg_parse_ms": round(self.parse_seconds / self.fetches * 1000, 2) if self.fetches else 0.0,
+                "cached_pages": len(self._validators),
+                "recent": list(self._recent),
+            }
+
+
+# Process-wide fetcher used by the web content tool
+page_fetcher = PageTextFetcher()
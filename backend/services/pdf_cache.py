@@ -0,0 +1,324 @@
+"""
+Persistent, content-addressed cache of downloaded paper PDFs and their extracted text
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# New-style (2401.01234v2) and old-style (hep-th/9901001v1) arXiv identifiers in abs/pdf URLs
+_ARXIV_URL = re.compile(
+    r"arxiv\.org/(?:pdf|abs)/((?:\d{4}\.\d{4,5})|(?:[a-z][a-z.-]*/\d{7}))(v\d+)?(?:\.pdf)?/?$",
+    re.IGNORECASE,
+)
+
+
+def cache_key(url: str) -> str:
+    """arXiv ID and version for arXiv links, a URL hash for anything else"""
+    match = _ARXIV_URL.search(url.strip())
+    if match:
+        return f"arxiv:{match.group(1).lower()}{match.group(2) or ''}"
+    return "url:" + hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+def is_versioned(key: str) -> bool:
+    """A versioned arXiv paper never changes; other keys may point at new content"""
+    return key.startswith("arxiv:") and re.search(r"v\d+$", key) is not None
+
+
+class PDFCache:
+    """
+    Keeps downloaded PDFs and their per-page text on disk so a paper that
+    was read for one research run isn't downloaded and parsed again for the
+    next. Entries are keyed by arXiv ID and version (or a hash of the URL),
+    and point at content-addressed files named by their SHA-256, which is
+    checked on every read; a file that doesn't match is dropped and treated
+    as a miss. Versioned arXiv papers are kept until evicted, other entries
+    for unversioned_ttl seconds. Least recently used entries are evicted
+    once the files exceed max_bytes.
+
+    Text extracted under a character budget is kept with the number of
+    characters it covers and only served to readers that want no more.
+
+    Summaries written about a paper (such as per-section analyses) can be
+    kept alongside it and go when the paper is evicted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 500 * 1024 * 1024,
+                 unversioned_ttl: float = 86400):
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.directory: Optional[str] = None
+        self.pdf_hits = 0
+        self.text_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.corrupt = 0
+        self.summary_hits = 0
+        self.configure(directory, max_bytes, unversioned_ttl)
+
+    def configure(self, directory: Optional[str], max_bytes: int = 500 * 1024 * 1024, unversioned_ttl: float = 86400):
+        """Open the cache in directory; None disables it"""
+        self.close()
+        self.max_bytes = max_bytes
+        self.unversioned_ttl = unversioned_ttl
+        self.directory = directory
+        if not directory:
+            return
+        try:
+            os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+            conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, "
+                "pdf_sha256 TEXT, pdf_size INTEGER NOT NULL DEFAULT 0, "
+                "text_sha256 TEXT, text_size INTEGER NOT NULL DEFAULT 0, "
+                "stored_at REAL NOT NULL, used_at REAL NOT NULL, text_chars INTEGER)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(papers)")]
+            if "text_chars" not in columns:
+                conn.execute("ALTER TABLE papers ADD COLUMN text_chars INTEGER")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT NOT NULL, name TEXT NOT NULL, summary TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "PRIMARY KEY (key, name))"
+            )
+            conn.commit()
+            self._conn = conn
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"PDF cache disabled ({directory}): {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def _path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest + suffix)
+
+    def _row(self, key: str) -> Optional[Dict[str, Any]]:
+        """Index row for key, or None when missing or expired; caller holds the lock"""
+        cursor = self._conn.execute("SELECT * FROM papers WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        row = dict(zip([column[0] for column in cursor.description], row))
+        if not is_versioned(key) and self.unversioned_ttl and time.time() - row["stored_at"] > self.unversioned_ttl:
+            return None
+        return row
+
+    @staticmethod
+    def _covers(text_chars: Optional[int], max_chars: int) -> bool:
+        """Whether stored text of text_chars characters (None: the whole paper) serves a max_chars read"""
+        return text_chars is None or (max_chars > 0 and text_chars >= max_chars)
+
+    def _read(self, key: str, column: str, suffix: str, max_chars: int = 0) -> Optional[bytes]:
+        """Verified contents of one of an entry's files"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._row(key)
+            digest = row and row[column + "_sha256"]
+            if not digest or (column == "text" and not self._covers(row["text_chars"], max_chars)):
+                self.misses += 1
+                return None
+            path = self._path(digest, suffix)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is None or hashlib.sha256(data).hexdigest() != digest:
+                self.corrupt += 1
+                logger.warning(f"PDF cache entry {key} failed its integrity check; dropping it")
+                self._conn.execute(
+                    f"UPDATE papers SET {column}_sha256 = NULL, {column}_size = 0 WHERE key = ?", (key,)
+                )
+                self._conn.commit()
+                self._unlink_unreferenced(digest, column, suffix)
+                return None
+            self._conn.execute("UPDATE papers SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return data
+
+    def get_pdf(self, url: str) -> Optional[bytes]:
+        """Cached PDF bytes for url"""
+        data = self._read(cache_key(url), "pdf", ".pdf")
+        if data is not None:
+            self.pdf_hits += 1
+        return data
+
+    def get_pages(self, url: str, max_chars: int = 0) -> Optional[List[str]]:
+        """
+        Cached extracted text for url, one string per page: the whole paper,
+        or text covering at least max_chars characters when that is given.
+        """
+        data = self._read(cache_key(url), "text", ".json", max_chars)
+        if data is None:
+            return None
+        self.text_hits += 1
+        return json.loads(data.decode("utf-8"))
+
+    def _write(self, url: str, column: str, suffix: str, data: bytes, text_chars: Optional[int] = None):
+        if not self.enabled:
+            return
+        key = cache_key(url)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, suffix)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp, "wb") as f:
+                    f.write(data)
+                os.replace(temp, path)
+            now = time.time()
+            with self._lock:
+                row = self._row(key)
+                expired = None
+                if row is None:
+                    # New or expired: start a fresh entry, dropping an expired one's files
+                    expired = self._conn.execute(
+                        "SELECT pdf_sha256, text_sha256 FROM papers WHERE key = ?", (key,)
+                    ).fetchone()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO papers (key, url, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                        (key, url, now, now)
+                    )
+                    self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                elif column == "text" and row["text_sha256"] and self._covers(row["text_chars"], text_chars or 0):
+                    # Already holds at least as much of the paper
+                    self._unlink_unreferenced(digest, column, suffix)
+                    return
+                self._conn.execute(
+                    f"UPDATE papers SET {column}_sha256 = ?, {column}_size = ?, used_at = ? WHERE key = ?",
+                    (digest, len(data), now, key)
+                )
+                if column == "text":
+                    self._conn.execute("UPDATE papers SET text_chars = ? WHERE key = ?", (text_chars, key))
+                self._conn.commit()
+                if row is not None and row[column + "_sha256"] != digest:
+                    # Replaced, e.g. partial text by a longer extraction
+                    self._unlink_unreferenced(row[column + "_sha256"], column, suffix)
+                if expired:
+                    # Only now, in case the fresh entry reuses one of them
+                    self._unlink_unreferenced(expired[0], "pdf", ".pdf")
+                    self._unlink_unreferenced(expired[1], "text", ".json")
+                self.stores += 1
+                self._evict()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"PDF cache write failed for {url}: {e}")
+
+    def put_pdf(self, url: str, content: bytes):
+        """Store a downloaded PDF; anything that isn't a PDF is ignored"""
+        if content.startswith(b"%PDF-"):
+            self._write(url, "pdf", ".pdf", content)
+
+    def put_pages(self, url: str, pages: List[str], complete: bool = True):
+        """
+        Store the text extracted from url's PDF, one string per page;
+        complete is False when a character budget stopped extraction early.
+        """
+        text_chars = None if complete else sum(len(page) + 1 for page in pages)
+        self._write(url, "text", ".json", json.dumps(pages).encode("utf-8"), text_chars)
+
+    def get_summary(self, url: str, name: str) -> Optional[str]:
+        """A summary stored for url's paper under name"""
+        if not self.enabled:
+            return None
+        key = cache_key(url)
+        with self._lock:
+            if self._row(key) is None:
+                return None
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE key = ? AND name = ?", (key, name)
+            ).fetchone()
+            if row is None:
+                return None
+            self.summary_hits += 1
+            return row[0]
+
+    def put_summary(self, url: str, name: str, summary: str):
+        """Keep a summary with url's paper; ignored unless the paper itself is cached"""
+        if not self.enabled:
+            return
+        key = cache_key(url)
+        try:
+            with self._lock:
+                if self._row(key) is None:
+                    return
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, name, summary, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, name, summary, time.time())
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"PDF cache summary write failed for {url}: {e}")
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes; caller holds the lock"""
+        total = self._conn.execute("SELECT COALESCE(SUM(pdf_size + text_size), 0) FROM papers").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, pdf_sha256, pdf_size, text_sha256, text_size FROM papers ORDER BY used_at"
+        ).fetchall()
+        for key, pdf_digest, pdf_size, text_digest, text_size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM papers WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            self._unlink_unreferenced(pdf_digest, "pdf", ".pdf")
+            self._unlink_unreferenced(text_digest, "text", ".json")
+            total -= pdf_size + text_size
+            self.evictions += 1
+        self._conn.commit()
+
+    def _unlink_unreferenced(self, digest: Optional[str], column: str, suffix: str):
+        """Delete a content file no entry points at any more; caller holds the lock"""
+        if not digest:
+            return
+        if self._conn.execute(f"SELECT 1 FROM papers WHERE {column}_sha256 = ? LIMIT 1", (digest,)).fetchone():
+            return
+        try:
+            os.remove(self._path(digest, suffix))
+        except OSError:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "pdf_hits": self.pdf_hits,
+            "text_hits": self.text_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "corrupt": self.corrupt,
+            "summary_hits": self.summary_hits,
+        }
+        if self.enabled:
+            with self._lock:
+                entries, size = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(pdf_size + text_size), 0) FROM papers"
+                ).fetchone()
+            stats.update({"entries": entries, "bytes": size, "max_bytes": self.max_bytes})
+        return stats
+
+
+# Process-wide cache used by the PDF reader; disabled until configured
+pdf_cache = PDFCache()
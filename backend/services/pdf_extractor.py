@@ -0,0 +1,217 @@
+"""
+PDF text extraction fanned out over worker processes, with a character budget
+"""
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Until real pages have been seen, assume a dense academic page
+ESTIMATED_CHARS_PER_PAGE = 3000
+
+# How long to wait for ranges that were already running before removing their temp file
+CLEANUP_WAIT_SECONDS = 5.0
+
+# Reader kept by each worker process so consecutive tasks for one document parse it once
+_worker_reader: Optional[Tuple[str, PyPDF2.PdfReader]] = None
+
+
+def _extract_range(document_id: str, path: str, start: int, stop: int) -> List[Optional[str]]:
+    """Text of pages [start, stop) of the PDF at path; None for pages that fail"""
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != document_id:
+        _worker_reader = (document_id, PyPDF2.PdfReader(path))
+    reader = _worker_reader[1]
+    texts: List[Optional[str]] = []
+    for index in range(start, stop):
+        try:
+            texts.append(reader.pages[index].extract_text() or "")
+        except Exception as e:
+            logger.warning(f"Failed to extract page {index + 1}: {e}")
+            texts.append(None)
+    return texts
+
+
+class ExtractedText:
+    """Pages of text pulled from one PDF"""
+
+    def __init__(self, pages: List[str], page_count: int, complete: bool, seconds: float):
+        self.pages = pages
+        self.page_count = page_count
+        # False when the caller's character budget stopped extraction early
+        self.complete = complete
+        self.seconds = seconds
+
+
+class PDFExtractor:
+    """
+    Extracts PDF text in a process pool so PyPDF2's pure-Python parsing
+    isn't serialized on the GIL. Pages are handed out in small ranges, in
+    order, and only as many ranges are in flight as the character budget
+    still needs, so a caller that wants the first few thousand characters
+    doesn't pay for fifty pages. Short documents, and machines where the
+    pool would have fewer than two processes, are extracted inline.
+    """
+
+    def __init__(self, max_workers: int = 4, pages_per_task: int = 2, max_pages: int = 50,
+                 max_chars: int = 500_000):
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.documents = 0
+        self.parallel_documents = 0
+        self.pages_extracted = 0
+        self.pages_skipped = 0
+        self.seconds = 0.0
+        self.configure(max_workers, pages_per_task, max_pages, max_chars)
+
+    def configure(self, max_workers: int, pages_per_task: int = 2, max_pages: int = 50, max_chars: int = 500_000):
+        """Apply settings; the pool is recreated on next use"""
+        self.close()
+        self.max_workers = max_workers
+        # More processes than CPUs only adds IPC; one process gains nothing over inline
+        self.workers = min(max_workers, os.cpu_count() or 1)
+        self.pages_per_task = pages_per_task
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                # Forking a threaded server is unsafe; forkserver children start clean
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def extract(self, content: bytes, max_chars: int = 0) -> ExtractedText:
+        """
+        Extract page text from PDF bytes, stopping once max_chars characters
+        (0 for no budget beyond the extractor's own limits) are available.
+        """
+        started = time.perf_counter()
+        reader = PyPDF2.PdfReader(BytesIO(content))
+        page_count = len(reader.pages)
+        pages_wanted = min(page_count, self.max_pages)
+        if page_count > self.max_pages:
+            logger.warning(f"PDF has {page_count} pages, limiting to first {self.max_pages}")
+        budget = min(max_chars, self.max_chars) if max_chars else self.max_chars
+
+        if self.workers > 1 and pages_wanted > self.pages_per_task:
+            try:
+                pages, stopped = self._extract_parallel(content, pages_wanted, budget)
+                parallel = True
+            except BrokenProcessPool as e:
+                logger.warning(f"PDF worker pool failed, extracting inline: {e}")
+                self.close()
+                pages, stopped = self._extract_inline(reader, pages_wanted, budget)
+                parallel = False
+        else:
+            pages, stopped = self._extract_inline(reader, pages_wanted, budget)
+            parallel = False
+        if stopped and budget == self.max_chars:
+            logger.warning(f"PDF text extraction stopped at the {self.max_chars} character limit")
+
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self.documents += 1
+            self.parallel_documents += int(parallel)
+            self.pages_extracted += len(pages)
+            self.pages_skipped += pages_wanted - len(pages)
+            self.seconds += seconds
+        return ExtractedText(pages, page_count, not stopped or budget == self.max_chars, seconds)
+
+    def _extract_inline(self, reader: PyPDF2.PdfReader, pages_wanted: int, budget: int) -> Tuple[List[str], bool]:
+        """Pages in order, and whether the budget stopped extraction before the last page"""
+        pages: List[str] = []
+        length = 0
+        for index in range(pages_wanted):
+            try:
+                text = reader.pages[index].extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Failed to extract page {index + 1}: {e}")
+                continue
+            pages.append(text)
+            length += len(text) + 1
+            if length >= budget:
+                return pages, index + 1 < pages_wanted
+        return pages, False
+
+    def _extract_parallel(self, content: bytes, pages_wanted: int, budget: int) -> Tuple[List[str], bool]:
+        # Workers read the PDF from a file rather than receiving a copy of it per task
+        handle, path = tempfile.mkstemp(suffix=".pdf")
+        pending = []
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(content)
+            pool = self._get_pool()
+            document_id = uuid.uuid4().hex
+            ranges = [(start, min(start + self.pages_per_task, pages_wanted))
+                      for start in range(0, pages_wanted, self.pages_per_task)]
+            submitted = 0
+            pages: List[str] = []
+            seen = 0
+            length = 0
+            while True:
+                # Keep enough ranges in flight to cover the budget still to fill
+                chars_per_page = length / seen if seen and length else ESTIMATED_CHARS_PER_PAGE
+                pages_needed = math.ceil(max(budget - length, 0) / max(chars_per_page, 1))
+                in_flight = sum(stop - start for start, stop, _ in pending)
+                while (submitted < len(ranges) and len(pending) < self.workers
+                       and (not pending or in_flight < pages_needed)):
+                    start, stop = ranges[submitted]
+                    pending.append((start, stop, pool.submit(_extract_range, document_id, path, start, stop)))
+                    in_flight += stop - start
+                    submitted += 1
+                if not pending:
+                    return pages, False
+                start, stop, future = pending.pop(0)
+                for text in future.result():
+                    seen += 1
+                    if text is None:
+                        continue
+                    pages.append(text)
+                    length += len(text) + 1
+                    if length >= budget:
+                        return pages, seen < pages_wanted
+        finally:
+            # Queued ranges are dropped; running ones can't be and may still open the file
+            running = [future for _, _, future in pending if not future.cancel()]
+            if running:
+                wait(running, timeout=CLEANUP_WAIT_SECONDS)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "documents": self.documents,
+                "parallel_documents": self.parallel_documents,
+                "pages_extracted": self.pages_extracted,
+                "pages_skipped": self.pages_skipped,
+                "avg_seconds": round(self.seconds / self.documents, 3) if self.documents else 0.0,
+            }
+
+
+# Process-wide extractor used by the PDF reader
+pdf_extractor = PDFExtractor()
@@ -0,0 +1,135 @@
+"""
+Cache of web search API responses keyed by normalized query
+"""
+import hashlib
+import logging
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import SQLiteCache, TieredCache, TTLCache
+from .intent_matcher import IntentMatcher
+
+logger = logging.getLogger(__name__)
+
+# Words that don't change what a search engine returns
+STOP_WORDS = frozenset({
+    "a", "an", "the", "of", "for", "to", "in", "on", "at", "by", "and", "or",
+    "is", "are", "was", "were", "be", "what", "whats", "what's", "who", "which",
+    "me", "my", "i", "you", "your", "please", "can", "could", "tell", "show",
+    "find", "search", "look", "up", "about", "some", "any", "do", "does",
+})
+
+# Queries whose answers go stale quickly get the short TTL
+FRESHNESS_INTENTS = IntentMatcher({
+    "fresh": [
+        "news", "latest", "breaking", "today", "todays", "tonight", "now", "current*",
+        "live", "this week", "this month", "recent*", "update*", "price*", "rate*", "stock*",
+        "score*", "weather", "forecast", "trending", "election*", "announce*", "release*",
+    ],
+})
+
+
+def normalize_query(query: str, ignore_word_order: bool = False) -> str:
+    """Lowercase, drop punctuation and stop words, optionally sort words"""
+    words = re.findall(r"[\w'$%.+#-]+", query.lower())
+    words = [word.strip(".'") for word in words]
+    kept = [word for word in words if word and word not in STOP_WORDS]
+    # A query made only of stop words still needs a key of its own
+    words = kept or [word for word in words if word]
+    if ignore_word_order:
+        words = sorted(words)
+    return " ".join(words)
+
+
+class SearchCache:
+    """
+    Shared by every agent's search_web tool so repeated and near-repeated
+    queries ("Latest AI news?" / "the latest ai news") stop spending API
+    quota. Successful responses are cached by normalized query and result
+    count in memory (LRU) and, when a path is configured, in SQLite so they
+    survive restarts. Time-sensitive queries use a short TTL, everything
+    else a long one.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        ttl: float = 86400,
+        fresh_ttl: float = 900,
+        sqlite_path: Optional[str] = None,
+        ignore_word_order: bool = False
+    ):
+        self._lock = threading.Lock()
+        self.cache: Optional[TieredCache] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.configure(max_entries, ttl, fresh_ttl, sqlite_path, ignore_word_order)
+
+    def configure(
+        self,
+        max_entries: int,
+        ttl: float,
+        fresh_ttl: float,
+        sqlite_path: Optional[str] = None,
+        ignore_word_order: bool = False
+    ):
+        """Rebuild the cache with new settings"""
+        if self.cache is not None:
+            self.cache.close()
+        disk = None
+        if sqlite_path:
+            try:
+                disk = SQLiteCache(sqlite_path, ttl=ttl, table="search_results")
+            except Exception as e:
+                logger.warning(f"Search cache SQLite tier disabled: {e}")
+        self.ttl = ttl
+        self.fresh_ttl = fresh_ttl
+        self.ignore_word_order = ignore_word_order
+        self.cache = TieredCache(TTLCache(max_entries=max_entries, ttl=ttl, name="search"), disk)
+
+    def _key(self, query: str, max_results: int) -> str:
+        normalized = normalize_query(query, self.ignore_word_order)
+        return hashlib.sha256(f"{max_results}|{normalized}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, query: str) -> float:
+        """Short TTL for news/price/"latest" style queries, long otherwise"""
+        return self.fresh_ttl if "fresh" in FRESHNESS_INTENTS.match(query) else self.ttl
+
+    def get(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """Cached API response for an equivalent query, if any"""
+        data = self.cache.get(self._key(query, max_results))
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, query: str, max_results: int, data: Dict[str, Any]):
+        """Cache a successful API response; empty results only for the short TTL"""
+        ttl = self.ttl_for(query) if data.get("items") else min(self.fresh_ttl, self.ttl)
+        self.cache.set(self._key(query, max_results), data, ttl)
+        with self._lock:
+            self.stores += 1
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.cache.get_stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats.update({
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+            })
+        return stats
+
+
+# Process-wide cache used by all search tools
+search_cache = SearchCache()
@@ -0,0 +1,120 @@
+"""
+Per-session conversation state for agents
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .history_manager import is_summary
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSession:
+    """Conversation history for one (agent_id, session_id) pair"""
+
+    def __init__(self, agent_id: str, session_id: str):
+        self.agent_id = agent_id
+        self.session_id = session_id
+        self.history: List[Dict[str, Any]] = []
+        # Serializes turns within a session; different sessions run concurrently
+        self.lock = asyncio.Lock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def compact(self, max_messages: int):
+        """
+        Drop the oldest messages beyond max_messages, keeping the rolling
+        summary. Call with the session lock held: a turn still running in a
+        worker thread appends to and rewrites history.
+        """
+        head = 1 if self.history and is_summary(self.history[0]) else 0
+        if max_messages and len(self.history) - head > max_messages:
+            del self.history[head:len(self.history) - max_messages]
+            # Never start the window on a reply whose question was dropped
+            while len(self.history) > head and self.history[head].get("role") != "user":
+                del self.history[head]
+
+
+class SessionStore:
+    """
+    In-memory LRU of chat sessions keyed by (agent_id, session_id).
+    Idle sessions expire after idle_ttl seconds and the least recently
+    used ones are evicted once max_sessions is exceeded.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800, max_messages: int = 100):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[Tuple[str, str], ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def get_or_create(self, agent_id: str, session_id: Optional[str] = None) -> ChatSession:
+        """Return the session for this agent, creating one (with a new id if none is given)"""
+        session_id = session_id or uuid.uuid4().hex
+        key = (agent_id, session_id)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(key)
+            if session is None:
+                session = ChatSession(agent_id, session_id)
+                self._sessions[key] = session
+                self.created += 1
+                self._evict_lru()
+            else:
+                self._sessions.move_to_end(key)
+            session.last_used = now
+        return session
+
+    def _evict_idle(self, now: float):
+        # Sessions are ordered by last use, so stop at the first one still fresh
+        for key in list(self._sessions):
+            session = self._sessions[key]
+            if now - session.last_used < self.idle_ttl:
+                break
+            if session.lock.locked():
+                # A long-running turn is still using it; it counts as used now
+                session.last_used = now
+                self._sessions.move_to_end(key)
+                continue
+            del self._sessions[key]
+            self.evicted_idle += 1
+
+    def _evict_lru(self):
+        while len(self._sessions) > self.max_sessions:
+            key, _ = self._sessions.popitem(last=False)
+            self.evicted_lru += 1
+            logger.debug(f"Evicted least recently used session {key}")
+
+    def clear(self, agent_id: str, session_id: Optional[str] = None) -> int:
+        """Remove one session, or every session of the agent when no id is given"""
+        with self._lock:
+            if session_id is not None:
+                return 1 if self._sessions.pop((agent_id, session_id), None) else 0
+            keys = [key for key in self._sessions if key[0] == agent_id]
+            for key in keys:
+                del self._sessions[key]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of session metrics"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl,
+                "max_messages": self.max_messages,
+                "stored_messages": sum(len(s.history) for s in self._sessions.values()),
+                "created": self.created,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+            }
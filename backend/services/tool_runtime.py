@@ -0,0 +1,191 @@
+"""
+Concurrent execution of the tool calls an LLM requests in one turn
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolOutcome:
+    """Result (or error) of one tool call, in the position it was requested"""
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.timed_out = False
+        self.running = False
+        self.abandoned = False
+        self.duration = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ToolRuntime:
+    """
+    Runs a turn's tool calls concurrently on a background event loop and
+    hands the outcomes back in call order. Tools may be coroutine functions,
+    which run on the loop, or plain functions, which run on a bounded thread
+    pool. Each batch is capped at max_concurrency calls in flight and each
+    call, including a lone one, at timeout seconds. A thread cannot be
+    stopped, so a timed-out synchronous call keeps its worker until it
+    returns; at most max_workers such calls can pile up, and get_stats()
+    reports how many are still running.
+    """
+
+    def __init__(self, max_workers: int = 16, max_concurrency: int = 4, timeout: float = 30.0):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.parallel_batches = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.abandoned = 0
+        self.busy_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def configure(self, max_workers: int, max_concurrency: int, timeout: float):
+        """Apply settings, replacing the worker pool if it is already running"""
+        with self._lock:
+            self.max_workers = max_workers
+            self.max_concurrency = max_concurrency
+            self.timeout = timeout
+            previous = self._executor
+            if previous is not None:
+                self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tool-runtime", daemon=True).start()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+                self._loop = loop
+            return self._loop
+
+    def _call_sync(self, outcome: ToolOutcome, func: Callable) -> Any:
+        with self._lock:
+            outcome.running = True
+        try:
+            return func(**outcome.args)
+        finally:
+            with self._lock:
+                outcome.running = False
+                if outcome.abandoned:
+                    self.abandoned -= 1
+
+    async def _invoke(self, outcome: ToolOutcome, func: Callable, semaphore: asyncio.Semaphore, timeout: float):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(func):
+                    call = func(**outcome.args)
+                else:
+                    call = asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._call_sync, outcome, func
+                    )
+                outcome.result = await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                # A timed-out thread keeps running, but its result is discarded
+                with self._lock:
+                    outcome.timed_out = True
+                    # Calls still queued for a worker were cancelled and never start
+                    if outcome.running:
+                        outcome.abandoned = True
+                        self.abandoned += 1
+                outcome.error = TimeoutError(f"{outcome.name} timed out after {timeout:g}s")
+                logger.warning(str(outcome.error))
+            except Exception as e:
+                outcome.error = e
+            outcome.duration = time.perf_counter() - started
+
+    async def arun(
+        self,
+        calls: List[tuple],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[ToolOutcome]:
+        """Run (name, func, args) calls concurrently; outcomes come back in call order"""
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        timeout = timeout or self.timeout
+        outcomes = [ToolOutcome(name, args) for name, _, args in calls]
+        await asyncio.gather(*(
+            self._invoke(outcome, func, semaphore, timeout)
+            for outcome, (_, func, _) in zip(outcomes, calls)
+        ))
+        return outcomes
+
+    def run(
+        self,
+        calls: List[tuple],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[ToolOutcome]:
+        """Blocking version of arun for agents running on worker threads"""
+        started = time.perf_counter()
+        if calls:
+            future = asyncio.run_coroutine_threadsafe(
+                self.arun(calls, max_concurrency, timeout), self._ensure_loop()
+            )
+            outcomes = future.result()
+        else:
+            outcomes = []
+        self._record(outcomes, time.perf_counter() - started)
+        return outcomes
+
+    def _record(self, outcomes: List[ToolOutcome], wall: float):
+        with self._lock:
+            self.batches += 1
+            if len(outcomes) > 1:
+                self.parallel_batches += 1
+            self.calls += len(outcomes)
+            self.errors += sum(1 for outcome in outcomes if not outcome.ok)
+            self.timeouts += sum(1 for outcome in outcomes if outcome.timed_out)
+            self.busy_seconds += sum(outcome.duration for outcome in outcomes)
+            self.wall_seconds += wall
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch counts and time saved by running calls concurrently"""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "parallel_batches": self.parallel_batches,
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "abandoned_running": self.abandoned,
+                "max_concurrency": self.max_concurrency,
+                "timeout_seconds": self.timeout,
+                "seconds_saved": round(max(self.busy_seconds - self.wall_seconds, 0.0), 3),
+            }
+
+    def close(self):
+        """Stop the runtime loop and its worker threads"""
+        with self._lock:
+            loop, executor = self._loop, self._executor
+            self._loop = None
+            self._executor = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+# Process-wide runtime used by all agents
+tool_runtime = ToolRuntime()
@@ -0,0 +1,158 @@
+"""
+Shared geocoding and current-weather lookups with caching
+"""
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .cache import SQLiteCache, TieredCache, TTLCache
+from .gazetteer import gazetteer
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_URL = "https://nominatim.openstreetmap.org/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+
+# Coordinates are rounded to ~1 km so nearby lookups share a forecast
+COORDINATE_PRECISION = 2
+
+
+def normalize_location(location: str) -> str:
+    """Cache key for a place name: "  New York,USA " and "new york, usa" are the same place"""
+    location = location.lower().strip()
+    location = re.sub(r"\s*,\s*", ", ", location)
+    return re.sub(r"\s+", " ", location).strip(" ,.")
+
+
+class WeatherCache:
+    """
+    Two-level cache in front of Nominatim and Open-Meteo, shared by every
+    agent with a weather tool. Places in the offline gazetteer are resolved
+    locally and never reach Nominatim. Other geocodes change rarely, so
+    they are kept for a long time and, when a path is configured, persisted
+    in SQLite so a restart doesn't hit Nominatim again; places that weren't
+    found are remembered for a shorter time. Forecasts are kept for a few
+    minutes, keyed by rounded coordinates.
+    """
+
+    def __init__(
+        self,
+        geocode_max_entries: int = 5000,
+        geocode_ttl: float = 30 * 86400,
+        geocode_sqlite_path: Optional[str] = None,
+        weather_max_entries: int = 1000,
+        weather_ttl: float = 600
+    ):
+        self._geocode_lock = threading.Lock()
+        self._last_geocode_request = 0.0
+        self.local_geocodes = 0
+        self.geocode_requests = 0
+        self.weather_requests = 0
+        self.geocode: Optional[TieredCache] = None
+        self.configure(geocode_max_entries, geocode_ttl, geocode_sqlite_path, weather_max_entries, weather_ttl)
+
+    def configure(
+        self,
+        geocode_max_entries: int,
+        geocode_ttl: float,
+        geocode_sqlite_path: Optional[str],
+        weather_max_entries: int,
+        weather_ttl: float
+    ):
+        """Rebuild both caches with new settings"""
+        if self.geocode is not None:
+            self.geocode.close()
+        disk = None
+        if geocode_sqlite_path:
+            try:
+                disk = SQLiteCache(geocode_sqlite_path, ttl=geocode_ttl, table="geocodes")
+            except Exception as e:
+                logger.warning(f"Geocode cache SQLite tier disabled: {e}")
+        self.geocode_ttl = geocode_ttl
+        self.geocode = TieredCache(TTLCache(max_entries=geocode_max_entries, ttl=geocode_ttl, name="geocode"), disk)
+        self.weather = TTLCache(max_entries=weather_max_entries, ttl=weather_ttl, name="weather")
+
+    def lookup_location(self, location: str) -> Optional[Dict[str, Any]]:
+        """{"lat", "lon", "display_name"} for a place name, or None if Nominatim doesn't know it"""
+        place = gazetteer.resolve(location)
+        if place is not None:
+            self.local_geocodes += 1
+            return place.to_dict()
+
+        key = normalize_location(location)
+        place = self.geocode.get(key)
+        if place is not None:
+            return place or None
+
+        with self._geocode_lock:
+            # Another thread may have resolved it while we waited
+            place = self.geocode.memory.get(key)
+            if place is not None:
+                return place or None
+            wait = NOMINATIM_MIN_INTERVAL - (time.monotonic() - self._last_geocode_request)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = http_client.get(GEOCODE_URL, params={"format": "json", "q": location.strip()}, timeout=10)
+            finally:
+                self._last_geocode_request = time.monotonic()
+            self.geocode_requests += 1
+            response.raise_for_status()
+            results = response.json()
+
+            if not results:
+                # Remember misses too, but not for as long as real places
+                self.geocode.set(key, {}, ttl=min(self.geocode_ttl, 86400))
+                return None
+            place = {
+                "lat": float(results[0]["lat"]),
+                "lon": float(results[0]["lon"]),
+                "display_name": results[0]["display_name"],
+            }
+            self.geocode.set(key, place)
+            return place
+
+    def current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Open-Meteo "current_weather" block for a coordinate"""
+        key = f"{round(lat, COORDINATE_PRECISION)},{round(lon, COORDINATE_PRECISION)}"
+        current = self.weather.get(key)
+        if current is not None:
+            return current
+
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": "true",
+            "hourly": "temperature_2m,relative_humidity_2m,wind_speed_10m",
+            "timezone": "auto",
+            "forecast_days": 1
+        }
+        response = http_client.get(FORECAST_URL, params=params, timeout=10)
+        self.weather_requests += 1
+        response.raise_for_status()
+        current = response.json()["current_weather"]
+        self.weather.set(key, current)
+        return current
+
+    def close(self):
+        if self.geocode is not None:
+            self.geocode.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "geocode": self.geocode.get_stats(),
+            "weather": self.weather.get_stats(),
+            "local_geocodes": self.local_geocodes,
+            "geocode_requests": self.geocode_requests,
+            "weather_requests": self.weather_requests,
+        }
+
+
+# Process-wide cache used by all weather tools
+weather_cache = WeatherCache()
@@ -0,0 +1,150 @@
+"""
+Tests for the per-agent-type thread pools and their admission control
+"""
+import asyncio
+import importlib
+import threading
+
+import pytest
+
+from services.agent_executor import AgentExecutor, AgentPool, ExecutorSaturatedError
+from services.chat_result import ChatResult
+from services.session_store import SessionStore
+
+
+def test_pool_admits_workers_plus_queue_then_rejects():
+    pool = AgentPool("test", max_workers=2, queue_limit=1)
+    try:
+        for _ in range(3):
+            pool.admit()
+        with pytest.raises(ExecutorSaturatedError):
+            pool.admit()
+        stats = pool.get_stats()
+        assert stats["queue_depth"] == 3
+        assert stats["rejected"] == 1
+    finally:
+        pool.executor.shutdown()
+
+
+def test_finished_tasks_free_their_slot():
+    pool = AgentPool("test", max_workers=1, queue_limit=0)
+    try:
+        pool.admit()
+        assert pool.wrap(lambda: 42)() == 42
+        pool.admit()
+        with pytest.raises(ValueError):
+            pool.wrap(lambda: int("x"))()
+        pool.admit()
+        stats = pool.get_stats()
+        assert (stats["completed"], stats["failed"], stats["running"]) == (1, 1, 0)
+    finally:
+        pool.executor.shutdown()
+
+
+def test_executor_rejects_work_beyond_the_pool():
+    executor = AgentExecutor(default_workers=1, queue_limit=0)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run("math", release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run("math", lambda: None)
+        # Other agent types have their own pools
+        assert await executor.run("search", lambda: "ok") == "ok"
+        release.set()
+        await first
+        assert await executor.run("math", lambda: "free again") == "free again"
+
+    try:
+        asyncio.run(scenario())
+        assert executor.get_stats()["math"]["rejected"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_stream_yields_items_and_reraises_errors():
+    executor = AgentExecutor(default_workers=1, queue_limit=0)
+
+    def tokens():
+        yield "a"
+        yield "b"
+        raise RuntimeError("boom")
+
+    async def scenario():
+        received = []
+        with pytest.raises(RuntimeError):
+            async for item in executor.stream("chat", tokens):
+                received.append(item)
+        return received
+
+    try:
+        assert asyncio.run(scenario()) == ["a", "b"]
+    finally:
+        executor.shutdown()
+
+
+class BlockingAgent:
+    """Agent whose turn waits until the test releases it"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def chat_result(self, user_input, history=None):
+        self.release.wait(5)
+        return ChatResult(text="done")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Importing main validates settings; give it a development configuration
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_" + "0" * 40)
+    monkeypatch.setenv("DEBUG", "true")
+    main = importlib.import_module("main")
+    executor = AgentExecutor(default_workers=1, queue_limit=0)
+    agent = BlockingAgent()
+    monkeypatch.setattr(main, "agent_executor", executor)
+    monkeypatch.setattr(main, "session_store", SessionStore())
+    monkeypatch.setitem(main.agents_store, "busy-agent", agent)
+    monkeypatch.setitem(main.agent_metadata, "busy-agent", {"agent_type": "math"})
+    yield main, agent, executor
+    agent.release.set()
+    executor.shutdown()
+
+
+def test_saturated_pool_returns_503(app):
+    from fastapi.testclient import TestClient
+
+    main, agent, executor = app
+    client = TestClient(main.app)
+    # Hold the only slot of the math pool
+    executor._get_pool("math").admit()
+    response = client.post("/agents/busy-agent/chat", json={"content": "hello"})
+    assert response.status_code == 503
+    assert "busy" in response.json()["detail"]
+
+
+def test_cancelled_queued_call_releases_its_slot():
+    executor = AgentExecutor(default_workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run("math", release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run("math", lambda: "never"))
+        await asyncio.sleep(0.05)
+        # The client goes away before a worker picks the call up
+        queued.cancel()
+        await asyncio.sleep(0.05)
+        depth = executor.get_stats()["math"]["queue_depth"]
+        release.set()
+        await running
+        return depth, await executor.run("math", lambda: "ok")
+
+    try:
+        assert asyncio.run(scenario()) == (0, "ok")
+        stats = executor.get_stats()["math"]
+        assert (stats["queue_depth"], stats["running"], stats["rejected"]) == (0, 0, 0)
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,98 @@
+"""
+Tests for the shared arXiv client: caching, query coalescing and request spacing
+"""
+import threading
+import time
+
+from services.arxiv_client import ArxivClient, normalize_arxiv_query
+
+
+def test_queries_are_normalized():
+    assert normalize_arxiv_query("  Graph   Neural Networks ") == "graph neural networks"
+
+
+def test_results_are_cached_and_copied():
+    client = ArxivClient(min_interval=0)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"entries": [{"title": "A"}]}
+
+    first = client.search("Graph Networks", 5, fetch)
+    first["entries"].append({"title": "changed by the caller"})
+    second = client.search("graph  networks", 5, fetch)
+    assert len(calls) == 1
+    assert second == {"entries": [{"title": "A"}]}
+    # A different result count is a different request
+    client.search("graph networks", 10, fetch)
+    assert len(calls) == 2
+
+
+def test_identical_queries_in_flight_are_coalesced():
+    client = ArxivClient(min_interval=0)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"entries": [{"title": "shared"}]}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.search("same query", 5, fetch)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while client.get_stats()["coalesced"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [{"entries": [{"title": "shared"}]}] * 4
+    # Each caller got its own copy
+    assert len({id(result) for result in results}) == 4
+    stats = client.get_stats()
+    assert (stats["requests"], stats["coalesced"], stats["in_flight"]) == (1, 3, 0)
+
+
+def test_errors_reach_every_waiting_caller_and_are_not_cached():
+    client = ArxivClient(min_interval=0)
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ConnectionError("arXiv is down")
+
+    errors = []
+
+    def search():
+        try:
+            client.search("flaky", 5, failing)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while client.get_stats()["coalesced"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 2
+    assert client.search("flaky", 5, lambda: {"entries": []}) == {"entries": []}
+
+
+def test_requests_are_spaced_by_min_interval():
+    client = ArxivClient(min_interval=0.1)
+    started = time.monotonic()
+    for number in range(3):
+        client.search(f"query {number}", 5, lambda: {"entries": []})
+    assert time.monotonic() - started >= 0.2
+    assert client.get_stats()["wait_seconds"] >= 0.15
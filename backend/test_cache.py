@@ -0,0 +1,85 @@
+"""
+Tests for the in-memory, SQLite and tiered caches
+"""
+import time
+
+import pytest
+
+from services.cache import SQLiteCache, TieredCache, TTLCache
+
+
+@pytest.fixture
+def disk(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    # A ttl of 0 never expires
+    assert cache.get("b") == 2
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_sqlite_cache_round_trip_and_expiry(disk):
+    disk.set("k", {"items": [1, 2]})
+    disk.set("short", "x", ttl=0.05)
+    assert disk.get("k") == {"items": [1, 2]}
+    value, expires_at = disk.get_entry("k")
+    assert value == {"items": [1, 2]} and expires_at > time.time()
+    time.sleep(0.06)
+    assert disk.get("short", "missing") == "missing"
+    assert disk.purge_expired() == 1
+
+
+def test_sqlite_cache_persists_across_connections(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache(path)
+    first.set("k", "v")
+    first.close()
+    second = SQLiteCache(path)
+    assert second.get("k") == "v"
+    second.close()
+
+
+def test_tiered_cache_promotes_disk_hits(disk):
+    tiered = TieredCache(TTLCache(ttl=60), disk)
+    tiered.set("k", "v")
+    tiered.memory.clear()
+    assert tiered.get("k") == "v"
+    assert tiered.memory.get("k") == "v"
+
+
+def test_promotion_keeps_the_remaining_ttl(disk):
+    tiered = TieredCache(TTLCache(ttl=3600), disk)
+    tiered.set("k", "v", ttl=0.1)
+    tiered.memory.clear()
+    assert tiered.get("k") == "v"
+    time.sleep(0.12)
+    # The memory tier's hour-long default must not outlive the entry
+    assert tiered.get("k") is None
+
+
+def test_tiered_cache_delete_removes_both_tiers(disk):
+    tiered = TieredCache(TTLCache(ttl=60), disk)
+    tiered.set("k", "v")
+    tiered.delete("k")
+    assert tiered.get("k") is None
+    assert disk.get("k") is None
@@ -0,0 +1,63 @@
+"""
+Tests for the offline gazetteer
+"""
+import pytest
+
+from services.gazetteer import Gazetteer
+
+ROWS = [
+    ("Cordoba", "Córdoba", "AR", "Argentina", -31.42, -64.19, 1391000),
+    ("Cordoba", "Córdoba", "ES", "Spain", 37.88, -4.78, 325000),
+    ("Paris", "", "FR", "France", 48.86, 2.35, 2148000),
+    ("Sydney", "", "AU", "Australia", -33.87, 151.21, 5312000),
+    ("Hyderabad", "", "IN", "India", 17.39, 78.49, 6810000),
+    ("Hyderabad", "", "PK", "Pakistan", 25.40, 68.36, 1733000),
+    ("Nice", "", "FR", "France", 43.70, 7.27, 342000),
+    ("New York", "NYC", "US", "United States", 40.71, -74.01, 8336000),
+    ("York", "", "GB", "United Kingdom", 53.96, -1.08, 153000),
+]
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / "cities.tsv"
+    lines = ["# name\taliases\tcountry code\tcountry\tlat\tlon\tpopulation"]
+    lines += ["\t".join(str(field) for field in row) for row in ROWS]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    gazetteer = Gazetteer(str(path))
+    yield gazetteer
+    gazetteer.close()
+
+
+def test_most_populous_place_without_a_country(gazetteer):
+    assert gazetteer.find_in_text("weather in cordoba").country_code == "AR"
+    assert gazetteer.find_in_text("Hyderabad tomorrow").country_code == "IN"
+
+
+def test_country_after_the_city_disambiguates(gazetteer):
+    assert gazetteer.find_in_text("weather in Córdoba, Spain").country_code == "ES"
+    assert gazetteer.find_in_text("hyderabad pakistan forecast").country_code == "PK"
+    assert gazetteer.find_in_text("hyderabad sindh").country_code == "PK"
+
+
+@pytest.mark.parametrize("text", ["paris texas", "Sydney Nova Scotia", "cordoba france"])
+def test_unmatched_country_or_state_is_left_to_the_caller(gazetteer, text):
+    # Not the same-named city elsewhere: the caller's fuller geocoder takes over
+    assert gazetteer.find_in_text(text) is None
+
+
+def test_longest_name_wins(gazetteer):
+    assert gazetteer.find_in_text("flights to new york").name == "New York"
+    assert gazetteer.find_in_text("visiting york").name == "York"
+
+
+def test_common_words_need_a_capital(gazetteer):
+    assert gazetteer.find_in_text("have a nice day") is None
+    assert gazetteer.find_in_text("weather in Nice").name == "Nice"
+
+
+def test_resolve_needs_the_whole_string(gazetteer):
+    assert gazetteer.resolve("Cordoba, Spain").country_code == "ES"
+    assert gazetteer.resolve("Paris, Texas") is None
+    assert gazetteer.resolve("Paris is lovely") is None
+    assert gazetteer.resolve("Atlantis") is None
@@ -0,0 +1,109 @@
+"""
+Tests for token-budgeted history compaction and the rolling summary
+"""
+from types import SimpleNamespace
+
+from services.history_manager import (
+    SUMMARY_PREFIX,
+    HistoryManager,
+    estimate_tokens,
+    get_history_stats,
+    is_summary,
+    message_tokens,
+)
+
+
+def turn(number):
+    # 40 characters of content: 10 tokens plus 4 of message overhead
+    return [
+        {"role": "user", "content": f"question {number:02d}".ljust(40, ".")},
+        {"role": "assistant", "content": f"answer {number:02d}".ljust(40, ".")},
+    ]
+
+
+def conversation(turns):
+    return [message for number in range(1, turns + 1) for message in turn(number)]
+
+
+class FakeClient:
+    """Groq-style client that returns a fixed summary, or raises"""
+
+    def __init__(self, reply="short summary", error=None):
+        self.reply = reply
+        self.error = error
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][0]["content"])
+        if self.error:
+            raise self.error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+
+
+def test_token_estimates():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert message_tokens(turn(1)[0]) == 14
+
+
+def test_history_within_budget_is_left_alone():
+    client = FakeClient()
+    manager = HistoryManager(client, budget_tokens=100, summary_tokens=10)
+    history = conversation(3)
+    assert manager.compact(history) == conversation(3)
+    assert client.prompts == []
+
+
+def test_over_budget_compacts_to_the_low_water_mark():
+    client = FakeClient()
+    manager = HistoryManager(client, budget_tokens=100, summary_tokens=10, low_water=0.6)
+    history = conversation(5)
+    assert manager.count_tokens(history) > 100
+    manager.compact(history)
+    # 100 * 0.6 - 10 leaves room for three 14-token messages; the window starts on a user turn
+    assert history[0] == {"role": "system", "content": SUMMARY_PREFIX + "short summary"}
+    assert history[1:] == turn(5)
+    assert "question 01" in client.prompts[0] and "answer 04" in client.prompts[0]
+    assert manager.count_tokens(history) <= 100
+
+
+def test_latest_message_is_kept_even_when_it_alone_is_too_big():
+    manager = HistoryManager(FakeClient(), budget_tokens=50, summary_tokens=10)
+    huge = {"role": "user", "content": "x" * 1000}
+    history = conversation(2) + [huge]
+    manager.compact(history)
+    assert history[-1] is huge
+    assert is_summary(history[0])
+
+
+def test_new_summary_replaces_the_previous_one():
+    client = FakeClient(reply="second summary")
+    manager = HistoryManager(client, budget_tokens=100, summary_tokens=10)
+    history = [{"role": "system", "content": SUMMARY_PREFIX + "first summary"}] + conversation(5)
+    manager.compact(history)
+    assert sum(1 for message in history if is_summary(message)) == 1
+    assert history[0]["content"] == SUMMARY_PREFIX + "second summary"
+    # Only newly evicted turns are sent, together with the summary so far
+    assert "first summary" in client.prompts[0]
+
+
+def test_failed_summary_falls_back_to_the_transcript_tail():
+    before = get_history_stats()["summary_failures"]
+    manager = HistoryManager(FakeClient(error=RuntimeError("rate limited")), budget_tokens=100, summary_tokens=10)
+    history = conversation(5)
+    manager.compact(history)
+    summary = history[0]["content"][len(SUMMARY_PREFIX):]
+    # summary_tokens * 4 characters of the newest evicted text
+    assert len(summary) == 40
+    assert summary == "answer 04".ljust(40, ".")
+    assert history[1:] == turn(5)
+    assert get_history_stats()["summary_failures"] == before + 1
+
+
+def test_empty_summary_reply_also_falls_back():
+    manager = HistoryManager(FakeClient(reply="  "), budget_tokens=100, summary_tokens=10)
+    history = conversation(5)
+    manager.compact(history)
+    assert history[0]["content"].endswith("answer 04".ljust(40, "."))
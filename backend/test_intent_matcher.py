@@ -0,0 +1,68 @@
+"""
+Tests for the compiled keyword/phrase intent matcher
+"""
+from services.intent_matcher import IntentMatcher
+
+
+def make_matcher():
+    return IntentMatcher({
+        "greeting": ["hi", "hello"],
+        "weather": ["weather", "humid*", "rain*"],
+        "news": ["latest news", "headlines"],
+        "math": ["+", "square root"],
+    })
+
+
+def test_phrases_match_on_word_boundaries():
+    matcher = make_matcher()
+    assert "greeting" in matcher.match("Hi there")
+    assert "greeting" in matcher.match("well, hi!")
+    # "hi" inside "this" or "chip" is not a greeting
+    assert "greeting" not in matcher.match("this chip")
+    assert "weather" not in matcher.match("weatherman")
+
+
+def test_star_makes_a_prefix():
+    matcher = make_matcher()
+    assert "weather" in matcher.match("how humid is it")
+    assert "weather" in matcher.match("humidity today")
+    assert "weather" in matcher.match("rainfall totals")
+    # The prefix still needs a word boundary on its left
+    assert "weather" not in matcher.match("terrain map")
+
+
+def test_multi_word_phrases_and_symbols():
+    matcher = make_matcher()
+    assert matcher.match("show me the latest news").intents == frozenset({"news"})
+    assert "news" not in matcher.match("latest newsletter")
+    # Symbol phrases match anywhere
+    assert "math" in matcher.match("2+2")
+    assert "math" in matcher.match("Square Root of 9")
+
+
+def test_every_intent_and_phrase_is_reported():
+    match = make_matcher().match("hello, latest news and headlines on the rain")
+    assert match.intents == frozenset({"greeting", "news", "weather"})
+    assert match.count("news") == 2
+    assert match.any("math", "weather")
+    assert not match.any("math")
+
+
+def test_overlapping_phrases_share_the_automaton():
+    matcher = IntentMatcher({"a": ["new york"], "b": ["york"], "c": ["new"]})
+    assert matcher.match("new york city").intents == frozenset({"a", "b", "c"})
+    assert matcher.match("yorkshire").intents == frozenset()
+
+
+def test_results_are_memoized():
+    matcher = make_matcher()
+    first = matcher.match("Hello")
+    assert matcher.match("hello") is first
+    assert matcher.get_stats()["hits"] == 1
+
+
+def test_symbol_phrases_are_literal_not_prefixes():
+    matcher = IntentMatcher({"times": ["*"], "power": ["**"], "word": ["multipl*"]})
+    assert matcher.match("2*3").intents == frozenset({"times"})
+    assert matcher.match("2**3").intents == frozenset({"times", "power"})
+    assert matcher.match("multiplied").intents == frozenset({"word"})
@@ -0,0 +1,148 @@
+"""
+Tests for the LLM gateway's rate buckets, 429 handling and blocking bridge
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import groq
+import httpx
+import pytest
+
+from services import llm_gateway
+from services.llm_gateway import LLMGateway, TokenBucket
+
+
+def rate_limited(retry_after):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+    return groq.RateLimitError("rate limited", response=response, body=None)
+
+
+class FakeProvider:
+    """Hands out one client whose create() plays back the given outcomes"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        completions = SimpleNamespace(create=self._create)
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if callable(outcome):
+            return await outcome()
+        return outcome
+
+    def get_async_client(self, api_key, max_retries=2):
+        return self.client
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def make_gateway(monkeypatch):
+    # No jitter, so backoff waits are exactly what the server asked for
+    monkeypatch.setattr(llm_gateway.random, "uniform", lambda a, b: 0.0)
+    gateways = []
+
+    def make(provider, **kwargs):
+        gateway = LLMGateway(provider=provider, cache=None, default_rpm=600, default_tpm=100000, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def complete(gateway):
+    return gateway.complete("key", model="m", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+
+
+def test_token_bucket_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(per_minute=600)
+        assert await bucket.acquire(600) < 0.05
+        # 10 tokens per second, so one more token takes about 0.1s
+        return await bucket.acquire(1)
+
+    assert 0.05 < asyncio.run(scenario()) < 0.5
+
+
+def test_short_retry_after_is_honored_and_blocks_the_model(make_gateway):
+    provider = FakeProvider(rate_limited(0.1), "ok")
+    gateway = make_gateway(provider, max_retry_after=1.0)
+    started = time.monotonic()
+    assert complete(gateway) == "ok"
+    assert time.monotonic() - started >= 0.1
+    stats = gateway.get_stats()["models"]["m"]
+    assert (provider.calls, stats["rate_limited"], stats["retries"], stats["errors"]) == (2, 1, 1, 0)
+
+
+def test_retry_after_above_the_cap_fails_without_blocking(make_gateway):
+    provider = FakeProvider(rate_limited(3600), "ok")
+    gateway = make_gateway(provider, max_retry_after=1.0)
+    started = time.monotonic()
+    with pytest.raises(groq.RateLimitError):
+        complete(gateway)
+    assert time.monotonic() - started < 1.0
+    assert provider.calls == 1
+    limiter = gateway._limiters["m"]
+    assert limiter.requests_bucket.blocked_until < time.monotonic()
+    assert limiter.get_stats()["errors"] == 1
+
+
+def test_retries_stop_after_max_retries(make_gateway):
+    provider = FakeProvider(rate_limited(0), rate_limited(0), "ok")
+    gateway = make_gateway(provider, max_retries=1)
+    with pytest.raises(groq.RateLimitError):
+        complete(gateway)
+    assert provider.calls == 2
+
+
+def test_complete_times_out_and_releases_its_slot(make_gateway):
+    async def hang():
+        await asyncio.sleep(10)
+
+    gateway = make_gateway(FakeProvider(hang), request_timeout=0.2)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        complete(gateway)
+    assert time.monotonic() - started < 2
+    # The cancelled call gives its concurrency slot back
+    deadline = time.monotonic() + 1
+    while gateway._limiters["m"].in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert gateway._limiters["m"].in_flight == 0
+
+
+class FakeStream:
+    """Async chunk stream whose last chunk carries usage, as Groq's does"""
+
+    def __init__(self, words, total_tokens):
+        usage = SimpleNamespace(prompt_tokens=1, completion_tokens=total_tokens - 1, total_tokens=total_tokens)
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))], x_groq=None)
+            for word in words
+        ]
+        self.chunks.append(SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage)))
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        pass
+
+
+def test_stream_gives_back_unused_tokens(make_gateway):
+    gateway = make_gateway(FakeProvider(FakeStream(["a", "b"], total_tokens=5)), default_max_tokens=1024)
+    chunks = list(gateway.stream("key", model="m", messages=[{"role": "user", "content": "hi"}], stream=True))
+    assert len(chunks) == 3
+    # Only the 5 tokens actually used stay charged against the bucket
+    assert gateway._limiters["m"].tokens_bucket.available() >= 100000 - 5 - 1
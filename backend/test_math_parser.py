@@ -0,0 +1,75 @@
+"""
+Tests for the local arithmetic parser used by the math agent
+"""
+import pytest
+
+from agents.math_parser import parse_arithmetic, parse_number
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What is 8 + 9?", ("add_numbers", {"a": 8.0, "b": 9.0})),
+    ("calculate 12 minus 5", ("subtract_numbers", {"a": 12.0, "b": 5.0})),
+    ("7 x 6", ("multiply_numbers", {"a": 7.0, "b": 6.0})),
+    ("5x3", ("multiply_numbers", {"a": 5.0, "b": 3.0})),
+    ("what's 100 divided by 4", ("divide_numbers", {"a": 100.0, "b": 4.0})),
+    ("2 ** 10", ("calculate_power", {"base": 2.0, "exponent": 10.0})),
+    ("3 to the power of 4 please", ("calculate_power", {"base": 3.0, "exponent": 4.0})),
+    ("1,000 + 24", ("add_numbers", {"a": 1000.0, "b": 24.0})),
+])
+def test_infix_operators(text, expected):
+    assert parse_arithmetic(text) == expected
+
+
+def test_power_binds_before_the_other_operators():
+    # "**" must not be read as two multiplications
+    assert parse_arithmetic("5 ** 2") == ("calculate_power", {"base": 5.0, "exponent": 2.0})
+    assert parse_arithmetic("5 * 2") == ("multiply_numbers", {"a": 5.0, "b": 2.0})
+
+
+def test_signed_operands():
+    assert parse_arithmetic("-4 + 10") == ("add_numbers", {"a": -4.0, "b": 10.0})
+    assert parse_arithmetic("10 - -4") == ("subtract_numbers", {"a": 10.0, "b": -4.0})
+
+
+@pytest.mark.parametrize("text", ["-3 ^ 2", "-2 ** 0.5", "negative two to the power of three"])
+def test_signed_base_is_left_to_the_llm(text):
+    assert parse_arithmetic(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("subtract 3 from 10", ("subtract_numbers", {"a": 10.0, "b": 3.0})),
+    ("the sum of 2 and 3", ("add_numbers", {"a": 2.0, "b": 3.0})),
+    ("multiply six by seven", ("multiply_numbers", {"a": 6.0, "b": 7.0})),
+    ("divide 9 by 3", ("divide_numbers", {"a": 9.0, "b": 3.0})),
+    ("square root of one hundred forty-four", ("calculate_square_root", {"number": 144.0})),
+    ("√(81)", ("calculate_square_root", {"number": 81.0})),
+    ("what is 4 cubed", ("calculate_power", {"base": 4.0, "exponent": 3.0})),
+])
+def test_phrasings(text, expected):
+    assert parse_arithmetic(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "what is the capital of France",
+    "2 + 3 * 4",
+    "add 2 and 3 and 4",
+    "",
+])
+def test_anything_else_is_not_parsed(text):
+    assert parse_arithmetic(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("one hundred and five", 105.0),
+    ("twenty-one thousand three hundred", 21300.0),
+    ("a million", 1_000_000.0),
+    ("negative three point five", -3.5),
+    ("-12.5", -12.5),
+])
+def test_number_words(text, expected):
+    assert parse_number(text) == expected
+
+
+@pytest.mark.parametrize("text", ["five five", "hundred thousand million", "and"])
+def test_malformed_number_words(text):
+    assert parse_number(text) is None
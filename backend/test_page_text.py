@@ -0,0 +1,99 @@
+"""
+Tests for streaming page text extraction and the per-URL content cache
+"""
+import pytest
+
+from services import page_text
+from services.page_text import MainContentCollector, PageTextFetcher, TextCollector
+
+PROSE = "This paragraph is long enough to count as part of the article body. "
+
+
+class FakeResponse:
+    """Streamed response that hands out the given chunks"""
+
+    def __init__(self, chunks, status_code=200, headers=None):
+        self.chunks = [chunk.encode("utf-8") for chunk in chunks]
+        self.status_code = status_code
+        self.headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+        self.encoding = "utf-8"
+        self.raw = object()
+        self.read_chunks = 0
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read_chunks += 1
+            yield chunk
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    responses = []
+    requests = []
+
+    def get(url, headers=None, timeout=None, stream=False):
+        requests.append(dict(headers or {}))
+        return responses.pop(0)
+
+    monkeypatch.setattr(page_text.http_client, "get", get)
+    return responses, requests
+
+
+def test_text_collector_skips_scripts_and_stops_at_the_budget():
+    collector = TextCollector(max_chars=20)
+    collector.feed("<p>Hello   <b>world</b> </p><script>var x = 1;</script><p>" + "more " * 10 + "</p>")
+    assert collector.text.startswith("Hello world more")
+    assert "var x" not in collector.text
+    assert collector.full
+
+
+def test_main_content_prefers_the_article_over_chrome():
+    collector = MainContentCollector(max_chars=5000)
+    collector.feed(
+        "<nav><p>" + PROSE + "</p></nav>"
+        "<div class='sidebar'><p>" + PROSE.upper() + "</p></div>"
+        "<article><h1>Title</h1>" + "<p>" + PROSE + "</p>" * 5 + "</article>"
+    )
+    collector.close()
+    assert collector.text.startswith("Title\n" + PROSE.strip())
+    assert PROSE.upper().strip() not in collector.text
+
+
+def test_early_stop_keeps_the_block_being_read(serve):
+    responses, _ = serve
+    first = "<html><body><article><p>" + PROSE * 5
+    responses.append(FakeResponse([first, "</p><p>never read</p></article>"]))
+    fetcher = PageTextFetcher(max_chars=3000, max_bytes=len(first))
+    page = fetcher.fetch("https://example.com/a")
+    assert responses == [] and page.truncated
+    # The paragraph was still open when the byte budget stopped reading
+    assert page.main_content
+    assert page.text == (PROSE * 5).strip()
+
+
+def test_empty_page_is_not_reported_as_main_content(serve):
+    responses, _ = serve
+    responses.append(FakeResponse(["<html><body><script>x()</script></body></html>"]))
+    page = PageTextFetcher().fetch("https://example.com/empty")
+    assert page.text == ""
+    assert not page.main_content
+
+
+def test_not_modified_is_answered_from_the_cache(serve):
+    responses, requests = serve
+    body = "<article>" + "<p>" + PROSE + "</p>" * 5 + "</article>"
+    responses.append(FakeResponse([body], headers={"ETag": '"v1"'}))
+    responses.append(FakeResponse([], status_code=304))
+    fetcher = PageTextFetcher()
+    first = fetcher.fetch("https://example.com/cached")
+    second = fetcher.fetch("https://example.com/cached")
+    assert requests[1]["If-None-Match"] == '"v1"'
+    assert second.cached and second.text == first.text
+    assert fetcher.get_stats()["not_modified"] == 1
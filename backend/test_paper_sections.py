@@ -0,0 +1,71 @@
+"""
+Tests for section detection in extracted paper text
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "agents", "fourthagent"))
+
+from paper_sections import allocate, split_sections  # noqa: E402
+
+PAPER = """Attention Is Not All You Need
+Jane Doe, John Roe
+Abstract—We study a thing and find that it works.
+1 Introduction
+Transformers are everywhere. This line wraps onto
+a short line.
+2 Related W ork
+Prior art exists.
+3 Method
+We propose a model.
+4 Experiments
+We ran it on benchmarks.
+5 Results
+It beats the baseline.
+6 Conclusion and Future Work
+It works.
+References
+[1] Someone. A paper. 2020.
+"""
+
+
+def test_split_sections_maps_headings_to_canonical_sections():
+    sections = split_sections(PAPER)
+    assert list(sections) == ["front", "abstract", "introduction", "related_work", "method", "results", "conclusion"]
+    assert sections["front"] == "Attention Is Not All You Need Jane Doe, John Roe"
+    assert sections["abstract"] == "We study a thing and find that it works."
+    assert sections["introduction"] == "Transformers are everywhere. This line wraps onto a short line."
+
+
+def test_repeated_sections_are_joined_and_references_dropped():
+    sections = split_sections(PAPER)
+    assert sections["results"] == "We ran it on benchmarks. It beats the baseline."
+    assert "Someone" not in " ".join(sections.values())
+
+
+def test_prose_lines_are_not_headings():
+    text = "Abstract\nShort abstract.\nResults of this kind are rare.\nmethod in lowercase\n"
+    sections = split_sections(text)
+    assert list(sections) == ["abstract"]
+    assert sections["abstract"] == "Short abstract. Results of this kind are rare. method in lowercase"
+
+
+def test_numbered_and_roman_headings():
+    text = "I. INTRODUCTION\nIntro text.\nIV. EXPERIMENTS\nSetup text.\n"
+    assert split_sections(text) == {"introduction": "Intro text.", "results": "Setup text."}
+
+
+def test_allocate_splits_the_budget_evenly():
+    assert allocate({"a": 1000, "b": 1000}, 600) == {"a": 300, "b": 300}
+
+
+def test_allocate_hands_unused_share_to_longer_texts():
+    shares = allocate({"short": 100, "long": 5000, "mid": 400}, 1500)
+    assert shares == {"short": 100, "long": 1000, "mid": 400}
+    assert sum(shares.values()) == 1500
+
+
+def test_allocate_never_exceeds_lengths_or_budget():
+    assert allocate({"a": 10, "b": 20}, 1000) == {"a": 10, "b": 20}
+    assert allocate({}, 100) == {}
+    assert allocate({"a": 10}, 0) == {"a": 0}
@@ -0,0 +1,114 @@
+"""
+Tests for the on-disk paper cache
+"""
+import glob
+import os
+import time
+
+import pytest
+
+from services.pdf_cache import PDFCache, cache_key, is_versioned
+
+PAPER = "https://arxiv.org/pdf/2401.01234v2.pdf"
+PAGE = "https://example.com/paper.pdf"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PDFCache(str(tmp_path))
+    yield cache
+    cache.close()
+
+
+def files(cache, suffix="*"):
+    return glob.glob(os.path.join(cache.directory, "objects", "*", "*." + suffix))
+
+
+def test_cache_keys():
+    assert cache_key(PAPER) == "arxiv:2401.01234v2"
+    assert cache_key("https://arxiv.org/abs/hep-th/9901001") == "arxiv:hep-th/9901001"
+    assert cache_key(PAGE).startswith("url:")
+    assert is_versioned(cache_key(PAPER))
+    assert not is_versioned(cache_key("https://arxiv.org/abs/2401.01234"))
+
+
+def test_round_trip(cache):
+    cache.put_pdf(PAPER, b"%PDF-1.4 body")
+    cache.put_pages(PAPER, ["page one", "page two"])
+    assert cache.get_pdf(PAPER) == b"%PDF-1.4 body"
+    assert cache.get_pages(PAPER) == ["page one", "page two"]
+
+
+def test_non_pdf_content_is_not_stored(cache):
+    cache.put_pdf(PAPER, b"<html>rate limited</html>")
+    assert cache.get_pdf(PAPER) is None
+
+
+def test_corrupted_file_fails_the_integrity_check(cache):
+    cache.put_pdf(PAPER, b"%PDF-1.4 body")
+    (path,) = files(cache, "pdf")
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4 tampered")
+    assert cache.get_pdf(PAPER) is None
+    assert cache.get_stats()["corrupt"] == 1
+    assert files(cache, "pdf") == []
+
+
+def test_partial_text_serves_reads_it_covers(cache):
+    cache.put_pages(PAPER, ["a" * 99, "b" * 99], complete=False)
+    assert cache.get_pages(PAPER, max_chars=150) == ["a" * 99, "b" * 99]
+    assert cache.get_pages(PAPER, max_chars=500) is None
+    assert cache.get_pages(PAPER) is None
+    # A shorter extraction doesn't replace a longer one; the whole paper does
+    cache.put_pages(PAPER, ["a" * 10], complete=False)
+    assert len(cache.get_pages(PAPER, max_chars=150)) == 2
+    cache.put_pages(PAPER, ["whole"])
+    assert cache.get_pages(PAPER) == ["whole"]
+    assert len(files(cache, "json")) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PDFCache(str(tmp_path), max_bytes=250)
+    try:
+        urls = [f"https://arxiv.org/pdf/2401.0000{index}v1" for index in range(3)]
+        cache.put_pdf(urls[0], b"%PDF-" + b"A" * 95)
+        time.sleep(0.01)
+        cache.put_pdf(urls[1], b"%PDF-" + b"B" * 95)
+        time.sleep(0.01)
+        cache.get_pdf(urls[0])
+        time.sleep(0.01)
+        # 300 bytes: the least recently used paper goes
+        cache.put_pdf(urls[2], b"%PDF-" + b"C" * 95)
+        assert cache.get_pdf(urls[1]) is None
+        assert cache.get_pdf(urls[0]) is not None
+        assert cache.get_pdf(urls[2]) is not None
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["bytes"] <= 250
+        assert len(files(cache, "pdf")) == 2
+    finally:
+        cache.close()
+
+
+def test_expired_entry_is_replaced_with_its_files(tmp_path):
+    cache = PDFCache(str(tmp_path), unversioned_ttl=0.05)
+    try:
+        cache.put_pdf(PAGE, b"%PDF-old")
+        cache.put_pages(PAGE, ["old text"])
+        cache.put_summary(PAGE, "method", "old summary")
+        time.sleep(0.06)
+        assert cache.get_pdf(PAGE) is None
+        cache.put_pdf(PAGE, b"%PDF-new")
+        assert cache.get_pdf(PAGE) == b"%PDF-new"
+        assert cache.get_pages(PAGE) is None
+        assert cache.get_summary(PAGE, "method") is None
+        assert len(files(cache)) == 1
+    finally:
+        cache.close()
+
+
+def test_summaries_need_a_cached_paper(cache):
+    cache.put_summary(PAPER, "method", "ignored")
+    assert cache.get_summary(PAPER, "method") is None
+    cache.put_pages(PAPER, ["text"])
+    cache.put_summary(PAPER, "method", "kept")
+    assert cache.get_summary(PAPER, "method") == "kept"
@@ -0,0 +1,96 @@
+"""
+Tests for budgeted PDF text extraction, inline and in the process pool
+"""
+import glob
+import os
+import tempfile
+
+import pytest
+
+from services.pdf_extractor import PDFExtractor
+
+
+def make_pdf(page_texts):
+    """Minimal PDF with one line of Helvetica text per page"""
+    count = len(page_texts)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(count)), count),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+PAGES = [f"Page {number} " + "word " * 40 for number in range(1, 11)]
+
+
+def temp_pdfs():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "*.pdf")))
+
+
+@pytest.fixture
+def inline():
+    extractor = PDFExtractor(max_workers=1, pages_per_task=2, max_pages=50)
+    yield extractor
+    extractor.close()
+
+
+@pytest.fixture
+def parallel():
+    extractor = PDFExtractor(max_workers=2, pages_per_task=2, max_pages=50)
+    # Use the pool even on a single-CPU machine
+    extractor.workers = 2
+    yield extractor
+    extractor.close()
+
+
+def test_inline_extracts_every_page_in_order(inline):
+    result = inline.extract(make_pdf(PAGES))
+    assert result.complete and result.page_count == 10
+    assert [page.split()[1] for page in result.pages] == [str(n) for n in range(1, 11)]
+
+
+def test_budget_stops_extraction_early(inline):
+    result = inline.extract(make_pdf(PAGES), max_chars=500)
+    assert not result.complete
+    assert 2 <= len(result.pages) < 10
+    assert inline.get_stats()["pages_skipped"] == 10 - len(result.pages)
+
+
+def test_max_pages_caps_long_documents():
+    extractor = PDFExtractor(max_workers=1, max_pages=3)
+    result = extractor.extract(make_pdf(PAGES))
+    assert result.page_count == 10 and len(result.pages) == 3
+
+
+def test_parallel_matches_inline_and_removes_its_temp_file(inline, parallel):
+    before = temp_pdfs()
+    expected = inline.extract(make_pdf(PAGES)).pages
+    assert parallel.extract(make_pdf(PAGES)).pages == expected
+    assert parallel.get_stats()["parallel_documents"] == 1
+    assert temp_pdfs() == before
+
+
+def test_parallel_budget_keeps_page_order(parallel):
+    before = temp_pdfs()
+    result = parallel.extract(make_pdf(PAGES), max_chars=500)
+    assert not result.complete
+    assert [page.split()[1] for page in result.pages] == [str(n) for n in range(1, len(result.pages) + 1)]
+    # Ranges still running when the budget was met finished before the file went away
+    assert temp_pdfs() == before
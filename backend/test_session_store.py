@@ -0,0 +1,120 @@
+"""
+Tests for per-session conversation state
+"""
+import asyncio
+import importlib
+import json
+import time
+
+from services.agent_executor import AgentExecutor
+from services.history_manager import SUMMARY_PREFIX
+from services.session_store import ChatSession, SessionStore
+
+
+def turn(number):
+    return [{"role": "user", "content": f"q{number}"}, {"role": "assistant", "content": f"a{number}"}]
+
+
+def test_new_sessions_get_an_id_and_existing_ones_are_reused():
+    store = SessionStore()
+    session = store.get_or_create("agent")
+    assert session.session_id
+    assert store.get_or_create("agent", session.session_id) is session
+    # The same id under another agent is a different conversation
+    assert store.get_or_create("other", session.session_id) is not session
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(max_sessions=2)
+    first = store.get_or_create("agent", "a")
+    store.get_or_create("agent", "b")
+    store.get_or_create("agent", "a")
+    store.get_or_create("agent", "c")
+    assert store.get_or_create("agent", "a") is first
+    assert store.get_stats()["evicted_lru"] == 1
+    # "b" was dropped, so asking for it starts over
+    assert store.get_or_create("agent", "b").history == []
+
+
+def test_idle_sessions_expire_unless_a_turn_holds_them():
+    store = SessionStore(idle_ttl=0.05)
+    idle = store.get_or_create("agent", "idle")
+    busy = store.get_or_create("agent", "busy")
+
+    async def hold_lock():
+        async with busy.lock:
+            time.sleep(0.06)
+            store.get_or_create("agent", "new")
+
+    asyncio.run(hold_lock())
+    assert store.get_stats()["evicted_idle"] == 1
+    assert store.get_or_create("agent", "busy") is busy
+    assert store.get_or_create("agent", "idle") is not idle
+
+
+def test_get_or_create_leaves_history_alone():
+    store = SessionStore(max_messages=2)
+    session = store.get_or_create("agent", "s")
+    session.history.extend(turn(1) + turn(2))
+    # Trimming happens under the session lock in the chat endpoints
+    assert len(store.get_or_create("agent", "s").history) == 4
+
+
+def test_compact_keeps_the_newest_messages_and_the_summary():
+    session = ChatSession("agent", "s")
+    summary = {"role": "system", "content": SUMMARY_PREFIX + "..."}
+    session.history = [summary] + turn(1) + turn(2) + turn(3)
+    session.compact(4)
+    assert session.history == [summary] + turn(2) + turn(3)
+
+
+def test_compact_never_starts_on_a_reply():
+    session = ChatSession("agent", "s")
+    session.history = turn(1) + turn(2)
+    session.compact(3)
+    assert session.history == turn(2)
+
+
+def test_clear_one_or_all_sessions():
+    store = SessionStore()
+    store.get_or_create("agent", "a")
+    store.get_or_create("agent", "b")
+    store.get_or_create("other", "a")
+    assert store.clear("agent", "a") == 1
+    assert store.clear("agent") == 1
+    assert store.get_stats()["active_sessions"] == 1
+
+
+class PaperSearchAgent:
+    """Research agent stand-in whose paper search finds nothing"""
+
+    def _extract_topic(self, user_input):
+        return "graph networks"
+
+    def _wants_full_research(self, user_input):
+        return False
+
+    def _search_papers(self, topic):
+        return json.dumps({"topic": topic, "papers": [], "status": "success"})
+
+
+def test_research_stream_records_the_turn(monkeypatch):
+    # Importing main validates settings; give it a development configuration
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_" + "0" * 40)
+    monkeypatch.setenv("DEBUG", "true")
+    main = importlib.import_module("main")
+    executor = AgentExecutor(default_workers=1, queue_limit=0)
+    monkeypatch.setattr(main, "agent_executor", executor)
+    session = ChatSession("research", "s")
+
+    async def scenario():
+        return [chunk async for chunk in main.stream_research_response(PaperSearchAgent(), "find papers", session)]
+
+    try:
+        chunks = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert chunks[0]["session_id"] == "s"
+    assert session.history[0] == {"role": "user", "content": "find papers"}
+    assert session.history[1]["role"] == "assistant"
+    assert "Found 0 papers" in session.history[1]["content"]
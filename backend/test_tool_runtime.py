@@ -0,0 +1,87 @@
+"""
+Tests for concurrent tool execution: ordering, timeouts and the concurrency cap
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.tool_runtime import ToolRuntime
+
+
+@pytest.fixture
+def runtime():
+    runtime = ToolRuntime(max_workers=4, max_concurrency=4, timeout=5.0)
+    yield runtime
+    runtime.close()
+
+
+def test_outcomes_come_back_in_call_order(runtime):
+    def slow(value, delay):
+        time.sleep(delay)
+        return value
+
+    async def fast(value):
+        return value
+
+    calls = [
+        ("first", slow, {"value": 1, "delay": 0.2}),
+        ("second", fast, {"value": 2}),
+        ("third", slow, {"value": 3, "delay": 0.0}),
+    ]
+    outcomes = runtime.run(calls)
+    assert [outcome.name for outcome in outcomes] == ["first", "second", "third"]
+    assert [outcome.result for outcome in outcomes] == [1, 2, 3]
+
+
+def test_errors_stay_with_their_call(runtime):
+    def fail():
+        raise ValueError("bad input")
+
+    outcomes = runtime.run([("ok", lambda: "fine", {}), ("bad", fail, {})])
+    assert outcomes[0].ok and outcomes[0].result == "fine"
+    assert not outcomes[1].ok and isinstance(outcomes[1].error, ValueError)
+    assert runtime.get_stats()["errors"] == 1
+
+
+def test_lone_sync_call_times_out(runtime):
+    release = threading.Event()
+    started = time.monotonic()
+    [outcome] = runtime.run([("hang", release.wait, {})], timeout=0.2)
+    assert time.monotonic() - started < 2
+    assert outcome.timed_out and isinstance(outcome.error, TimeoutError)
+    # The abandoned thread is counted until the tool returns
+    assert runtime.get_stats()["abandoned_running"] == 1
+    release.set()
+    deadline = time.monotonic() + 1
+    while runtime.get_stats()["abandoned_running"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert runtime.get_stats()["abandoned_running"] == 0
+
+
+def test_lone_async_call_times_out(runtime):
+    async def hang():
+        await asyncio.sleep(10)
+
+    [outcome] = runtime.run([("hang", hang, {})], timeout=0.2)
+    assert outcome.timed_out
+    assert runtime.get_stats()["abandoned_running"] == 0
+
+
+def test_concurrency_is_capped(runtime):
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+
+    outcomes = runtime.run([(f"call{i}", work, {}) for i in range(6)], max_concurrency=2)
+    assert all(outcome.ok for outcome in outcomes)
+    assert peak[0] == 2
@@ -31,6 +31,8 @@ export class TimeoutError extends Error {
 // API client with comprehensive error handling
 class ApiClient {
   private baseUrl: string
+  // Conversation session per agent, issued by the backend on the first message
+  private sessions = new Map<string, string>()
 
   constructor(baseUrl: string = API_BASE_URL) {
     this.baseUrl = baseUrl
@@ -117,16 +119,21 @@ class ApiClient {
   }
 
   async deleteAgent(id: string): Promise<void> {
+    this.sessions.delete(id)
     return this.request(`/agents/${id}`, {
       method: 'DELETE',
     })
   }
 
   async chatWithAgent(id: string, message: string): Promise<ChatResponse> {
-    return this.request<ChatResponse>(`/agents/${id}/chat`, {
+    const response = await this.request<ChatResponse>(`/agents/${id}/chat`, {
       method: 'POST',
-      body: JSON.stringify({ message }),
+      body: JSON.stringify({ message, session_id: this.sessions.get(id) }),
     })
+    if (response.session_id) {
+      this.sessions.set(id, response.session_id)
+    }
+    return response
   }
 
   // Streaming chat method for real-time responses
@@ -138,7 +145,7 @@ class ApiClient {
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ message }),
+      body: JSON.stringify({ message, session_id: this.sessions.get(id) }),
     })
 
     if (!response.ok) {
@@ -172,6 +179,10 @@ class ApiClient {
             try {
               const parsed = JSON.parse(data) as StreamingChatChunk
               
+              if (parsed.type === 'start' && parsed.session_id) {
+                this.sessions.set(id, parsed.session_id)
+              }
+
               if (parsed.type === 'end') {
                 return
               }
@@ -189,7 +200,10 @@ class ApiClient {
   }
 
   async clearChatHistory(id: string): Promise<void> {
-    return this.request(`/agents/${id}/clear-history`, {
+    const sessionId = this.sessions.get(id)
+    this.sessions.delete(id)
+    const query = sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : ''
+    return this.request(`/agents/${id}/clear-history${query}`, {
       method: 'POST',
     })
   }
@@ -336,20 +350,36 @@ export interface CreateAgentRequest {
   agent_type: 'math' | 'intelligent' | 'autonomous' | 'researcher'
 }
 
+export interface ChatExecution {
+  tools_used: boolean
+  tools_invoked: string[]
+  tool_calls: { name: string; duration: number; ok: boolean }[]
+  llm_calls: number
+  cached_llm_calls: number
+  prompt_tokens: number
+  completion_tokens: number
+  total_tokens: number
+  duration: number
+}
+
 export interface ChatResponse {
   response: string
   agent_id: string
   tools_used?: boolean
+  execution?: ChatExecution
   timestamp: string
   user_id?: number
+  session_id?: string
 }
 
 // Streaming chat types
 export interface StreamingChatChunk {
-  type: 'start' | 'content' | 'progress' | 'success' | 'partial_success' | 'error' | 'paper' | 'end'
+  type: 'start' | 'content' | 'progress' | 'success' | 'partial_success' | 'error' | 'paper' | 'result' | 'end'
   content?: string
   agent_id?: string
+  session_id?: string
   tools_used?: boolean
+  execution?: ChatExecution
   timestamp: string
   step?: string
   result?: any